@@ -0,0 +1,25 @@
+import secrets
+from fastapi import APIRouter, HTTPException, Depends, Header
+
+from .config import settings
+from .reloader import reload_model_bundle
+
+def require_admin_token(x_admin_token: str = Header(default="")):
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled.")
+    if not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+admin_router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin_token)])
+
+@admin_router.post("/reload")
+async def reload_model():
+    """
+    Reloads the model and city price map from disk, warms the new bundle up and swaps it in.
+    Requires the X-Admin-Token header. In-flight requests finish on the previous version.
+    """
+    try:
+        return {"status": "reloaded", "model": await reload_model_bundle()}
+    except Exception as e:
+        print(f"Admin reload failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Reload failed, the previous model is still serving: {e}")
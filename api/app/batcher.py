@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+from .config import settings
+from .executor import inference_executor
+from .metrics import metrics
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-apartment predictions into one batched model call.
+
+    When no batch is running a request is dispatched immediately, so an idle server adds
+    no latency. While a batch is in flight, new requests collect for up to window_ms or
+    until max_batch_size are waiting, then go to the inference executor together and
+    each caller's future is resolved with its own row of the result.
+
+    Each request is scored with the model bundle its handler started with: a batch that
+    spans a hot reload makes one model call per bundle, so requests already in flight
+    finish on the previous version.
+    """
+
+    def __init__(self, window_ms: float, max_batch_size: int):
+        self.window_seconds = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._pending = []
+        self._timer = None
+        self._running_batches = 0
+        self._tasks = set()
+        self.batches = 0
+        self.batched_requests = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0 and self.max_batch_size > 1
+
+    async def submit(self, prediction_request, bundle=None):
+        """
+        Returns (model version, log-price prediction) for one request, computed as part of a
+        batch with the given bundle (the one serving at dispatch time if None).
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((prediction_request, bundle, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size or self._running_batches == 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        items, self._pending = self._pending[:self.max_batch_size], self._pending[self.max_batch_size:]
+        dispatched = time.perf_counter()
+        for _, _, _, enqueued in items:
+            metrics.observe_stage("batch_wait", dispatched - enqueued)
+        task = asyncio.get_running_loop().create_task(self._run_batch(items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.window_seconds, self._flush)
+
+    async def _run_batch(self, items):
+        self._running_batches += 1
+        self.batches += 1
+        self.batched_requests += len(items)
+        groups = {}
+        for item in items:
+            groups.setdefault(item[1], []).append(item)
+        try:
+            results = await asyncio.gather(
+                *(inference_executor.predict([request for request, _, _, _ in group], bundle) for bundle, group in groups.items()),
+                return_exceptions=True
+            )
+        finally:
+            self._running_batches -= 1
+            # Requests that queued up behind this batch need not wait out the rest of the window.
+            if self._pending and self._running_batches == 0:
+                self._flush()
+
+        for group, result in zip(groups.values(), results):
+            for index, (_, _, future, _) in enumerate(group):
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    version, predictions = result
+                    future.set_result((version, predictions[index]))
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.window_seconds * 1000,
+            "max_batch_size": self.max_batch_size,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "avg_batch_size": round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+        }
+
+micro_batcher = MicroBatcher(settings.MICROBATCH_WINDOW_MS, settings.MICROBATCH_MAX_SIZE)
@@ -0,0 +1,185 @@
+import asyncio
+import codecs
+import csv
+import json
+import numpy as np
+from pydantic import ValidationError
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+from .schemas import ApartmentPredictionRequest
+from .ml_model import custom_round
+from .executor import inference_executor, ExecutorSaturated
+
+CSV_MEDIA_TYPES = ("text/csv", "application/csv")
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines")
+
+# A record that never ends (e.g. an unbalanced quote) must not grow without bound.
+MAX_RECORD_CHARS = 1_000_000
+SATURATED_RETRY_SECONDS = 0.05
+SATURATED_MAX_RETRIES = 200
+
+class BulkInputError(Exception):
+    """Raised when the upload cannot be parsed any further."""
+
+def upload_format(content_type: str):
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in CSV_MEDIA_TYPES:
+        return "csv"
+    if media_type in NDJSON_MEDIA_TYPES:
+        return "ndjson"
+    return None
+
+async def _text_records(byte_stream, is_complete):
+    """
+    Decodes the upload incrementally and yields one record at a time, where is_complete
+    decides whether the text collected so far forms a whole record or continues on the next line.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="strict")
+    pending = ""
+    record = ""
+
+    async def split(text):
+        nonlocal pending, record
+        pending += text
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            record += line + "\n"
+            if is_complete(record):
+                yield record
+                record = ""
+            elif len(record) > MAX_RECORD_CHARS:
+                raise BulkInputError(f"A record is longer than {MAX_RECORD_CHARS} characters.")
+
+    try:
+        async for chunk in byte_stream:
+            async for complete in split(decoder.decode(chunk)):
+                yield complete
+        async for complete in split(decoder.decode(b"", final=True)):
+            yield complete
+    except UnicodeDecodeError:
+        raise BulkInputError("The upload is not valid UTF-8.")
+    if (record + pending).strip():
+        if not is_complete(record + pending):
+            raise BulkInputError("The upload ends in the middle of a record.")
+        yield record + pending
+
+async def csv_rows(byte_stream):
+    """Yields each CSV data row as a dict keyed by the header; empty cells are left out so schema defaults apply."""
+    # Doubled quotes inside a quoted field keep the count even, so an odd count means a quoted newline.
+    header = None
+    async for text in _text_records(byte_stream, lambda record: record.count('"') % 2 == 0):
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        yield {name: value for name, value in zip(header, values) if value != ""}
+    if header is None:
+        raise BulkInputError("The CSV upload has no header row.")
+
+async def ndjson_rows(byte_stream):
+    """Yields each NDJSON line as a dict."""
+    line_number = 0
+    async for text in _text_records(byte_stream, lambda record: True):
+        line_number += 1
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except json.JSONDecodeError as e:
+            row = {"__error__": f"Line {line_number} is not valid JSON: {e.msg}"}
+        yield row if isinstance(row, dict) else {"__error__": f"Line {line_number} is not a JSON object."}
+
+async def _predict_chunk(requests, bundle):
+    """Bulk scoring waits for a free inference worker instead of failing the whole upload."""
+    for _ in range(SATURATED_MAX_RETRIES):
+        try:
+            return await inference_executor.predict(requests, bundle)
+        except ExecutorSaturated:
+            await asyncio.sleep(SATURATED_RETRY_SECONDS)
+    raise ExecutorSaturated("Inference queue stayed full during bulk scoring.")
+
+def _line(payload: dict) -> bytes:
+    return (json.dumps(payload, ensure_ascii=False) + "\n").encode()
+
+async def score_rows(rows, bundle, chunk_size: int):
+    """
+    Validates rows as ApartmentPredictionRequest, scores them chunk_size at a time and yields
+    one NDJSON line per row in input order, followed by a summary line. Only one chunk of rows
+    is held at a time, and the next chunk is read only once the previous results have been sent.
+    """
+    scored = 0
+    invalid = 0
+    model_version = bundle.version
+    chunk = []
+
+    async def flush():
+        nonlocal scored, model_version
+        valid = [(index, row_id, request) for index, row_id, request in chunk if isinstance(request, ApartmentPredictionRequest)]
+        prices = {}
+        if valid:
+            model_version, prediction_logs = await _predict_chunk([request for _, _, request in valid], bundle)
+            for (index, _, _), price in zip(valid, np.expm1(prediction_logs)):
+                prices[index] = custom_round(price)
+            scored += len(valid)
+        lines = []
+        for index, row_id, result in chunk:
+            line = {"index": index} if row_id is None else {"index": index, "id": row_id}
+            if index in prices:
+                line["estimated_price_km"] = prices[index]
+            else:
+                line["errors"] = result
+            lines.append(_line(line))
+        chunk.clear()
+        return b"".join(lines)
+
+    index = 0
+
+    def summary() -> dict:
+        return {"rows": index, "scored": scored, "invalid": invalid, "model_version": model_version}
+
+    try:
+        async for row in rows:
+            row_id = row.get("id")
+            if "__error__" in row:
+                result = [{"loc": [], "msg": row["__error__"], "type": "json_invalid"}]
+            else:
+                try:
+                    result = ApartmentPredictionRequest.model_validate(row)
+                except ValidationError as e:
+                    result = [{"loc": list(err["loc"]), "msg": err["msg"], "type": err["type"]} for err in e.errors()]
+            if not isinstance(result, ApartmentPredictionRequest):
+                invalid += 1
+            chunk.append((index, row_id, result))
+            index += 1
+            if len(chunk) >= chunk_size:
+                yield await flush()
+        if chunk:
+            yield await flush()
+        yield _line({"summary": summary()})
+    except BulkInputError as e:
+        if chunk:
+            yield await flush()
+        yield _line({"error": str(e), "summary": summary()})
+    except ClientDisconnect:
+        raise
+    except Exception as e:
+        print(f"Bulk prediction error: {e}")
+        yield _line({"error": "An internal error occurred during prediction.", "summary": summary()})
+
+class UploadStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body is produced while the request body is still being read.
+    StreamingResponse normally runs a task that reads receive() to watch for a disconnect,
+    which would consume the upload; here the upload stream itself reports the disconnect.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except ClientDisconnect:
+            return
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+
+from .config import settings
+from .ml_model import ml_model
+
+def _canonical(value):
+    value = getattr(value, 'value', value)
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    return value
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL for rounded price predictions.
+
+    Entries belong to the serving model version (current_version()). The cache empties once
+    when that version changes, so a reloaded model or city map is never served stale prices.
+    Requests still holding the previous bundle during a hot reload miss, and their results are
+    dropped, without touching the entries of the new version.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, current_version):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._current_version = current_version
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    @staticmethod
+    def key_for(prediction_request) -> tuple:
+        """Builds a hashable key from every request field, with enums and numbers normalized."""
+        return tuple(_canonical(getattr(prediction_request, name)) for name in type(prediction_request).model_fields)
+
+    def _sync_version(self):
+        current = self._current_version()
+        if current != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = current
+
+    def get(self, key, version):
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._sync_version()
+            if version != self._version:
+                self.misses += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, version):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._sync_version()
+            # A prediction that finished after a reload belongs to the old version; drop it.
+            if version != self._version:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "model_version": self._version,
+            }
+
+prediction_cache = PredictionCache(
+    settings.PREDICTION_CACHE_SIZE, settings.PREDICTION_CACHE_TTL_SECONDS, lambda: ml_model.version
+)
@@ -0,0 +1,69 @@
+import numpy as np
+
+from .features import location_to_city, property_age
+
+class ComparablesIndex:
+    """
+    Nearest-neighbour index over the training listings, built by ml/comparables.py: one
+    KD-tree per city on standardised size, rooms, floor and age. Queries run in the
+    request's city partition, or in 'Other' for cities that were rare at training time.
+    """
+
+    def __init__(self, index: dict):
+        self.features = index["features"]
+        self.medians = index["medians"]
+        self.mean = index["mean"]
+        self.scale = index["scale"]
+        self.listings = index["listings"]
+        self.cities = index["cities"]
+        self.size = len(next(iter(self.listings.values())))
+
+    @classmethod
+    def load(cls, path: str) -> "ComparablesIndex":
+        """joblib (and sklearn, for the KD-trees) are only imported here, like for the model."""
+        import joblib
+        return cls(joblib.load(path))
+
+    def partition_for(self, location: str):
+        city = location_to_city(location)
+        if city in self.cities:
+            return city
+        return "Other" if "Other" in self.cities else None
+
+    def _query_point(self, prediction_request) -> np.ndarray:
+        values = {
+            "size_m2": prediction_request.size_m2,
+            "rooms": prediction_request.rooms,
+            "floor": prediction_request.floor,
+            "property_age": property_age(prediction_request.year_built),
+        }
+        point = np.array([values[feature] for feature in self.features], dtype=float)
+        point = np.where(np.isnan(point), self.medians, point)
+        return ((point - self.mean) / self.scale).reshape(1, -1)
+
+    def query(self, prediction_request, k: int):
+        """Returns (partition, listings) for the k nearest listings, closest first."""
+        partition = self.partition_for(prediction_request.location)
+        if partition is None:
+            return None, []
+        tree, rows = self.cities[partition]["tree"], self.cities[partition]["rows"]
+        k = min(k, len(rows))
+        distances, positions = tree.query(self._query_point(prediction_request), k=k)
+
+        results = []
+        for distance, position in zip(distances[0], positions[0]):
+            row = rows[position]
+            listing = {column: _json_value(values[row]) for column, values in self.listings.items()}
+            listing["distance"] = round(float(distance), 4)
+            results.append(listing)
+        return partition, results
+
+    def info(self) -> dict:
+        return {"listings": self.size, "partitions": len(self.cities)}
+
+def _json_value(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
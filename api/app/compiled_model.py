@@ -0,0 +1,119 @@
+"""
+On-disk cache of what ModelBundle compiles from the sklearn pipeline: the tree engine's
+node arrays and the feature vectorizer's spec, keyed by the model file's content digest.
+
+With a cache entry present a replica can serve without importing sklearn or unpickling
+the pipeline; the arrays are memory-mapped and the pipeline is loaded in the background.
+Build the entry ahead of time (e.g. in the Docker image) with:  python -m app.compiled_model
+
+In the shared serving mode the directory also holds published.json, naming the entry and
+city map every worker process should serve. Workers memory-map the same read-only files,
+so the model's arrays sit in the page cache once rather than once per worker.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development only
+    fcntl = None
+
+from .config import settings
+from .tree_engine import CompiledTreeEnsemble
+
+FORMAT_VERSION = 1
+
+def compiled_base() -> str:
+    return settings.COMPILED_MODEL_DIR or os.path.join(os.path.dirname(settings.MODEL_PATH), "compiled")
+
+def compiled_dir(model_digest: str) -> str:
+    return os.path.join(compiled_base(), model_digest[:16])
+
+def published_path() -> str:
+    return os.path.join(compiled_base(), "published.json")
+
+def save_compiled(model_digest: str, tree_engine, vectorizer) -> str:
+    """Writes a cache entry atomically; an existing entry for the same digest is left alone."""
+    target = compiled_dir(model_digest)
+    if os.path.isdir(target):
+        return target
+    parent = os.path.dirname(target)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=parent)
+    try:
+        # mkdtemp creates the directory owner-only; workers may run as a different user.
+        os.chmod(staging, 0o755)
+        meta = {
+            "format": FORMAT_VERSION,
+            "model_digest": model_digest,
+            "tree_engine": tree_engine.save(staging),
+            "vectorizer": vectorizer.spec,
+        }
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        os.rename(staging, target)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        if not os.path.isdir(target):
+            raise
+    return target
+
+def load_compiled(model_digest: str):
+    """Returns (tree engine, vectorizer spec) for the digest, or None if there is no usable entry."""
+    directory = compiled_dir(model_digest)
+    try:
+        with open(os.path.join(directory, "meta.json"), "r") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None
+    if meta.get("format") != FORMAT_VERSION or meta.get("model_digest") != model_digest:
+        return None
+    tree_engine = CompiledTreeEnsemble.load(directory, meta["tree_engine"], mmap=settings.MODEL_MMAP)
+    return tree_engine, meta["vectorizer"]
+
+@contextmanager
+def publication_lock():
+    """Cross-process lock, so of N workers starting together only one unpickles and compiles the model."""
+    os.makedirs(compiled_base(), exist_ok=True)
+    with open(os.path.join(compiled_base(), ".lock"), "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def publish(model_digest: str, city_price_map: dict, city_map_digest: str):
+    """Points every shared-mode worker at a compiled entry and city map; replaced atomically."""
+    published = {
+        "model_digest": model_digest,
+        "city_map_digest": city_map_digest,
+        "city_price_map": city_price_map,
+        "published_at": time.time(),
+    }
+    staging = f"{published_path()}.{os.getpid()}.tmp"
+    with open(staging, "w") as f:
+        json.dump(published, f)
+    os.replace(staging, published_path())
+
+def read_published():
+    try:
+        with open(published_path(), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+if __name__ == "__main__":
+    from .ml_model import ml_model
+
+    ml_model.load_model()
+    ml_model.load_city_map()
+    bundle = ml_model.bundle
+    if bundle is None or bundle.tree_engine is None or bundle.vectorizer is None:
+        raise SystemExit("Model could not be compiled; nothing to cache.")
+    print(f"Compiled model written to {save_compiled(ml_model._model_digest, bundle.tree_engine, bundle.vectorizer)}")
@@ -6,10 +6,40 @@ load_dotenv(dotenv_path="../.env")
 class Settings:
     MODEL_PATH: str = os.getenv("MODEL_PATH", "../ml/model.joblib")
     CITY_MAP_PATH: str = os.getenv("CITY_MAP_PATH", "../ml/city_price_map.json")
+    COMPARABLES_PATH: str = os.getenv("COMPARABLES_PATH", "../ml/comparables.joblib")
+    COMPILED_MODEL_DIR: str = os.getenv("COMPILED_MODEL_DIR", "")
+    MODEL_REGISTRY_DIR: str = os.getenv("MODEL_REGISTRY_DIR", "")
+    MODEL_REGISTRY_VERSION: str = os.getenv("MODEL_REGISTRY_VERSION", "")
+    MODEL_SERVING_MODE: str = os.getenv("MODEL_SERVING_MODE", "private")
+    MODEL_SHARED_POLL_SECONDS: float = float(os.getenv("MODEL_SHARED_POLL_SECONDS", 1))
+    MODEL_MMAP: bool = os.getenv("MODEL_MMAP", "true").lower() == "true"
+    MODEL_BACKGROUND_LOAD: bool = os.getenv("MODEL_BACKGROUND_LOAD", "true").lower() == "true"
+    INFERENCE_BACKEND: str = os.getenv("INFERENCE_BACKEND", "compiled")
+    MODEL_WATCH_INTERVAL_SECONDS: float = float(os.getenv("MODEL_WATCH_INTERVAL_SECONDS", 0))
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+
+    INFERENCE_EXECUTOR: str = os.getenv("INFERENCE_EXECUTOR", "thread")
+    INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", min(4, os.cpu_count() or 1)))
+    INFERENCE_QUEUE_SIZE: int = int(os.getenv("INFERENCE_QUEUE_SIZE", 64))
+
+    MICROBATCH_WINDOW_MS: float = float(os.getenv("MICROBATCH_WINDOW_MS", 2))
+    MICROBATCH_MAX_SIZE: int = int(os.getenv("MICROBATCH_MAX_SIZE", 32))
     
     RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", 20))
     RATE_LIMIT_MINUTES: int = int(os.getenv("RATE_LIMIT_MINUTES", 1))
+    RATE_LIMIT_STRATEGY: str = os.getenv("RATE_LIMIT_STRATEGY", "token-bucket")
+    RATE_LIMIT_STORAGE_URI: str = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+
+    BATCH_MAX_SIZE: int = int(os.getenv("BATCH_MAX_SIZE", 1000))
+    SWEEP_MAX_POINTS: int = int(os.getenv("SWEEP_MAX_POINTS", 2500))
+    BULK_CHUNK_SIZE: int = int(os.getenv("BULK_CHUNK_SIZE", 500))
+    COMPARABLES_MAX_K: int = int(os.getenv("COMPARABLES_MAX_K", 50))
+
+    PREDICTION_CACHE_SIZE: int = int(os.getenv("PREDICTION_CACHE_SIZE", 10000))
+    PREDICTION_CACHE_TTL_SECONDS: float = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", 3600))
     
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
     ALLOWED_ORIGINS: list = os.getenv("ALLOWED_ORIGINS", "*").split(",")
     
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
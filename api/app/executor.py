@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .config import settings
+from .ml_model import ml_model, predict_log
+from .metrics import metrics
+
+class ExecutorSaturated(Exception):
+    """Raised when the inference queue is full and the request should be rejected immediately."""
+
+def _timed_call(fn, args):
+    started = time.monotonic()
+    return started, fn(*args)
+
+def _load_worker_resources():
+    if ml_model.bundle is None and ml_model.load():
+        threading.Thread(target=ml_model.bundle.preload_pipeline, daemon=True).start()
+
+class InferenceExecutor:
+    """
+    Runs CPU-bound inference on a thread or process pool so the event loop stays free.
+
+    At most max_workers calls run at once and at most max_queue more may wait; anything
+    beyond that is rejected with ExecutorSaturated instead of piling up latency.
+    """
+
+    def __init__(self, kind: str, max_workers: int, max_queue: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown inference executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.last_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._total_wait_seconds = 0.0
+
+    def start(self):
+        if self._pool is not None:
+            return
+        if self.kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_load_worker_resources)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+
+    def restart(self):
+        """Replaces the pool with a fresh one; calls already submitted still finish on the old pool."""
+        old_pool, self._pool = self._pool, None
+        self.start()
+        if old_pool is not None:
+            old_pool.shutdown(wait=False)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.max_workers)
+
+    async def run(self, fn, *args):
+        """Runs fn(*args) on the pool. Process pools need fn to be a picklable module-level function."""
+        if self.in_flight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise ExecutorSaturated(f"Inference queue is full ({self.queue_depth} waiting).")
+        self.start()
+
+        self.in_flight += 1
+        submitted = time.monotonic()
+        try:
+            started, result = await asyncio.get_running_loop().run_in_executor(self._pool, _timed_call, fn, args)
+        finally:
+            self.in_flight -= 1
+
+        wait = max(0.0, started - submitted)
+        self.completed += 1
+        self.last_wait_seconds = wait
+        self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        self._total_wait_seconds += wait
+        metrics.observe_stage("queue_wait", wait)
+        return result
+
+    async def predict(self, prediction_requests, bundle=None):
+        """
+        Scores requests with the given model bundle and returns (version, log predictions).
+        Process workers cannot share the parent's bundle, so they score with their own
+        and report which version that was.
+        """
+        version, predictions, timings = await self.run(
+            predict_log, prediction_requests, bundle if self.kind == "thread" else None
+        )
+        for stage, seconds in timings.items():
+            metrics.observe_stage(stage, seconds)
+        return version, predictions
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "last_wait_ms": round(self.last_wait_seconds * 1000, 3),
+            "avg_wait_ms": round(self._total_wait_seconds / self.completed * 1000, 3) if self.completed else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+        }
+
+inference_executor = InferenceExecutor(
+    settings.INFERENCE_EXECUTOR, settings.INFERENCE_WORKERS, settings.INFERENCE_QUEUE_SIZE
+)
@@ -0,0 +1,55 @@
+import re
+import numpy as np
+
+REFERENCE_YEAR = 2025
+DEFAULT_DESC_LEN = 150
+
+def parse_year(year_str: str) -> int:
+    if not isinstance(year_str, str): return np.nan
+    year_str = year_str.lower().strip()
+    if 'do' in year_str:
+        try:
+            years = [int(y.strip()) for y in year_str.split('do')]
+            return int(np.mean(years))
+        except: return np.nan
+    if 'prije' in year_str: return 1940
+    match = re.search(r'\d{4}', year_str)
+    if match: return int(match.group(0))
+    return np.nan
+
+def location_to_city(location: str) -> str:
+    return location.split('-')[0].strip()
+
+def property_age(year_built: str) -> float:
+    return REFERENCE_YEAR - parse_year(year_built)
+
+def condition_flags(condition: str) -> dict:
+    """The description keyword flags the model expects, inferred from the selected condition."""
+    return {
+        'has_renoviran': 1 if condition in ["Renoviran", "Novogradnja"] else 0,
+        'has_novogradnja_desc': 1 if condition == "Novogradnja" else 0,
+    }
+
+def build_features(prediction_request, city_price_map: dict) -> dict:
+    """Maps a validated ApartmentPredictionRequest to the feature row the model was trained on."""
+    features = {}
+
+    direct_map_keys = [
+        'size_m2', 'rooms', 'floor', 'bathrooms', 'condition', 'furnished',
+        'heating_type', 'has_elevator', 'has_parking', 'has_balcony',
+        'is_registered', 'has_armored_door'
+    ]
+    for key in direct_map_keys:
+        features[key] = getattr(prediction_request, key)
+
+    features['city'] = location_to_city(prediction_request.location)
+    features['property_age'] = property_age(prediction_request.year_built)
+    features['m2_per_room'] = prediction_request.size_m2 / prediction_request.rooms if prediction_request.rooms > 0 else np.nan
+    features['city_median_price_per_m2'] = city_price_map.get(features['city'])
+
+    features['desc_len'] = DEFAULT_DESC_LEN
+    features.update(condition_flags(prediction_request.condition))
+    features['has_pogled'] = 0
+    features['has_garaza_desc'] = 1 if prediction_request.has_garage else 0
+
+    return features
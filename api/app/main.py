@@ -1,14 +1,21 @@
+import asyncio
 from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter
 from slowapi.util import get_remote_address
-from slowapi.middleware import SlowAPIMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
+from slowapi.middleware import SlowAPIASGIMiddleware
+from starlette.datastructures import MutableHeaders
 
 from .ml_model import ml_model
+from .executor import inference_executor
+from .batcher import micro_batcher
+from .reloader import artifact_watcher, publication_watcher, load_model_bundle
+from .cache import prediction_cache
+from .metrics import metrics, MetricsMiddleware
+from .rate_limit import create_limiter
 from .config import settings
 
-limiter = Limiter(key_func=get_remote_address)
+limiter = create_limiter(get_remote_address)
 
 app = FastAPI(
     title="BIH Real Estate Estimator API",
@@ -17,15 +24,36 @@ app = FastAPI(
 )
 
 app.state.limiter = limiter
-app.add_middleware(SlowAPIMiddleware)
+app.add_middleware(SlowAPIASGIMiddleware)
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        return response
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+}
+
+class SecurityHeadersMiddleware:
+    """
+    Pure ASGI middleware that sets the security headers on http.response.start. Unlike
+    BaseHTTPMiddleware it runs no extra task and leaves the response body stream untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in SECURITY_HEADERS.items():
+                    headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
 
 app.add_middleware(SecurityHeadersMiddleware)
 
@@ -37,19 +65,75 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 @app.on_event("startup")
-def startup_event():
-    ml_model.load_model()
-    ml_model.load_city_map()
+async def startup_event():
+    inference_executor.start()
+    if settings.MODEL_BACKGROUND_LOAD:
+        # Serve liveness checks right away; /ready flips once the model is loaded and warm.
+        app.state.model_loader = asyncio.get_running_loop().create_task(load_model_bundle())
+    else:
+        await load_model_bundle()
+    artifact_watcher.start()
+    publication_watcher.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    artifact_watcher.stop()
+    publication_watcher.stop()
+    inference_executor.shutdown()
 
 @app.get("/", tags=["Root"])
 @limiter.limit(f"{settings.RATE_LIMIT_REQUESTS}/{settings.RATE_LIMIT_MINUTES}minute")
 async def read_root(request: Request):
     return {"message": "Welcome to the BIH Real Estate Estimator API. Go to /docs for details."}
 
+def model_status() -> str:
+    if ml_model.ready:
+        return "ready"
+    return "unavailable" if ml_model.load_error else "loading"
+
 @app.get("/health", tags=["Health"])
 async def health_check():
-    return {"status": "healthy", "environment": settings.ENVIRONMENT}
+    return {
+        "status": "healthy" if ml_model.ready else "degraded",
+        "model_status": model_status(),
+        "environment": settings.ENVIRONMENT,
+        "model": ml_model.bundle.info() if ml_model.bundle is not None else None,
+        "inference": inference_executor.stats(),
+        "micro_batching": micro_batcher.stats()
+    }
+
+@app.get("/ready", tags=["Health"])
+async def readiness_check():
+    """Readiness probe: 200 only once the model and city map are loaded and a warm-up prediction succeeded."""
+    if ml_model.ready and ml_model.bundle is not None:
+        return {"status": "ready", "model_version": ml_model.version}
+    return JSONResponse(
+        status_code=503,
+        content={"status": model_status(), "error": ml_model.load_error}
+    )
+
+@app.get("/metrics", tags=["Monitoring"], response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Request and per-stage latency histograms, counters and model version in Prometheus text format."""
+    executor_stats = inference_executor.stats()
+    cache_stats = prediction_cache.stats()
+    extra_metrics = [
+        ("bih_inference_in_flight", "gauge", "Inference calls running or queued.", executor_stats["in_flight"]),
+        ("bih_inference_queue_depth", "gauge", "Inference calls waiting for a worker.", executor_stats["queue_depth"]),
+        ("bih_inference_rejected_total", "counter", "Inference calls rejected because the queue was full.", executor_stats["rejected"]),
+        ("bih_prediction_cache_entries", "gauge", "Entries in the prediction cache.", cache_stats["size"]),
+        ("bih_prediction_cache_hits_total", "counter", "Prediction cache hits.", cache_stats["hits"]),
+        ("bih_prediction_cache_misses_total", "counter", "Prediction cache misses.", cache_stats["misses"]),
+    ]
+    return PlainTextResponse(
+        metrics.render(ml_model.version, extra_metrics),
+        media_type="text/plain; version=0.0.4"
+    )
 
 from .router import router
-app.include_router(router)
\ No newline at end of file
+from .admin import admin_router
+app.include_router(router)
+app.include_router(admin_router)
\ No newline at end of file
@@ -0,0 +1,231 @@
+import bisect
+import functools
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi.routing import APIRoute
+
+from .config import settings
+
+# Log-spaced bucket bounds from 10us to ~95s, four per doubling, so quantile estimates stay within ~10%.
+BUCKET_BOUNDS = [1e-5 * 2 ** (i / 4) for i in range(93)]
+QUANTILES = (0.5, 0.95, 0.99)
+
+_route_timings = ContextVar("route_timings", default=None)
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram; observe() is a bisect and three additions.
+    It takes no lock: every observation is made on the event loop thread, including
+    stage timings that inference workers return alongside their predictions.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile by interpolating log-linearly inside the bucket that contains it."""
+        if self.count == 0:
+            return math.nan
+        target = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= target:
+                if index == len(BUCKET_BOUNDS):
+                    return BUCKET_BOUNDS[-1]
+                upper = BUCKET_BOUNDS[index]
+                lower = BUCKET_BOUNDS[index - 1] if index > 0 else upper / 2 ** 0.25
+                fraction = (target - seen) / bucket_count
+                return lower * (upper / lower) ** fraction
+            seen += bucket_count
+        return BUCKET_BOUNDS[-1]
+
+class MetricsRegistry:
+    """Request and prediction-stage metrics, rendered in the Prometheus text exposition format."""
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.request_durations = {}
+        self.stage_durations = {}
+        self.requests = {}
+        self.errors = {}
+
+    def observe_request(self, path: str, method: str, status: int, seconds: float):
+        if not self.enabled:
+            return
+        histogram = self.request_durations.get(path)
+        if histogram is None:
+            histogram = self.request_durations[path] = Histogram()
+        histogram.observe(seconds)
+        key = (path, method, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        if status >= 500:
+            self.errors[path] = self.errors.get(path, 0) + 1
+
+    def observe_stage(self, stage: str, seconds: float):
+        if not self.enabled:
+            return
+        histogram = self.stage_durations.get(stage)
+        if histogram is None:
+            histogram = self.stage_durations[stage] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, time.perf_counter() - started)
+
+    def render(self, model_version=None, extra_metrics=()) -> str:
+        """extra_metrics holds (name, type, help, value) tuples for point-in-time values owned elsewhere."""
+        lines = []
+        _render_histograms(
+            lines, "bih_request_duration_seconds",
+            "Wall time of HTTP requests through the whole middleware stack.",
+            "path", self.request_durations
+        )
+        _render_histograms(
+            lines, "bih_prediction_stage_duration_seconds",
+            "Wall time of individual prediction stages.",
+            "stage", self.stage_durations
+        )
+
+        lines.append("# HELP bih_requests_total HTTP requests by route, method and status.")
+        lines.append("# TYPE bih_requests_total counter")
+        for (path, method, status), count in sorted(self.requests.items()):
+            lines.append(f'bih_requests_total{{path="{_escape(path)}",method="{method}",status="{status}"}} {count}')
+
+        lines.append("# HELP bih_request_errors_total HTTP requests that ended with a 5xx status.")
+        lines.append("# TYPE bih_request_errors_total counter")
+        for path, count in sorted(self.errors.items()):
+            lines.append(f'bih_request_errors_total{{path="{_escape(path)}"}} {count}')
+
+        lines.append("# HELP bih_model_info Version of the model bundle currently serving.")
+        lines.append("# TYPE bih_model_info gauge")
+        if model_version is not None:
+            lines.append(f'bih_model_info{{version="{_escape(model_version)}"}} 1')
+
+        for name, metric_type, help_text, value in extra_metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _render_histograms(lines, name, help_text, label, histograms):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, histogram in sorted(histograms.items()):
+        label_value = _escape(key)
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKET_BOUNDS, histogram.counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{label}="{label_value}",le="{bound:.6g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{label}="{label_value}",le="+Inf"}} {histogram.count}')
+        lines.append(f'{name}_sum{{{label}="{label_value}"}} {histogram.sum:.9f}')
+        lines.append(f'{name}_count{{{label}="{label_value}"}} {histogram.count}')
+
+    quantile_name = name.replace("_seconds", "_quantile_seconds")
+    lines.append(f"# HELP {quantile_name} Estimated p50/p95/p99 of {name}.")
+    lines.append(f"# TYPE {quantile_name} gauge")
+    for key, histogram in sorted(histograms.items()):
+        for q in QUANTILES:
+            lines.append(f'{quantile_name}{{{label}="{_escape(key)}",quantile="{q}"}} {histogram.quantile(q):.9f}')
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware that times each HTTP request through everything added before it,
+    and attributes the time outside the route handler to the middleware stage.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        timings = {}
+        scope["metrics.timings"] = timings
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            metrics.observe_request(path, scope["method"], status, elapsed)
+            if "route" in timings:
+                metrics.observe_stage("middleware", elapsed - timings["route"])
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that splits handler time into validation (body parsing, Pydantic and
+    dependencies), endpoint and response serialization stages.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        # include_router() builds the route again from the already wrapped endpoint.
+        if getattr(endpoint, "_timed", False):
+            super().__init__(path, endpoint, **kwargs)
+            return
+
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args, **kw):
+            timings = _route_timings.get()
+            if timings is not None:
+                timings["endpoint_started"] = time.perf_counter()
+            try:
+                return await endpoint(*args, **kw)
+            finally:
+                if timings is not None:
+                    timings["endpoint_finished"] = time.perf_counter()
+
+        timed_endpoint._timed = True
+        super().__init__(path, timed_endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            if not metrics.enabled:
+                return await handler(request)
+            timings = request.scope.get("metrics.timings", {})
+            token = _route_timings.set(timings)
+            started = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                finished = time.perf_counter()
+                _route_timings.reset(token)
+                timings["route"] = finished - started
+                if "endpoint_started" in timings:
+                    metrics.observe_stage("validation", timings["endpoint_started"] - started)
+                    metrics.observe_stage("endpoint", timings["endpoint_finished"] - timings["endpoint_started"])
+                    metrics.observe_stage("serialization", finished - timings["endpoint_finished"])
+
+        return timed_handler
+
+metrics = MetricsRegistry(settings.METRICS_ENABLED)
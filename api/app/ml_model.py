@@ -1,9 +1,141 @@
-import joblib
 import json
-import re
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
 import numpy as np
-import pandas as pd
 from .config import settings
+from .schemas import ApartmentPredictionRequest
+from .features import build_features
+from .vectorizer import FeatureVectorizer
+from .tree_engine import CompiledTreeEnsemble
+from .comparables import ComparablesIndex
+from .compiled_model import load_compiled, save_compiled, publication_lock, publish, read_published
+from . import registry
+
+# Above this many rows sklearn's Cython tree loop outruns the NumPy traversal (see benchmarks/tree_engine.py).
+COMPILED_ENGINE_MAX_ROWS = 64
+
+class ModelBundle:
+    """
+    Immutable snapshot of a loaded model and city map, plus everything compiled from them.
+
+    Requests hold on to the bundle they started with, so a hot reload swaps in a new
+    bundle without changing the model underneath an in-flight prediction.
+
+    A bundle built from the compiled-model cache starts without the sklearn pipeline and
+    unpickles it from model_path on first use; until then the tree engine serves every batch.
+    Shared-mode bundles have no model_path and always serve from the tree engine.
+
+    The comparables index trained alongside the model travels with it, so a reload swaps both together.
+    Bundles from the model registry also keep the bundle's provenance for info().
+    """
+
+    def __init__(self, model, city_price_map: dict, version: str, compiled=None, model_path: str = None, comparables=None,
+                 registry_info: dict = None):
+        self._model = model
+        self._model_path = model_path
+        self._model_lock = threading.Lock()
+        self.city_price_map = city_price_map
+        self.comparables = comparables
+        self.registry_info = registry_info
+        self.version = version
+        self.loaded_at = time.time()
+        self.from_compiled_cache = compiled is not None
+        if compiled is not None:
+            self.tree_engine, vectorizer_spec = compiled
+            self.vectorizer = FeatureVectorizer.from_spec(vectorizer_spec, city_price_map)
+        else:
+            self.tree_engine = self._compile_tree_engine()
+            self.vectorizer = self._compile_vectorizer()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = _load_model_file(self._model_path)
+        return self._model
+
+    def preload_pipeline(self):
+        """Unpickles the sklearn pipeline ahead of the first batch that needs it."""
+        if self._model is not None or self._model_path is None:
+            return
+        try:
+            self.model
+        except Exception as e:
+            print(f"Background load of the sklearn pipeline failed: {e}")
+
+    def _compile_vectorizer(self):
+        try:
+            vectorizer = FeatureVectorizer.compile(self.model, self.city_price_map)
+            print("Feature vectorizer compiled successfully.")
+            return vectorizer
+        except Exception as e:
+            print(f"Feature vectorizer unavailable, falling back to the pipeline preprocessor: {e}")
+            return None
+
+    def _compile_tree_engine(self):
+        if settings.INFERENCE_BACKEND != "compiled":
+            return None
+        try:
+            tree_engine = CompiledTreeEnsemble.compile(self.model.steps[-1][1])
+            print(f"Compiled tree engine ready ({tree_engine.n_trees} trees).")
+            return tree_engine
+        except Exception as e:
+            print(f"Compiled tree engine unavailable, falling back to sklearn: {e}")
+            return None
+
+    def predict_log(self, prediction_requests, timings: dict = None) -> np.ndarray:
+        """
+        Returns the model's log-price predictions for a list of validated requests.
+        If a timings dict is given, the feature and model stage durations are stored in it.
+        """
+        started = time.perf_counter()
+        if self.vectorizer is not None:
+            X = self.vectorizer.transform(prediction_requests)
+        else:
+            import pandas as pd
+            input_df = pd.DataFrame([build_features(r, self.city_price_map) for r in prediction_requests])
+            X = self.model[:-1].transform(input_df)
+        features_done = time.perf_counter()
+        predictions = self.predict_transformed(X)
+        if timings is not None:
+            timings["features"] = features_done - started
+            timings["model"] = time.perf_counter() - features_done
+        return predictions
+
+    def predict_transformed(self, X) -> np.ndarray:
+        """Runs the selected inference backend on an already preprocessed feature matrix."""
+        if self.tree_engine is not None and (X.shape[0] <= COMPILED_ENGINE_MAX_ROWS or self._model is None):
+            return self.tree_engine.predict(X)
+        return self.model.steps[-1][1].predict(X)
+
+    def warm_up(self):
+        """
+        Runs the schema example through the full prediction path and checks the result.
+        The sklearn regressor is also called once, so the first large batch does not pay
+        for its lazy initialisation.
+        """
+        example = warm_up_request()
+        prediction = self.predict_log([example])
+        if not np.all(np.isfinite(prediction)):
+            raise ValueError(f"Warm-up prediction is not finite: {prediction}")
+        if self._model is not None and self.tree_engine is not None and self.vectorizer is not None:
+            self._model.steps[-1][1].predict(self.vectorizer.transform([example]))
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "loaded_at": datetime.fromtimestamp(self.loaded_at, tz=timezone.utc).isoformat(),
+            "vectorizer": self.vectorizer is not None,
+            "tree_engine": self.tree_engine is not None,
+            "compiled_cache": self.from_compiled_cache,
+            "pipeline_loaded": self._model is not None,
+            "comparables": self.comparables.info() if self.comparables is not None else None,
+            "registry": self.registry_info,
+        }
 
 class ModelSingleton:
     _instance = None
@@ -13,39 +145,311 @@ class ModelSingleton:
             cls._instance = super(ModelSingleton, cls).__new__(cls)
             cls._instance.model = None
             cls._instance.city_price_map = None
+            cls._instance.bundle = None
+            cls._instance._model_digest = None
+            cls._instance._city_map_digest = None
+            cls._instance._reload_lock = threading.Lock()
+            cls._instance.ready = False
+            cls._instance.load_error = None
         return cls._instance
 
+    @property
+    def version(self):
+        return self.bundle.version if self.bundle is not None else None
+
+    @property
+    def vectorizer(self):
+        return self.bundle.vectorizer if self.bundle is not None else None
+
+    @property
+    def tree_engine(self):
+        return self.bundle.tree_engine if self.bundle is not None else None
+
     def load_model(self):
+        self._read_model()
+        self._publish()
+
+    def load_city_map(self):
+        self._read_city_map()
+        self._publish()
+
+    def _read_model(self):
         try:
-            self.model = joblib.load(settings.MODEL_PATH)
+            self.model = _load_model_file(settings.MODEL_PATH)
+            self._model_digest = _file_digest(settings.MODEL_PATH)
             print("ML Model loaded successfully.")
         except FileNotFoundError:
-            print(f"FATAL ERROR: Model not found at {settings.MODEL_PATH}")
+            self.load_error = f"Model not found at {settings.MODEL_PATH}"
+            print(f"FATAL ERROR: {self.load_error}")
         except Exception as e:
+            self.load_error = f"Error while loading the model: {e}"
             print(f"An error occurred while loading the model: {e}")
 
-    def load_city_map(self):
+    def _read_city_map(self):
         try:
             with open(settings.CITY_MAP_PATH, 'r') as f:
                 self.city_price_map = json.load(f)
+            self._city_map_digest = _file_digest(settings.CITY_MAP_PATH)
             print("City price map loaded successfully.")
         except FileNotFoundError:
-            print(f"FATAL ERROR: City map not found at {settings.CITY_MAP_PATH}")
+            self.load_error = f"City map not found at {settings.CITY_MAP_PATH}"
+            print(f"FATAL ERROR: {self.load_error}")
 
-ml_model = ModelSingleton()
+    def load(self) -> bool:
+        """
+        Startup load: serves the registry bundle when MODEL_REGISTRY_DIR is set. Otherwise reads
+        the city map and the compiled-model cache entry for the model file, falling back to
+        unpickling the pipeline (and writing the cache) when there is none. Like reload(), the
+        bundle is warmed up before it is swapped in, so a bundle that fails is never served.
+        Returns whether the model is usable; the reason is kept in load_error otherwise.
+        """
+        with self._reload_lock:
+            self.load_error = None
+            published = None
+            if settings.MODEL_REGISTRY_DIR:
+                try:
+                    bundle = _registry_bundle()
+                except Exception as e:
+                    self.load_error = f"Registry bundle unavailable: {e}"
+                    print(f"FATAL ERROR: {self.load_error}")
+                    return False
+                print(f"ML Model loaded from registry bundle {bundle.version}.")
+            elif settings.MODEL_SERVING_MODE == "shared":
+                try:
+                    published = self._publish_shared()
+                    bundle = _attach(published)
+                except Exception as e:
+                    self.load_error = f"Shared model unavailable: {e}"
+                    print(f"FATAL ERROR: {self.load_error}")
+                    return False
+                print("ML Model attached from the shared compiled cache.")
+            else:
+                self._read_city_map()
+                if self.city_price_map is None:
+                    return False
+                bundle = self._compiled_cache_bundle()
+                if bundle is None:
+                    self._read_model()
+                    bundle = self._pipeline_bundle()
+                if bundle is None:
+                    return False
+            try:
+                bundle.warm_up()
+            except Exception as e:
+                self.load_error = f"Warm-up failed: {e}"
+                print(f"Model warm-up failed: {e}")
+                return False
+
+            if settings.MODEL_REGISTRY_DIR:
+                self._swap_registry(bundle)
+            elif published is not None:
+                self._swap(bundle, published)
+            else:
+                self.bundle = bundle
+                if not bundle.from_compiled_cache:
+                    self._save_compiled_cache()
+            return True
 
-def parse_year(year_str: str) -> int:
-    if not isinstance(year_str, str): return np.nan
-    year_str = year_str.lower().strip()
-    if 'do' in year_str:
+    def _compiled_cache_bundle(self):
+        if settings.INFERENCE_BACKEND != "compiled":
+            return None
         try:
-            years = [int(y.strip()) for y in year_str.split('do')]
-            return int(np.mean(years))
-        except: return np.nan
-    if 'prije' in year_str: return 1940
-    match = re.search(r'\d{4}', year_str)
-    if match: return int(match.group(0))
-    return np.nan
+            model_digest = _file_digest(settings.MODEL_PATH)
+            compiled = load_compiled(model_digest)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Compiled model cache unreadable, loading the pipeline instead: {e}")
+            return None
+        if compiled is None:
+            return None
+        self._model_digest = model_digest
+        print("ML Model loaded from the compiled cache.")
+        return ModelBundle(
+            None, self.city_price_map, _bundle_version(model_digest, self._city_map_digest),
+            compiled=compiled, model_path=settings.MODEL_PATH, comparables=_load_comparables()
+        )
+
+    def _publish_shared(self) -> dict:
+        """
+        Shared serving mode: makes sure the compiled entry for the model on disk exists,
+        unpickling and compiling it only if no worker has done so yet, publishes it with the
+        city map if it is not already published, and returns the publication.
+        """
+        with open(settings.CITY_MAP_PATH, 'r') as f:
+            city_price_map = json.load(f)
+        city_map_digest = _file_digest(settings.CITY_MAP_PATH)
+        with publication_lock():
+            model_digest = _file_digest(settings.MODEL_PATH)
+            if load_compiled(model_digest) is None:
+                built = ModelBundle(_load_model_file(settings.MODEL_PATH), city_price_map, "")
+                if built.tree_engine is None or built.vectorizer is None:
+                    raise ValueError("Shared serving needs the compiled tree engine and feature vectorizer.")
+                save_compiled(model_digest, built.tree_engine, built.vectorizer)
+            published = read_published()
+            if published is None or (published["model_digest"], published["city_map_digest"]) != (model_digest, city_map_digest):
+                publish(model_digest, city_price_map, city_map_digest)
+                published = read_published()
+        return published
+
+    def attach_published(self):
+        """
+        Shared serving mode: switches to whatever another worker has published.
+        Returns the new bundle, or None when this worker already serves that version.
+        """
+        with self._reload_lock:
+            published = read_published()
+            if published is None or _bundle_version(published["model_digest"], published["city_map_digest"]) == self.version:
+                return None
+            bundle = _attach(published)
+            bundle.warm_up()
+            self._swap(bundle, published)
+            print(f"Model bundle {bundle.version} is now serving (published by another worker).")
+            return bundle
+
+    def _swap_registry(self, bundle: ModelBundle):
+        self.bundle = bundle
+        self.model, self.city_price_map = None, bundle.city_price_map
+        self._model_digest = self._city_map_digest = None
+
+    def _swap(self, bundle: ModelBundle, published: dict):
+        self.bundle = bundle
+        self.city_price_map = bundle.city_price_map
+        self._model_digest, self._city_map_digest = published["model_digest"], published["city_map_digest"]
+
+    def _save_compiled_cache(self):
+        bundle = self.bundle
+        if bundle is None or bundle.tree_engine is None or bundle.vectorizer is None:
+            return
+        try:
+            save_compiled(self._model_digest, bundle.tree_engine, bundle.vectorizer)
+        except Exception as e:
+            print(f"Could not write the compiled model cache: {e}")
+
+    def _publish(self):
+        bundle = self._pipeline_bundle()
+        if bundle is not None:
+            self.bundle = bundle
+
+    def _pipeline_bundle(self):
+        if self.model is None or self.city_price_map is None:
+            return None
+        return ModelBundle(
+            self.model, self.city_price_map, _bundle_version(self._model_digest, self._city_map_digest),
+            comparables=_load_comparables()
+        )
+
+    def reload(self) -> ModelBundle:
+        """
+        Loads both artifacts from disk into a new bundle, warms it up and only then swaps it in.
+        On any failure the current bundle keeps serving and the error is raised to the caller.
+        """
+        with self._reload_lock:
+            if settings.MODEL_REGISTRY_DIR:
+                bundle = _registry_bundle()
+                bundle.warm_up()
+                self._swap_registry(bundle)
+                self.load_error = None
+                print(f"Registry bundle {bundle.version} is now serving.")
+                return bundle
+
+            if settings.MODEL_SERVING_MODE == "shared":
+                published = self._publish_shared()
+                bundle = _attach(published)
+                bundle.warm_up()
+                self._swap(bundle, published)
+                self.load_error = None
+                print(f"Model bundle {bundle.version} is now serving and published to all workers.")
+                return bundle
+
+            model = _load_model_file(settings.MODEL_PATH)
+            model_digest = _file_digest(settings.MODEL_PATH)
+            with open(settings.CITY_MAP_PATH, 'r') as f:
+                city_price_map = json.load(f)
+            city_map_digest = _file_digest(settings.CITY_MAP_PATH)
+
+            bundle = ModelBundle(
+                model, city_price_map, _bundle_version(model_digest, city_map_digest), comparables=_load_comparables()
+            )
+            bundle.warm_up()
+
+            self.model, self.city_price_map = model, city_price_map
+            self._model_digest, self._city_map_digest = model_digest, city_map_digest
+            self.bundle = bundle
+            self.load_error = None
+            self._save_compiled_cache()
+            print(f"Model bundle {bundle.version} is now serving.")
+            return bundle
+
+    def predict_log(self, prediction_requests) -> np.ndarray:
+        return self.bundle.predict_log(prediction_requests)
+
+def _load_model_file(path: str):
+    """
+    Unpickles the pipeline with its NumPy arrays memory-mapped from the file, so they are
+    paged in on first use instead of copied up front. joblib and sklearn are only imported
+    here, keeping them off the application import path.
+    """
+    import joblib
+    return joblib.load(path, mmap_mode='r' if settings.MODEL_MMAP else None)
+
+def _attach(published: dict) -> ModelBundle:
+    compiled = load_compiled(published["model_digest"])
+    if compiled is None:
+        raise FileNotFoundError(f"Published compiled model {published['model_digest'][:16]} is missing.")
+    return ModelBundle(
+        None, published["city_price_map"],
+        _bundle_version(published["model_digest"], published["city_map_digest"]),
+        compiled=compiled, comparables=_load_comparables()
+    )
+
+def _registry_bundle() -> ModelBundle:
+    """Serving bundle for the registry version in LATEST (or the pinned one); no pipeline behind it."""
+    manifest, tree_engine = registry.load_bundle(registry.resolve_version())
+    return ModelBundle(
+        None, manifest["city_price_map"], manifest["version"],
+        compiled=(tree_engine, manifest["preprocessing"]), comparables=_load_comparables(),
+        registry_info=registry.bundle_info(manifest)
+    )
+
+def _load_comparables():
+    """The comparables index is optional: without it predictions still serve and /comparables answers 503."""
+    if not settings.COMPARABLES_PATH or not os.path.exists(settings.COMPARABLES_PATH):
+        return None
+    try:
+        comparables = ComparablesIndex.load(settings.COMPARABLES_PATH)
+        print(f"Comparables index loaded ({comparables.size} listings).")
+        return comparables
+    except Exception as e:
+        print(f"Comparables index unavailable: {e}")
+        return None
+
+def warm_up_request() -> ApartmentPredictionRequest:
+    return ApartmentPredictionRequest(**ApartmentPredictionRequest.model_config['json_schema_extra']['example'])
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _bundle_version(model_digest, city_map_digest) -> str:
+    """Content-derived version, so every worker process that loads the same files agrees on it."""
+    return hashlib.sha256(f"{model_digest}:{city_map_digest}".encode()).hexdigest()[:12]
+
+ml_model = ModelSingleton()
+
+def predict_log(prediction_requests, bundle=None):
+    """
+    Module-level entry point for the inference executor; process pools can pickle it.
+    Uses the given bundle, or the one currently serving in this process, and returns
+    (bundle version, log-price predictions, stage timings).
+    """
+    bundle = bundle if bundle is not None else ml_model.bundle
+    timings = {}
+    predictions = bundle.predict_log(prediction_requests, timings)
+    return bundle.version, predictions, timings
 
 def custom_round(price: float) -> int:
     price = price * 0.8
@@ -54,4 +458,4 @@ def custom_round(price: float) -> int:
     elif price < 200000:
         return int(round(price / 5000) * 5000)
     else:
-        return int(round(price / 10000) * 10000)
\ No newline at end of file
+        return int(round(price / 10000) * 10000)
@@ -0,0 +1,192 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from limits.strategies import RateLimiter
+from limits.util import WindowStats
+from slowapi import Limiter
+
+from .config import settings
+
+class MemoryBucketStorage:
+    """Token buckets in this process's memory; each worker enforces the limit on its own."""
+
+    def __init__(self, sweep_interval_seconds: float = 60.0):
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.time() + sweep_interval_seconds
+
+    def take(self, key: str, capacity: float, rate: float, cost: float, now: float) -> bool:
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            bucket = self._buckets.get(key)
+            tokens = capacity if bucket is None else min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            # A bucket is dropped once it would have refilled completely; a missing key means a full bucket.
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            return allowed
+
+    def peek(self, key: str, capacity: float, rate: float, now: float) -> float:
+        bucket = self._buckets.get(key)
+        return capacity if bucket is None else min(capacity, bucket[0] + (now - bucket[1]) * rate)
+
+    def _sweep(self, now: float):
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        self._next_sweep = now + self.sweep_interval_seconds
+
+    def clear(self, key: str):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def check(self) -> bool:
+        return True
+
+    def __len__(self):
+        return len(self._buckets)
+
+class SQLiteBucketStorage:
+    """
+    Token buckets in a SQLite file shared by every worker process on the host.
+
+    Each hit is a single UPSERT that refills, spends and reports the outcome atomically,
+    so concurrent workers never over-admit. Rows for buckets that have refilled completely
+    are deleted in a periodic sweep.
+    """
+
+    # In an UPSERT's SET clause every expression sees the row as it was before the update.
+    _REFILLED = "min(:capacity, tokens + (:now - updated) * :rate)"
+    _SPENT = f"(CASE WHEN {_REFILLED} >= :cost THEN :cost ELSE 0 END)"
+    _TAKE = f"""
+        INSERT INTO buckets (key, tokens, updated, expires, allowed)
+        VALUES (:key, :capacity - :cost, :now, :now + :cost / :rate, 1)
+        ON CONFLICT (key) DO UPDATE SET
+            allowed = {_REFILLED} >= :cost,
+            tokens = {_REFILLED} - {_SPENT},
+            expires = :now + (:capacity - {_REFILLED} + {_SPENT}) / :rate,
+            updated = :now
+        RETURNING allowed
+    """
+
+    def __init__(self, path: str, sweep_interval_seconds: float = 60.0):
+        self.path = path
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._local = threading.local()
+        self._next_sweep = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, "
+            "expires REAL NOT NULL, allowed INTEGER NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit: every statement is its own transaction, serialised by SQLite's write lock.
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            self._local.connection = connection
+        return connection
+
+    def take(self, key: str, capacity: float, rate: float, cost: float, now: float) -> bool:
+        connection = self._connection()
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval_seconds
+            connection.execute("DELETE FROM buckets WHERE expires <= ?", (now,))
+        (allowed,) = connection.execute(
+            self._TAKE, {"key": key, "capacity": capacity, "rate": rate, "cost": cost, "now": now}
+        ).fetchone()
+        return bool(allowed)
+
+    def peek(self, key: str, capacity: float, rate: float, now: float) -> float:
+        row = self._connection().execute(
+            "SELECT tokens, updated FROM buckets WHERE key = ?", (key,)
+        ).fetchone()
+        return capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+
+    def clear(self, key: str):
+        self._connection().execute("DELETE FROM buckets WHERE key = ?", (key,))
+
+    def reset(self):
+        self._connection().execute("DELETE FROM buckets")
+
+    def check(self) -> bool:
+        try:
+            self._connection().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def __len__(self):
+        return self._connection().execute("SELECT count(*) FROM buckets").fetchone()[0]
+
+class TokenBucketRateLimiter(RateLimiter):
+    """
+    limits strategy where "N per period" is a bucket of N tokens refilling at N/period per
+    second, so bursts up to N are allowed and the sustained rate is N per period.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def _bucket(self, item):
+        return item.amount, item.amount / item.get_expiry()
+
+    def hit(self, item, *identifiers, cost: int = 1) -> bool:
+        capacity, rate = self._bucket(item)
+        return self.storage.take(item.key_for(*identifiers), capacity, rate, cost, time.time())
+
+    def test(self, item, *identifiers, cost: int = 1) -> bool:
+        capacity, rate = self._bucket(item)
+        return self.storage.peek(item.key_for(*identifiers), capacity, rate, time.time()) >= cost
+
+    def get_window_stats(self, item, *identifiers) -> WindowStats:
+        """Remaining whole tokens, and the time at which the next token becomes available."""
+        capacity, rate = self._bucket(item)
+        now = time.time()
+        tokens = self.storage.peek(item.key_for(*identifiers), capacity, rate, now)
+        return WindowStats(now + max(0.0, 1 - tokens) / rate, int(math.floor(tokens)))
+
+    def clear(self, item, *identifiers):
+        self.storage.clear(item.key_for(*identifiers))
+
+def bucket_storage_from_uri(uri: str):
+    """memory:// keeps buckets per process; sqlite:///path/to/file.db shares them across workers."""
+    if uri == "memory://":
+        return MemoryBucketStorage()
+    if uri.startswith("sqlite:///"):
+        return SQLiteBucketStorage(uri[len("sqlite:///"):])
+    raise ValueError(f"Unsupported token-bucket storage: {uri}. Use memory:// or sqlite:///<path>.")
+
+class TokenBucketLimiter(Limiter):
+    """slowapi Limiter that enforces its limits as token buckets in a pluggable storage."""
+
+    def __init__(self, key_func, storage_uri: str):
+        super().__init__(key_func=key_func)
+        # slowapi picks strategies from a fixed table, so the token-bucket one is swapped in here.
+        self._storage = bucket_storage_from_uri(storage_uri)
+        self._limiter = TokenBucketRateLimiter(self._storage)
+
+def create_limiter(key_func) -> Limiter:
+    """
+    Token buckets by default; any other RATE_LIMIT_STRATEGY is handed to slowapi as is,
+    together with RATE_LIMIT_STORAGE_URI (e.g. fixed-window with redis://).
+    """
+    if settings.RATE_LIMIT_STRATEGY == "token-bucket":
+        return TokenBucketLimiter(key_func, settings.RATE_LIMIT_STORAGE_URI)
+    return Limiter(
+        key_func=key_func, storage_uri=settings.RATE_LIMIT_STORAGE_URI, strategy=settings.RATE_LIMIT_STRATEGY
+    )
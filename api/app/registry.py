@@ -0,0 +1,68 @@
+"""
+Reads the versioned model bundles exported by ml/registry.py. A bundle carries everything a
+replica needs to serve, so no sklearn import, pickle or separate city map file is involved:
+the trees as flat node arrays, the preprocessing layout in the feature vectorizer's spec
+format, the city price map, and the feature list, training-data hash and metrics reported
+by /health and /admin/reload.
+
+MODEL_REGISTRY_DIR enables it; LATEST in that directory names the bundle to serve unless
+MODEL_REGISTRY_VERSION pins one.
+"""
+import hashlib
+import json
+import os
+import numpy as np
+
+from .config import settings
+from .tree_engine import CompiledTreeEnsemble
+
+FORMAT_VERSION = 1
+TREE_ARRAYS = ('tree_offsets', 'children_left', 'children_right', 'feature', 'threshold', 'value')
+
+def latest_path() -> str:
+    return os.path.join(settings.MODEL_REGISTRY_DIR, "LATEST")
+
+def resolve_version() -> str:
+    if settings.MODEL_REGISTRY_VERSION:
+        return settings.MODEL_REGISTRY_VERSION
+    with open(latest_path(), "r") as f:
+        return f.read().strip()
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_bundle(version: str):
+    """
+    Returns (manifest, tree engine) for a bundle. Raises ValueError for an unsupported format or
+    an array file whose sha256 differs from the manifest's (truncated, swapped or edited).
+    """
+    directory = os.path.join(settings.MODEL_REGISTRY_DIR, version)
+    with open(os.path.join(directory, "manifest.json"), "r") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Registry bundle {version} has unsupported format {manifest.get('format_version')}.")
+    if manifest.get("model_type") != "GradientBoostingRegressor":
+        raise ValueError(f"Registry bundle {version} holds an unsupported model: {manifest.get('model_type')}.")
+    digests = manifest.get("arrays", {})
+    for name in TREE_ARRAYS:
+        path = os.path.join(directory, f"{name}.npy")
+        if digests.get(name) != _file_digest(path):
+            raise ValueError(f"Registry bundle {version}: {name}.npy does not match the digest in its manifest.")
+    arrays = {
+        name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r' if settings.MODEL_MMAP else None)
+        for name in TREE_ARRAYS
+    }
+    return manifest, CompiledTreeEnsemble.from_flat_trees(arrays, manifest["trees"])
+
+def bundle_info(manifest: dict) -> dict:
+    """The provenance reported next to the serving bundle."""
+    return {
+        "created_at": manifest["created_at"],
+        "training_data_sha256": manifest["training_data"]["sha256"],
+        "metrics": manifest["metrics"],
+        "library_versions": manifest["library_versions"],
+    }
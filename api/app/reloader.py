@@ -0,0 +1,112 @@
+import asyncio
+import os
+
+from .config import settings
+from .ml_model import ml_model, warm_up_request
+from .executor import inference_executor
+from .compiled_model import published_path
+from .registry import latest_path
+
+async def load_model_bundle() -> bool:
+    """
+    Startup load, run off the event loop so the server can answer liveness checks meanwhile.
+    After the bundle itself is warmed up, one prediction goes through the inference executor
+    so its threads or worker processes exist before the replica reports ready.
+    """
+    if not await asyncio.to_thread(ml_model.load):
+        return False
+    try:
+        await inference_executor.predict([warm_up_request()])
+    except Exception as e:
+        ml_model.load_error = f"Inference executor warm-up failed: {e}"
+        print(ml_model.load_error)
+        return False
+    ml_model.ready = True
+    print(f"Model bundle {ml_model.version} is ready.")
+    await asyncio.to_thread(ml_model.bundle.preload_pipeline)
+    return True
+
+async def reload_model_bundle() -> dict:
+    """Builds and warms up a new bundle off the event loop, then swaps it in for all new requests."""
+    bundle = await asyncio.to_thread(ml_model.reload)
+    if inference_executor.kind == "process":
+        inference_executor.restart()
+    ml_model.ready = True
+    return bundle.info()
+
+async def attach_published_bundle():
+    """Shared serving mode: follows a bundle another worker published; None if already serving it."""
+    bundle = await asyncio.to_thread(ml_model.attach_published)
+    if bundle is None:
+        return None
+    if inference_executor.kind == "process":
+        inference_executor.restart()
+    return bundle.info()
+
+def _artifact_signature(paths):
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+class ArtifactWatcher:
+    """
+    Polls a set of files and awaits on_change() once a change to any of them has settled.
+    Nothing happens while one of paths is missing; optional_paths may come and go.
+    """
+
+    def __init__(self, interval_seconds: float, paths, on_change, optional_paths=()):
+        self.interval_seconds = interval_seconds
+        self.paths = paths
+        self.optional_paths = optional_paths
+        self.on_change = on_change
+        self._task = None
+        self._signature = None
+
+    def start(self):
+        if self.interval_seconds <= 0 or self._task is not None:
+            return
+        self._signature = self._current_signature()
+        self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _current_signature(self):
+        return _artifact_signature(tuple(self.paths) + tuple(self.optional_paths))
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            signature = self._current_signature()
+            if signature == self._signature or None in signature[:len(self.paths)]:
+                continue
+            # Wait one more interval so a file that is still being written settles first.
+            await asyncio.sleep(self.interval_seconds)
+            if self._current_signature() != signature:
+                continue
+            self._signature = signature
+            try:
+                info = await self.on_change()
+                if info is not None:
+                    print(f"Hot reload after artifact change: now serving {info['version']}.")
+            except Exception as e:
+                print(f"Hot reload failed, keeping the current model: {e}")
+
+# With the model registry, exporting a bundle moves LATEST, which carries the model and city map together.
+artifact_watcher = ArtifactWatcher(
+    settings.MODEL_WATCH_INTERVAL_SECONDS,
+    (latest_path(),) if settings.MODEL_REGISTRY_DIR else (settings.MODEL_PATH, settings.CITY_MAP_PATH),
+    reload_model_bundle,
+    optional_paths=(settings.COMPARABLES_PATH,) if settings.COMPARABLES_PATH else ()
+)
+publication_watcher = ArtifactWatcher(
+    settings.MODEL_SHARED_POLL_SECONDS if settings.MODEL_SERVING_MODE == "shared" else 0,
+    (published_path(),), attach_published_bundle
+)
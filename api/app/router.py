@@ -1,18 +1,33 @@
-import pandas as pd
+import itertools
+import math
 import numpy as np
-from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from pydantic import ValidationError
 
-from .schemas import ApartmentPredictionRequest
-from .ml_model import ml_model, parse_year, custom_round
+from .schemas import (
+    ApartmentPredictionRequest, BatchPredictionRequest, PriceSweepRequest, SweepAxis,
+    YearBuiltEnum, ConditionEnum, FurnishedEnum, HeatingEnum
+)
+from .ml_model import ml_model, custom_round
+from .executor import inference_executor, ExecutorSaturated
+from .cache import prediction_cache
+from .batcher import micro_batcher
+from .metrics import metrics, TimedRoute
+from .bulk import upload_format, csv_rows, ndjson_rows, score_rows, UploadStreamingResponse
 from .main import limiter
 from .config import settings
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 def get_model():
-    if ml_model.model is None or ml_model.city_price_map is None:
+    """The serving bundle, once /ready would say so: loaded, warmed up and through the executor warm-up."""
+    bundle = ml_model.bundle
+    if bundle is None or not ml_model.ready:
         raise HTTPException(status_code=503, detail="Model or essential resources are not loaded.")
-    return ml_model
+    return bundle
+
+def capacity_exceeded() -> HTTPException:
+    return HTTPException(status_code=503, detail="Prediction service is at capacity, please retry.", headers={"Retry-After": "1"})
 
 @router.post("/predict", tags=["Prediction"])
 @limiter.limit(f"{settings.RATE_LIMIT_REQUESTS}/{settings.RATE_LIMIT_MINUTES}minute")
@@ -25,36 +40,218 @@ async def predict_price(
     Accepts user-friendly apartment features and returns a rounded, estimated price.
     This endpoint is rate-limited to prevent abuse.
     """
+    cache_key = prediction_cache.key_for(prediction_request)
+    cached_price = prediction_cache.get(cache_key, model_resources.version)
+    if cached_price is not None:
+        return {"estimated_price_km": cached_price, "model_version": model_resources.version}
+
     try:
-        features = {}
-        
-        direct_map_keys = [
-            'size_m2', 'rooms', 'floor', 'bathrooms', 'condition', 'furnished',
-            'heating_type', 'has_elevator', 'has_parking', 'has_balcony',
-            'is_registered', 'has_armored_door'
-        ]
-        for key in direct_map_keys:
-            features[key] = getattr(prediction_request, key)
-            
-        features['city'] = prediction_request.location.split('-')[0].strip()
-        features['property_age'] = 2025 - parse_year(prediction_request.year_built)
-        features['m2_per_room'] = prediction_request.size_m2 / prediction_request.rooms if prediction_request.rooms > 0 else np.nan
-        features['city_median_price_per_m2'] = model_resources.city_price_map.get(features['city'])
-        
-        features['desc_len'] = 150
-        features['has_renoviran'] = 1 if prediction_request.condition in ["Renoviran", "Novogradnja"] else 0
-        features['has_pogled'] = 0
-        features['has_novogradnja_desc'] = 1 if prediction_request.condition == "Novogradnja" else 0
-        features['has_garaza_desc'] = 1 if prediction_request.has_garage else 0
-
-        input_df = pd.DataFrame([features])
-        prediction_log = model_resources.model.predict(input_df)
-        prediction_price = np.expm1(prediction_log)[0]
-
-        rounded_price = custom_round(prediction_price)
-
-        return {"estimated_price_km": rounded_price}
-        
+        if micro_batcher.enabled:
+            model_version, prediction_log = await micro_batcher.submit(prediction_request, model_resources)
+        else:
+            model_version, prediction_logs = await inference_executor.predict([prediction_request], model_resources)
+            prediction_log = prediction_logs[0]
+        with metrics.stage("postprocess"):
+            prediction_price = np.expm1(prediction_log)
+            rounded_price = custom_round(prediction_price)
+        prediction_cache.set(cache_key, rounded_price, model_version)
+
+        return {"estimated_price_km": rounded_price, "model_version": model_version}
+
+    except ExecutorSaturated:
+        raise capacity_exceeded()
     except Exception as e:
         print(f"Prediction error: {e}")
-        raise HTTPException(status_code=500, detail="An internal error occurred during prediction.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="An internal error occurred during prediction.")
+
+@router.post("/predict/batch", tags=["Prediction"])
+@limiter.limit(f"{settings.RATE_LIMIT_REQUESTS}/{settings.RATE_LIMIT_MINUTES}minute")
+async def predict_price_batch(
+    request: Request,
+    batch_request: BatchPredictionRequest,
+    model_resources = Depends(get_model)
+):
+    """
+    Accepts a list of apartments and returns one result per item, in input order.
+    Valid items missing from the prediction cache are scored together in a single model call;
+    invalid items get their validation errors instead of a price. The whole batch counts as one rate-limited request.
+    """
+    if len(batch_request.items) > settings.BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size {len(batch_request.items)} exceeds the limit of {settings.BATCH_MAX_SIZE} items."
+        )
+
+    model_version = model_resources.version
+    results = [None] * len(batch_request.items)
+    valid_indices = []
+    valid_requests = []
+    cache_keys = []
+
+    for index, item in enumerate(batch_request.items):
+        try:
+            prediction_request = ApartmentPredictionRequest.model_validate(item)
+        except ValidationError as e:
+            errors = [{"loc": list(err["loc"]), "msg": err["msg"], "type": err["type"]} for err in e.errors()]
+            results[index] = {"index": index, "errors": errors}
+            continue
+        cache_key = prediction_cache.key_for(prediction_request)
+        cached_price = prediction_cache.get(cache_key, model_version)
+        if cached_price is not None:
+            results[index] = {"index": index, "estimated_price_km": cached_price}
+            continue
+        valid_indices.append(index)
+        valid_requests.append(prediction_request)
+        cache_keys.append(cache_key)
+
+    if valid_requests:
+        try:
+            model_version, prediction_logs = await inference_executor.predict(valid_requests, model_resources)
+            prediction_prices = np.expm1(prediction_logs)
+        except ExecutorSaturated:
+            raise capacity_exceeded()
+        except Exception as e:
+            print(f"Batch prediction error: {e}")
+            raise HTTPException(status_code=500, detail="An internal error occurred during prediction.")
+
+        for index, cache_key, prediction_price in zip(valid_indices, cache_keys, prediction_prices):
+            rounded_price = custom_round(prediction_price)
+            prediction_cache.set(cache_key, rounded_price, model_version)
+            results[index] = {"index": index, "estimated_price_km": rounded_price}
+
+    return {"model_version": model_version, "results": results}
+
+@router.post("/predict/bulk", tags=["Prediction"], response_class=UploadStreamingResponse)
+@limiter.limit(f"{settings.RATE_LIMIT_REQUESTS}/{settings.RATE_LIMIT_MINUTES}minute")
+async def predict_price_bulk(
+    request: Request,
+    model_resources = Depends(get_model)
+):
+    """
+    Scores a streamed CSV (text/csv) or NDJSON (application/x-ndjson) upload of any size.
+    CSV columns use the names of the published listings dataset; empty cells fall back to the schema defaults.
+    Rows are validated like /predict, scored BULK_CHUNK_SIZE at a time and streamed back as NDJSON,
+    one line per row in input order ({"index", "id"?, "estimated_price_km"} or {"index", "id"?, "errors"}),
+    then a final {"summary"} line. Clients must read the results while still uploading (curl does).
+    The upload counts as one rate-limited request.
+    """
+    upload = upload_format(request.headers.get("content-type", ""))
+    if upload is None:
+        raise HTTPException(status_code=415, detail="Upload must be text/csv or application/x-ndjson.")
+
+    rows = csv_rows(request.stream()) if upload == "csv" else ndjson_rows(request.stream())
+    return UploadStreamingResponse(
+        score_rows(rows, model_resources, settings.BULK_CHUNK_SIZE),
+        media_type="application/x-ndjson"
+    )
+
+SWEEP_CATEGORICAL_VALUES = {
+    "year_built": YearBuiltEnum,
+    "condition": ConditionEnum,
+    "furnished": FurnishedEnum,
+    "heating_type": HeatingEnum,
+}
+
+def resolve_sweep_axis(axis: SweepAxis) -> list:
+    """Expands an axis into its list of raw values, rejecting ranges that exceed the grid cap on their own."""
+    variable = axis.variable.value
+    if axis.values is not None:
+        # Checked before predict_price_sweep validates a request per value.
+        if len(axis.values) > settings.SWEEP_MAX_POINTS:
+            raise HTTPException(status_code=413, detail=f"Axis '{variable}' has {len(axis.values)} points, the limit is {settings.SWEEP_MAX_POINTS}.")
+        return list(axis.values)
+    if variable in SWEEP_CATEGORICAL_VALUES:
+        return [member.value for member in SWEEP_CATEGORICAL_VALUES[variable]]
+    if axis.start is None or axis.stop is None or axis.step is None:
+        raise HTTPException(status_code=422, detail=f"Axis '{variable}' needs either values or start, stop and step.")
+    if not (math.isfinite(axis.start) and math.isfinite(axis.stop)):
+        raise HTTPException(status_code=422, detail=f"Axis '{variable}' needs finite start and stop.")
+    if axis.stop < axis.start:
+        raise HTTPException(status_code=422, detail=f"Axis '{variable}' has stop < start.")
+    # Checked as a float first: a tiny step makes the count too large for int(), or infinite.
+    points = np.floor((axis.stop - axis.start) / axis.step + 1e-9) + 1
+    if not math.isfinite(points) or points > settings.SWEEP_MAX_POINTS:
+        raise HTTPException(status_code=413, detail=f"Axis '{variable}' has {points:.4g} points, the limit is {settings.SWEEP_MAX_POINTS}.")
+    n_points = int(points)
+    return [round(axis.start + i * axis.step, 10) for i in range(n_points)]
+
+@router.post("/predict/sweep", tags=["Prediction"])
+@limiter.limit(f"{settings.RATE_LIMIT_REQUESTS}/{settings.RATE_LIMIT_MINUTES}minute")
+async def predict_price_sweep(
+    request: Request,
+    sweep_request: PriceSweepRequest,
+    model_resources = Depends(get_model)
+):
+    """
+    Returns the estimated price across a grid of one or two variables for an otherwise fixed apartment.
+    The whole grid is built as one feature matrix and scored in a single model call.
+    One axis returns a curve; two axes return a surface indexed [first axis][second axis].
+    """
+    variables = [axis.variable.value for axis in sweep_request.axes]
+    if len(set(variables)) != len(variables):
+        raise HTTPException(status_code=422, detail="Each variable can only be swept once.")
+
+    base = sweep_request.base.model_dump()
+    axis_values = []
+    for axis in sweep_request.axes:
+        validated_values = []
+        for value in resolve_sweep_axis(axis):
+            try:
+                variant = ApartmentPredictionRequest.model_validate({**base, axis.variable.value: value})
+            except ValidationError as e:
+                errors = [{"loc": list(err["loc"]), "msg": err["msg"], "type": err["type"]} for err in e.errors()]
+                raise HTTPException(status_code=422, detail={"axis": axis.variable.value, "value": value, "errors": errors})
+            validated_values.append(getattr(variant, axis.variable.value))
+        axis_values.append(validated_values)
+
+    shape = [len(values) for values in axis_values]
+    if int(np.prod(shape)) > settings.SWEEP_MAX_POINTS:
+        raise HTTPException(status_code=413, detail=f"Grid has {int(np.prod(shape))} points, the limit is {settings.SWEEP_MAX_POINTS}.")
+
+    grid_requests = [
+        sweep_request.base.model_copy(update=dict(zip(variables, point)))
+        for point in itertools.product(*axis_values)
+    ]
+
+    try:
+        model_version, prediction_logs = await inference_executor.predict(grid_requests, model_resources)
+        prices = [custom_round(price) for price in np.expm1(prediction_logs)]
+    except ExecutorSaturated:
+        raise capacity_exceeded()
+    except Exception as e:
+        print(f"Sweep prediction error: {e}")
+        raise HTTPException(status_code=500, detail="An internal error occurred during prediction.")
+
+    if len(shape) == 2:
+        prices = [prices[i * shape[1]:(i + 1) * shape[1]] for i in range(shape[0])]
+
+    return {
+        "model_version": model_version,
+        "axes": [
+            {"variable": variable, "values": [getattr(value, 'value', value) for value in values]}
+            for variable, values in zip(variables, axis_values)
+        ],
+        "estimated_price_km": prices
+    }
+
+@router.post("/comparables", tags=["Prediction"])
+@limiter.limit(f"{settings.RATE_LIMIT_REQUESTS}/{settings.RATE_LIMIT_MINUTES}minute")
+async def comparable_listings(
+    request: Request,
+    prediction_request: ApartmentPredictionRequest,
+    k: int = Query(default=5, ge=1, le=settings.COMPARABLES_MAX_K),
+    model_resources = Depends(get_model)
+):
+    """
+    Returns the k training listings most similar to the apartment in size, rooms, floor and age,
+    searched within its city, closest first. The index is built with the model and reloaded with it.
+    """
+    if model_resources.comparables is None:
+        raise HTTPException(status_code=503, detail="Comparables index is not loaded.")
+    city, comparables = model_resources.comparables.query(prediction_request, k)
+    return {"model_version": model_resources.version, "city": city, "comparables": comparables}
+
+@router.get("/cache/stats", tags=["Monitoring"])
+async def cache_stats():
+    """Returns prediction cache hit, miss, eviction and invalidation counters."""
+    return prediction_cache.stats()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Dict, List, Optional, Union
 from enum import Enum
 
 class LocationEnum(str, Enum):
@@ -215,4 +215,45 @@ class ApartmentPredictionRequest(BaseModel):
                 "is_registered": True,
                 "has_armored_door": True
             }
-        }
\ No newline at end of file
+        }
+
+class BatchPredictionRequest(BaseModel):
+    """Wraps a list of apartments for batch prediction. Items are validated one by one."""
+    items: List[Dict[str, Any]] = Field(..., min_length=1)
+
+
+class SweepVariableEnum(str, Enum):
+    size_m2 = "size_m2"
+    rooms = "rooms"
+    floor = "floor"
+    bathrooms = "bathrooms"
+    year_built = "year_built"
+    condition = "condition"
+    furnished = "furnished"
+    heating_type = "heating_type"
+
+
+class SweepAxis(BaseModel):
+    """One swept variable: a numeric start/stop/step range, or an explicit list of values."""
+    variable: SweepVariableEnum
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    step: Optional[float] = Field(default=None, gt=0)
+    values: Optional[List[Union[float, str]]] = None
+
+
+class PriceSweepRequest(BaseModel):
+    """A fixed apartment plus one or two variables to sweep across a grid."""
+    base: ApartmentPredictionRequest
+    axes: List[SweepAxis] = Field(..., min_length=1, max_length=2)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "base": ApartmentPredictionRequest.model_config['json_schema_extra']['example'],
+                "axes": [
+                    {"variable": "size_m2", "start": 40, "stop": 120, "step": 5},
+                    {"variable": "condition"}
+                ]
+            }
+        }
@@ -0,0 +1,170 @@
+import os
+import numpy as np
+
+# A complete layout stores 2^(depth+1)-1 nodes per tree, so deep trees fall back to sklearn.
+MAX_COMPILED_DEPTH = 12
+# Rows traversed together; keeps the (rows, trees) index arrays cache-resident.
+CHUNK_ROWS = 64
+
+class CompiledTreeEnsemble:
+    """
+    Array-based evaluator for a fitted GradientBoostingRegressor.
+
+    All trees are flattened at load time into contiguous node arrays. Prediction walks every
+    tree for every row at once, one tree level per step, and sums the leaf values in stage
+    order so results match sklearn's predict bit for bit.
+    """
+
+    def __init__(self, feature, threshold, leaf_value, depth, init_value, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.leaf_value = leaf_value
+        self.depth = depth
+        self.init_value = init_value
+        self.n_features = n_features
+        self.nodes_per_tree = 2 ** (depth + 1) - 1
+        self.n_trees = len(feature) // self.nodes_per_tree
+        self._tree_offsets = np.arange(self.n_trees, dtype=np.intp) * self.nodes_per_tree
+
+    @classmethod
+    def compile(cls, regressor):
+        """Flattens the estimators of a fitted single-output GradientBoostingRegressor."""
+        if not hasattr(regressor, 'estimators_') or regressor.estimators_.ndim != 2:
+            raise ValueError(f"Unsupported regressor: {type(regressor).__name__}")
+        if regressor.estimators_.shape[1] != 1:
+            raise ValueError("Only single-output gradient boosting models are supported.")
+
+        depth = max(estimator.tree_.max_depth for estimator in regressor.estimators_[:, 0])
+        if depth > MAX_COMPILED_DEPTH:
+            raise ValueError(f"Tree depth {depth} exceeds the compiled layout limit of {MAX_COMPILED_DEPTH}.")
+
+        n_features = regressor.n_features_in_
+        if regressor.init_ == 'zero':
+            init_value = 0.0
+        else:
+            init_value = float(np.asarray(regressor.init_.predict(np.zeros((1, n_features)))).ravel()[0])
+
+        n_trees = regressor.estimators_.shape[0]
+        nodes_per_tree = 2 ** (depth + 1) - 1
+        feature = np.zeros((n_trees, nodes_per_tree), dtype=np.intp)
+        threshold = np.full((n_trees, nodes_per_tree), np.inf)
+        leaf_value = np.zeros((n_trees, nodes_per_tree))
+        for i, estimator in enumerate(regressor.estimators_[:, 0]):
+            tree = estimator.tree_
+            _fill_complete_layout(
+                tree.children_left, tree.children_right, tree.feature, tree.threshold, tree.value[:, 0, 0],
+                depth, regressor.learning_rate, feature[i], threshold[i], leaf_value[i]
+            )
+
+        return cls(
+            feature=feature.ravel(),
+            threshold=threshold.ravel(),
+            leaf_value=leaf_value.ravel(),
+            depth=depth,
+            init_value=init_value,
+            n_features=n_features,
+        )
+
+    @classmethod
+    def from_flat_trees(cls, arrays: dict, meta: dict):
+        """
+        Lays out trees stored as concatenated sklearn node arrays (a registry bundle, see
+        ml/registry.py), where tree i owns nodes tree_offsets[i] to tree_offsets[i + 1].
+        """
+        depth = meta["max_depth"]
+        if depth > MAX_COMPILED_DEPTH:
+            raise ValueError(f"Tree depth {depth} exceeds the compiled layout limit of {MAX_COMPILED_DEPTH}.")
+        offsets = arrays["tree_offsets"]
+        n_trees = len(offsets) - 1
+        nodes_per_tree = 2 ** (depth + 1) - 1
+        feature = np.zeros((n_trees, nodes_per_tree), dtype=np.intp)
+        threshold = np.full((n_trees, nodes_per_tree), np.inf)
+        leaf_value = np.zeros((n_trees, nodes_per_tree))
+        for i in range(n_trees):
+            nodes = slice(offsets[i], offsets[i + 1])
+            _fill_complete_layout(
+                arrays["children_left"][nodes], arrays["children_right"][nodes], arrays["feature"][nodes],
+                arrays["threshold"][nodes], arrays["value"][nodes],
+                depth, meta["learning_rate"], feature[i], threshold[i], leaf_value[i]
+            )
+        return cls(
+            feature=feature.ravel(),
+            threshold=threshold.ravel(),
+            leaf_value=leaf_value.ravel(),
+            depth=depth,
+            init_value=meta["init_value"],
+            n_features=meta["n_features"],
+        )
+
+    def save(self, directory: str):
+        """Writes the node arrays as .npy files so load() can memory-map them."""
+        for name in ('feature', 'threshold', 'leaf_value'):
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        return {"depth": self.depth, "init_value": self.init_value, "n_features": self.n_features}
+
+    @classmethod
+    def load(cls, directory: str, meta: dict, mmap: bool = True):
+        """Rebuilds an ensemble written by save(); with mmap the node arrays are paged in from disk on use."""
+        arrays = {
+            name: np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r' if mmap else None))
+            for name in ('feature', 'threshold', 'leaf_value')
+        }
+        return cls(depth=meta["depth"], init_value=meta["init_value"], n_features=meta["n_features"], **arrays)
+
+    def leaf_values(self, X) -> np.ndarray:
+        """Returns the (n_rows, n_trees) matrix of scaled leaf values reached by each row."""
+        if hasattr(X, 'toarray'):
+            X = X.toarray()
+        # sklearn compares float32 inputs against float64 thresholds; widening once up front is exact.
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features, but the model expects {self.n_features}.")
+        if not np.isfinite(X).all():
+            raise ValueError("Input contains NaN or infinity.")
+
+        leaves = np.empty((X.shape[0], self.n_trees))
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            leaves[start:start + CHUNK_ROWS] = self._traverse(X[start:start + CHUNK_ROWS])
+        return leaves
+
+    def _traverse(self, X):
+        flat_X = X.ravel()
+        row_offsets = (np.arange(X.shape[0], dtype=np.intp) * self.n_features)[:, None]
+        nodes = np.broadcast_to(self._tree_offsets, (X.shape[0], self.n_trees))
+        for _ in range(self.depth):
+            go_right = flat_X[row_offsets + self.feature[nodes]] > self.threshold[nodes]
+            # In the complete layout the children of local node i are 2i+1 and 2i+2.
+            nodes = 2 * nodes - self._tree_offsets + 1 + go_right
+        return self.leaf_value[nodes]
+
+    def predict(self, X) -> np.ndarray:
+        """Predicts one row or a batch; matches GradientBoostingRegressor.predict."""
+        contributions = self.leaf_values(X)
+        init = np.full((contributions.shape[0], 1), self.init_value)
+        # cumsum adds strictly left to right, reproducing sklearn's stage-by-stage accumulation.
+        return np.cumsum(np.hstack([init, contributions]), axis=1)[:, -1]
+
+def _fill_complete_layout(children_left, children_right, node_feature, node_threshold, node_value,
+                          depth: int, learning_rate: float, feature, threshold, leaf_value):
+    """
+    Writes one tree, given as sklearn's per-node arrays (node_value holding the leaf
+    predictions), into a complete binary tree of the given depth, where the
+    children of node i sit at 2i+1 and 2i+2. A leaf above the bottom level keeps its
+    infinite threshold, so every row routes left until it reaches the bottom, where the
+    scaled leaf value is stored.
+    """
+    stack = [(0, 0, 0)]
+    while stack:
+        node, position, level = stack.pop()
+        if children_left[node] == -1:
+            while level < depth:
+                position = 2 * position + 1
+                level += 1
+            leaf_value[position] = learning_rate * node_value[node]
+            continue
+        feature[position] = node_feature[node]
+        threshold[position] = node_threshold[node]
+        stack.append((children_left[node], 2 * position + 1, level + 1))
+        stack.append((children_right[node], 2 * position + 2, level + 1))
@@ -0,0 +1,173 @@
+import numpy as np
+
+from .features import DEFAULT_DESC_LEN, location_to_city, property_age, condition_flags
+from .schemas import LocationEnum, YearBuiltEnum, ConditionEnum
+
+REQUEST_NUMERIC_FEATURES = [
+    'size_m2', 'rooms', 'floor', 'bathrooms', 'has_elevator', 'has_parking',
+    'has_balcony', 'is_registered', 'has_armored_door'
+]
+DERIVED_NUMERIC_FEATURES = [
+    'property_age', 'm2_per_room', 'desc_len', 'city_median_price_per_m2',
+    'has_renoviran', 'has_pogled', 'has_novogradnja_desc', 'has_garaza_desc'
+]
+CATEGORICAL_FEATURES = ['city', 'condition', 'furnished', 'heating_type']
+
+def _value(member):
+    return getattr(member, 'value', member)
+
+def _check_features(numeric_features, categorical_features):
+    if sorted(numeric_features) != sorted(REQUEST_NUMERIC_FEATURES + DERIVED_NUMERIC_FEATURES):
+        raise ValueError(f"Unsupported numeric features: {list(numeric_features)}")
+    if list(categorical_features) != CATEGORICAL_FEATURES:
+        raise ValueError(f"Unsupported categorical features: {list(categorical_features)}")
+
+class FeatureVectorizer:
+    """
+    Pandas-free replacement for the fitted ColumnTransformer on the online prediction path.
+    It is compiled once from the loaded pipeline and city map, and writes each request
+    straight into a preallocated row of the transformed feature matrix.
+    """
+
+    def __init__(self, n_features, numeric_index, fill_values, means, scales, category_columns, city_price_map):
+        # Everything compiled from the pipeline; JSON-serialisable, so it can be cached next to the model.
+        self.spec = {
+            "n_features": n_features, "numeric_index": numeric_index, "fill_values": fill_values,
+            "means": means, "scales": scales, "category_columns": category_columns,
+        }
+        self.n_features = n_features
+        self._index = numeric_index
+        self._fill = fill_values
+        self._mean = means
+        self._scale = scales
+        self._furnished_columns = category_columns['furnished']
+        self._heating_columns = category_columns['heating_type']
+
+        self._locations = {}
+        for location in LocationEnum:
+            city = location_to_city(location.value)
+            median = city_price_map.get(city)
+            self._locations[location.value] = (
+                category_columns['city'].get(city, -1),
+                self._scaled('city_median_price_per_m2', median)
+            )
+
+        self._ages = {
+            year.value: self._scaled('property_age', property_age(year.value))
+            for year in YearBuiltEnum
+        }
+
+        self._conditions = {}
+        for condition in ConditionEnum:
+            flags = condition_flags(condition.value)
+            self._conditions[condition.value] = (
+                category_columns['condition'].get(condition.value, -1),
+                self._scaled('has_renoviran', flags['has_renoviran']),
+                self._scaled('has_novogradnja_desc', flags['has_novogradnja_desc'])
+            )
+
+        self._desc_len = self._scaled('desc_len', DEFAULT_DESC_LEN)
+        self._pogled = self._scaled('has_pogled', 0)
+        self._garage = (self._scaled('has_garaza_desc', 0), self._scaled('has_garaza_desc', 1))
+
+    @classmethod
+    def compile(cls, pipeline, city_price_map: dict):
+        """
+        Extracts imputer fill values, scaler statistics and one-hot offsets from the fitted pipeline.
+        Raises ValueError if the pipeline does not have the layout produced by ml/train.py.
+        """
+        preprocessor = pipeline.named_steps['preprocessor']
+        transformers = {name: (transformer, columns) for name, transformer, columns in preprocessor.transformers_}
+        if set(transformers) - {'num', 'cat', 'remainder'}:
+            raise ValueError(f"Unsupported preprocessor transformers: {sorted(transformers)}")
+        if preprocessor.output_indices_['remainder'].stop != preprocessor.output_indices_['remainder'].start:
+            raise ValueError("Preprocessor passes through remainder columns.")
+
+        numeric_pipeline, numeric_features = transformers['num']
+        categorical_pipeline, categorical_features = transformers['cat']
+        _check_features(numeric_features, categorical_features)
+        imputer = numeric_pipeline.named_steps['imputer']
+        scaler = numeric_pipeline.named_steps['scaler']
+        n_numeric = len(numeric_features)
+        means = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_numeric)
+        scales = scaler.scale_ if scaler.scale_ is not None else np.ones(n_numeric)
+
+        numeric_offset = preprocessor.output_indices_['num'].start
+        numeric_index = {name: int(numeric_offset + i) for i, name in enumerate(numeric_features)}
+        fill_values = dict(zip(numeric_features, imputer.statistics_.tolist()))
+        means = dict(zip(numeric_features, means.tolist()))
+        scales = dict(zip(numeric_features, scales.tolist()))
+
+        onehot = categorical_pipeline.named_steps['onehot']
+        drop_idx = onehot.drop_idx_ if onehot.drop_idx_ is not None else [None] * len(categorical_features)
+
+        category_columns = {}
+        offset = preprocessor.output_indices_['cat'].start
+        for feature, categories, dropped in zip(categorical_features, onehot.categories_, drop_idx):
+            columns = {}
+            for i, category in enumerate(categories):
+                if dropped is not None and i == dropped:
+                    continue
+                columns[str(category)] = int(offset + len(columns))
+            category_columns[feature] = columns
+            offset += len(columns)
+        if offset != preprocessor.output_indices_['cat'].stop:
+            raise ValueError("One-hot layout does not match the preprocessor output.")
+
+        n_features = int(max(indices.stop for indices in preprocessor.output_indices_.values()))
+        return cls(
+            n_features, numeric_index, fill_values, means, scales, category_columns, city_price_map
+        )
+
+    @classmethod
+    def from_spec(cls, spec: dict, city_price_map: dict):
+        """
+        Rebuilds a vectorizer from a saved spec (compiled cache or registry bundle) without touching
+        sklearn. Raises ValueError if the spec's features are not the ones this vectorizer writes.
+        """
+        _check_features(spec['numeric_index'], spec['category_columns'])
+        return cls(city_price_map=city_price_map, **spec)
+
+    def _scaled(self, name, value):
+        if value is None or value != value:
+            value = self._fill[name]
+        return (value - self._mean[name]) / self._scale[name]
+
+    def transform_into(self, prediction_request, row: np.ndarray):
+        """Writes one request into a zeroed row of length n_features."""
+        index = self._index
+        for name in REQUEST_NUMERIC_FEATURES:
+            row[index[name]] = self._scaled(name, getattr(prediction_request, name))
+
+        size_m2 = prediction_request.size_m2
+        rooms = prediction_request.rooms
+        row[index['m2_per_room']] = self._scaled('m2_per_room', size_m2 / rooms if rooms > 0 else None)
+        row[index['desc_len']] = self._desc_len
+        row[index['has_pogled']] = self._pogled
+        row[index['has_garaza_desc']] = self._garage[1 if prediction_request.has_garage else 0]
+        row[index['property_age']] = self._ages[_value(prediction_request.year_built)]
+
+        city_column, city_median = self._locations[_value(prediction_request.location)]
+        row[index['city_median_price_per_m2']] = city_median
+        if city_column >= 0:
+            row[city_column] = 1.0
+
+        condition_column, renoviran, novogradnja = self._conditions[_value(prediction_request.condition)]
+        row[index['has_renoviran']] = renoviran
+        row[index['has_novogradnja_desc']] = novogradnja
+        if condition_column >= 0:
+            row[condition_column] = 1.0
+
+        furnished_column = self._furnished_columns.get(_value(prediction_request.furnished), -1)
+        if furnished_column >= 0:
+            row[furnished_column] = 1.0
+        heating_column = self._heating_columns.get(_value(prediction_request.heating_type), -1)
+        if heating_column >= 0:
+            row[heating_column] = 1.0
+
+    def transform(self, prediction_requests) -> np.ndarray:
+        """Vectorizes a list of requests into a (n_requests, n_features) float64 matrix."""
+        X = np.zeros((len(prediction_requests), self.n_features))
+        for i, prediction_request in enumerate(prediction_requests):
+            self.transform_into(prediction_request, X[i])
+        return X
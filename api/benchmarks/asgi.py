@@ -0,0 +1,28 @@
+import asyncio
+
+async def call(app, method: str, path: str, body: bytes = b"", client=("127.0.0.1", 50000)) -> int:
+    """
+    Sends one request straight into an ASGI app, with no HTTP client or socket in the way,
+    and returns the response status.
+    """
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "client": client, "server": ("bench", 80),
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = None
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
@@ -0,0 +1,65 @@
+"""
+Checks that micro-batched predictions queued before a hot reload are scored with the model
+bundle their handler started with, and those queued after it with the new one, when both end
+up in the same batch.
+
+The reload swaps in a bundle of the same model whose city price map is doubled, so the two
+versions predict differently for every request.
+
+Run from the api directory:  python -m benchmarks.batcher_reload
+"""
+import asyncio
+import sys
+import numpy as np
+
+from app.ml_model import ml_model, ModelBundle
+from app.executor import inference_executor
+from app.batcher import MicroBatcher
+from benchmarks.payloads import random_requests
+
+async def main():
+    ml_model.load_model()
+    ml_model.load_city_map()
+    if inference_executor.kind != "thread":
+        print("Process workers score with their own bundle; run with INFERENCE_EXECUTOR=thread.")
+        sys.exit(1)
+    inference_executor.start()
+
+    previous = ml_model.bundle
+    reloaded = ModelBundle(
+        previous.model, {city: price * 2 for city, price in previous.city_price_map.items()}, f"{previous.version}-reloaded"
+    )
+    first, before, after = random_requests(3)
+    batcher = MicroBatcher(window_ms=50, max_batch_size=32)
+
+    # The first request starts a batch at once; the next two wait for the window behind it.
+    running = asyncio.ensure_future(batcher.submit(first, previous))
+    await asyncio.sleep(0)
+    queued_before = asyncio.ensure_future(batcher.submit(before, previous))
+    await asyncio.sleep(0)
+    ml_model.bundle = reloaded
+    queued_after = asyncio.ensure_future(batcher.submit(after, ml_model.bundle))
+    await asyncio.sleep(0)
+    pending_at_reload = batcher.stats()["pending"]
+    results = await asyncio.gather(running, queued_before, queued_after)
+    ml_model.bundle = previous
+    inference_executor.shutdown()
+
+    expected = [
+        (previous.version, previous.predict_log([first])[0]),
+        (previous.version, previous.predict_log([before])[0]),
+        (reloaded.version, reloaded.predict_log([after])[0]),
+    ]
+    print(f"Requests pending across the reload: {pending_at_reload}, batches: {batcher.batches}")
+    ok = True
+    for label, (version, prediction), (expected_version, expected_prediction) in zip(
+        ("first", "queued before reload", "queued after reload"), results, expected
+    ):
+        matches = version == expected_version and np.isclose(prediction, expected_prediction)
+        ok &= bool(matches)
+        print(f"  {label:<21} version {version}: {'ok' if matches else f'expected {expected_version}'}")
+    if pending_at_reload != 2 or not ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""
+Streams ever larger CSV uploads, built by repeating the published listings dataset, through
+POST /predict/bulk on a local uvicorn server and reports rows/s, the time to the first
+result line and the server's peak RSS. Peak RSS should stay flat as the upload grows.
+
+Linux only (reads /proc). Run from the api directory:
+    python -m benchmarks.bulk_scoring [max_rows] [port]
+"""
+import asyncio
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import httpx
+
+from benchmarks.dataset import DATA_PATH
+
+UPLOAD_CHUNK_BYTES = 64 * 1024
+SETTLE_SECONDS = 3.0
+
+def peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("VmHWM not found")
+
+def csv_upload(rows: int):
+    """Yields the dataset's header once, then its data rows repeated until `rows` rows were sent."""
+    with open(DATA_PATH, "rb") as f:
+        data = f.read()
+    header_end = data.index(b"\n") + 1
+    header, body = data[:header_end], data[header_end:]
+    body_rows = sum(1 for _ in csv.reader(io.StringIO(body.decode("utf-8"))))
+    yield header
+    for _ in range(rows // body_rows):
+        for start in range(0, len(body), UPLOAD_CHUNK_BYTES):
+            yield body[start:start + UPLOAD_CHUNK_BYTES]
+
+async def run_upload(host: str, port: int, rows: int) -> dict:
+    """
+    Uploads with chunked encoding while reading the response on the same connection. A client
+    that sends the whole body before reading (httpx, requests) stalls once the results fill the
+    socket buffers, so this talks HTTP/1.1 directly.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    started = time.perf_counter()
+
+    async def upload():
+        writer.write(
+            f"POST /predict/bulk HTTP/1.1\r\nHost: {host}\r\nContent-Type: text/csv\r\n"
+            "Transfer-Encoding: chunked\r\n\r\n".encode()
+        )
+        for part in csv_upload(rows):
+            writer.write(f"{len(part):x}\r\n".encode() + part + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def results():
+        status = (await reader.readline()).split()[1]
+        if status != b"200":
+            raise RuntimeError(f"/predict/bulk returned {status.decode()}")
+        while await reader.readline() != b"\r\n":
+            pass
+        first_line = None
+        lines = 0
+        last = b""
+        buffered = b""
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            if size == 0:
+                break
+            buffered += (await reader.readexactly(size + 2))[:-2]
+            *complete, buffered = buffered.split(b"\n")
+            if complete and first_line is None:
+                first_line = time.perf_counter() - started
+            lines += len(complete)
+            if complete:
+                last = complete[-1]
+        return first_line, lines, json.loads(last)
+
+    _, (first_line, lines, summary) = await asyncio.gather(upload(), results())
+    writer.close()
+    return {"elapsed": time.perf_counter() - started, "first_line": first_line, "lines": lines, "summary": summary}
+
+def main():
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8766
+    env = dict(os.environ, RATE_LIMIT_REQUESTS="1000000", MICROBATCH_WINDOW_MS="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        deadline = time.time() + 60
+        while True:
+            try:
+                if httpx.get(f"{base_url}/ready", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.time() > deadline:
+                raise RuntimeError("Server never became ready")
+            time.sleep(0.2)
+
+        sizes = [size for size in (2_000, 20_000, 100_000, 200_000, 500_000, 1_000_000) if size <= max_rows]
+        asyncio.run(run_upload("127.0.0.1", port, 2_000))
+        # Let the pipeline finish unpickling in the background before taking the baseline.
+        time.sleep(SETTLE_SECONDS)
+        print(f"peak RSS after start-up and a warm-up upload: {peak_rss_mb(server.pid):.1f} MB\n")
+        print(f"{'rows':>9} {'upload MB':>9} {'rows/s':>9} {'first line ms':>13} {'peak RSS MB':>11}  summary")
+        for size in sizes:
+            upload_mb = sum(len(part) for part in csv_upload(size)) / 1e6
+            result = asyncio.run(run_upload("127.0.0.1", port, size))
+            summary = result["summary"]["summary"]
+            print(f"{summary['rows']:>9} {upload_mb:>9.1f} {summary['rows'] / result['elapsed']:>9.0f} "
+                  f"{result['first_line'] * 1000:>13.1f} {peak_rss_mb(server.pid):>11.1f}  "
+                  f"scored={summary['scored']} invalid={summary['invalid']}")
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import os
+import numpy as np
+import pandas as pd
+
+from app.features import location_to_city, property_age
+
+DATA_PATH = os.path.join(
+    os.path.dirname(__file__), '..', '..', 'bosnia_herzegovina_real_estate_listings_2025.csv'
+)
+
+def load_feature_frame(city_price_map: dict, data_path: str = DATA_PATH) -> pd.DataFrame:
+    """
+    Builds model input rows for every listing in the published dataset, using the
+    description-based features from ml/train.py and the API's city price map.
+    """
+    df = pd.read_csv(data_path)
+    df['city'] = df['location'].map(lambda x: location_to_city(x) if isinstance(x, str) else 'Unknown')
+    df['property_age'] = df['year_built'].map(property_age)
+    df['m2_per_room'] = (df['size_m2'] / df['rooms']).replace([np.inf, -np.inf], np.nan)
+    df['city_median_price_per_m2'] = df['city'].map(city_price_map)
+    df['bathrooms'] = pd.to_numeric(df['bathrooms'], errors='coerce')
+
+    description = df['description'].str.lower().fillna('')
+    df['desc_len'] = description.str.len()
+    df['has_renoviran'] = description.str.contains('renoviran|adaptiran', regex=True).astype(int)
+    df['has_pogled'] = description.str.contains('pogled', regex=False).astype(int)
+    df['has_novogradnja_desc'] = description.str.contains('novogradnja', regex=False).astype(int)
+    df['has_garaza_desc'] = description.str.contains('garaž', regex=False).astype(int)
+    return df
@@ -0,0 +1,204 @@
+"""
+Load test for the API: drives the app in-process or a running server at one or more
+concurrency levels and reports throughput, latency percentiles and errors.
+
+Requests are either replayed from a JSON-lines file or generated from the schema enums.
+A replay line is a /predict body, or an object with "path", optional "method" (default
+POST when a "body" is given, GET otherwise) and "body". Results can be saved as JSON and
+compared against an earlier run; the command exits with status 1 on a regression.
+
+In-process runs start the app's startup handlers and disable the rate limiter. Against a
+server the limiter stays on, so raise RATE_LIMIT_REQUESTS there or 429s count as errors.
+
+Run from the api directory:
+  python -m benchmarks.load_test --concurrency 1,8,32 --requests 2000 --output results.json
+  python -m benchmarks.load_test --url http://127.0.0.1:8000 --replay recorded.jsonl
+  python -m benchmarks.load_test --baseline results.json --tolerance 0.1
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+import httpx
+import numpy as np
+
+from benchmarks.payloads import random_payload
+
+def load_replay(path: str) -> list:
+    requests = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "path" in record or "body" in record:
+                body = record.get("body")
+                method = record.get("method", "POST" if body is not None else "GET")
+                requests.append((method.upper(), record.get("path", "/predict"), body))
+            else:
+                requests.append(("POST", "/predict", record))
+    if not requests:
+        raise SystemExit(f"No requests found in {path}")
+    return requests
+
+def generate_requests(n: int, seed: int, path: str) -> list:
+    rng = random.Random(seed)
+    return [("POST", path, random_payload(rng)) for _ in range(n)]
+
+async def run_level(client: httpx.AsyncClient, requests: list, concurrency: int, total: int, timeout: float) -> dict:
+    """Sends `total` requests, cycling through `requests`, from `concurrency` clients that each wait for their reply."""
+    latencies = []
+    statuses = Counter()
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < total:
+            method, path, body = requests[next_index % len(requests)]
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body, timeout=timeout)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "max_ms": round(float(latencies_ms.max()), 3),
+        "errors": errors,
+        "error_rate": round(errors / len(latencies), 4),
+        "status_counts": dict(statuses),
+    }
+
+async def start_in_process_app():
+    from app.main import app, limiter
+    from app.ml_model import ml_model
+
+    limiter.enabled = False
+    await app.router.startup()
+    loader = getattr(app.state, "model_loader", None)
+    if loader is not None:
+        await loader
+    if not ml_model.ready:
+        raise SystemExit(f"Model failed to load: {ml_model.load_error}")
+    return app
+
+async def run(args) -> dict:
+    requests = load_replay(args.replay) if args.replay else generate_requests(args.requests, args.seed, args.path)
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    app = None
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, limits=httpx.Limits(max_connections=max(levels)))
+    else:
+        app = await start_in_process_app()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load-test")
+
+    results = []
+    try:
+        if args.warmup:
+            await run_level(client, requests, min(levels), args.warmup, args.timeout)
+        for concurrency in levels:
+            result = await run_level(client, requests, concurrency, args.requests, args.timeout)
+            results.append(result)
+            print(f"{concurrency:>7} {result['rps']:>9.1f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                  f"{result['p99_ms']:>8.2f} {result['errors']:>7}")
+    finally:
+        await client.aclose()
+        if app is not None:
+            await app.router.shutdown()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "target": args.url or "in-process",
+        "source": args.replay or f"random {args.path} (seed {args.seed})",
+        "requests_per_level": args.requests,
+        "results": results,
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def find_regressions(report: dict, baseline: dict, tolerance: float) -> list:
+    """Compares levels present in both runs: throughput may not drop, and p95/p99 and errors may not rise, beyond tolerance."""
+    previous = {result["concurrency"]: result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        before = previous.get(result["concurrency"])
+        if before is None:
+            continue
+        label = f"concurrency {result['concurrency']}"
+        if result["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{label}: rps {before['rps']} -> {result['rps']}")
+        for key in ("p95_ms", "p99_ms"):
+            if result[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{label}: {key} {before[key]} -> {result[key]}")
+        if result["error_rate"] > before["error_rate"]:
+            regressions.append(f"{label}: error rate {before['error_rate']} -> {result['error_rate']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the BIH Real Estate Estimator API.")
+    parser.add_argument("--url", help="Base URL of a running server; the app runs in-process when omitted.")
+    parser.add_argument("--replay", help="JSON-lines file of recorded requests to replay.")
+    parser.add_argument("--path", default="/predict", help="Endpoint for generated payloads (default /predict).")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per concurrency level.")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels.")
+    parser.add_argument("--warmup", type=int, default=100, help="Requests sent before measuring.")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression (default 0.10).")
+    args = parser.parse_args()
+
+    print(f"{'clients':>7} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    report = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        shared_levels = {r["concurrency"] for r in report["results"]} & {r["concurrency"] for r in baseline["results"]}
+        if not shared_levels:
+            print(f"\nNo concurrency levels in common with {args.baseline}; nothing to compare.")
+            return
+        regressions = find_regressions(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions against {args.baseline} (commit {baseline.get('commit')}):")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+
+if __name__ == "__main__":
+    main()
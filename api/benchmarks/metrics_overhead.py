@@ -0,0 +1,88 @@
+"""
+Measures the latency cost of the metrics middleware and per-stage timers on /predict by
+calling the ASGI app directly (no HTTP client in the timed loop) with the same requests,
+in alternating blocks with metrics enabled and disabled. The prediction cache and rate limiter are switched off so every
+request runs the full prediction path.
+
+Run from the api directory:  python -m benchmarks.metrics_overhead [requests_per_block]
+"""
+import asyncio
+import random
+import sys
+import time
+import json
+import numpy as np
+
+from app.main import app, limiter
+from app.ml_model import ml_model
+from app.executor import inference_executor
+from app.cache import prediction_cache
+from app.metrics import metrics
+from benchmarks.payloads import random_payload
+from benchmarks.asgi import call
+
+BLOCKS = 40
+
+async def call_predict(body: bytes):
+    status = await call(app, "POST", "/predict", body)
+    if status != 200:
+        raise RuntimeError(f"/predict returned {status}")
+
+async def timed_block(bodies):
+    latencies = []
+    for body in bodies:
+        start = time.perf_counter()
+        await call_predict(body)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+async def main():
+    requests_per_block = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    ml_model.load_model()
+    ml_model.load_city_map()
+    inference_executor.start()
+    limiter.enabled = False
+    prediction_cache.max_size = 0
+
+    rng = random.Random(0)
+    bodies = [json.dumps(random_payload(rng)).encode() for _ in range(requests_per_block)]
+    latencies = {True: [], False: []}
+    block_means = {True: [], False: []}
+
+    await timed_block(bodies)
+    for block in range(BLOCKS):
+        # Alternate which mode goes first so drift over the run does not favour either side.
+        for enabled in ((False, True) if block % 2 == 0 else (True, False)):
+            metrics.enabled = enabled
+            block_latencies = await timed_block(bodies)
+            latencies[enabled].extend(block_latencies)
+            block_means[enabled].append(np.mean(block_latencies))
+
+    inference_executor.shutdown()
+    observations = sum(h.count for h in metrics.stage_durations.values()) + sum(metrics.requests.values())
+    observations_per_request = observations / len(latencies[True])
+    metrics.enabled = True
+    start = time.perf_counter()
+    for _ in range(100_000):
+        metrics.observe_stage("benchmark", 0.001)
+    observe_seconds = (time.perf_counter() - start) / 100_000
+
+    print(f"{requests_per_block} requests x {BLOCKS} blocks per mode\n")
+    print(f"{'metrics':>8} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for enabled in (False, True):
+        latencies_ms = np.array(latencies[enabled]) * 1000
+        print(f"{'on' if enabled else 'off':>8} {latencies_ms.mean():>8.3f} {np.percentile(latencies_ms, 50):>8.3f} "
+              f"{np.percentile(latencies_ms, 95):>8.3f} {np.percentile(latencies_ms, 99):>8.3f}")
+
+    off = np.median(block_means[False])
+    on = np.median(block_means[True])
+    print(f"\nOverhead (median of block means): {(on - off) * 1e6:.1f} us per request ({(on - off) / off * 100:+.2f}%)")
+
+    # End-to-end differences this small sit near the noise floor, so also report the direct cost.
+    self_cost = observations_per_request * observe_seconds
+    mean_latency = np.mean(latencies[True])
+    print(f"Recording cost: {observations_per_request:.1f} observations/request x {observe_seconds * 1e6:.2f} us "
+          f"= {self_cost * 1e6:.1f} us ({self_cost / mean_latency * 100:.2f}% of mean latency)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+"""
+Measures throughput and tail latency of concurrent single-apartment predictions with and
+without the micro-batching scheduler, across client concurrency levels and window/size settings.
+
+Run from the api directory:  python -m benchmarks.micro_batching [requests_per_client]
+"""
+import asyncio
+import sys
+import time
+import numpy as np
+
+from app.ml_model import ml_model
+from app.executor import inference_executor
+from app.batcher import MicroBatcher
+from benchmarks.payloads import random_requests
+
+CONFIGURATIONS = [(0, 1), (1, 32), (2, 32), (5, 64)]
+CONCURRENCY_LEVELS = [1, 8, 32, 64]
+
+async def run_scenario(requests, window_ms, max_batch_size, concurrency, requests_per_client):
+    batcher = MicroBatcher(window_ms, max_batch_size)
+    latencies = []
+
+    async def client(client_requests):
+        for prediction_request in client_requests:
+            start = time.perf_counter()
+            if batcher.enabled:
+                await batcher.submit(prediction_request)
+            else:
+                await inference_executor.predict([prediction_request])
+            latencies.append(time.perf_counter() - start)
+
+    chunks = [requests[i * requests_per_client:(i + 1) * requests_per_client] for i in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(chunk) for chunk in chunks))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": np.percentile(latencies_ms, 50),
+        "p95": np.percentile(latencies_ms, 95),
+        "p99": np.percentile(latencies_ms, 99),
+        "avg_batch": batcher.batched_requests / batcher.batches if batcher.batches else 1.0,
+    }
+
+async def main():
+    requests_per_client = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    ml_model.load_model()
+    ml_model.load_city_map()
+    inference_executor.max_queue = 10_000
+    inference_executor.start()
+
+    requests = random_requests(max(CONCURRENCY_LEVELS) * requests_per_client)
+    await run_scenario(requests[:50], 0, 1, 1, 50)
+
+    print(f"workers={inference_executor.max_workers} ({inference_executor.kind}), "
+          f"{requests_per_client} requests per client\n")
+    print(f"{'clients':>7} {'window_ms':>9} {'max_size':>8} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'avg batch':>9}")
+    for concurrency in CONCURRENCY_LEVELS:
+        for window_ms, max_batch_size in CONFIGURATIONS:
+            result = await run_scenario(requests, window_ms, max_batch_size, concurrency, requests_per_client)
+            label = "off" if window_ms == 0 else str(window_ms)
+            print(f"{concurrency:>7} {label:>9} {max_batch_size:>8} {result['rps']:>9.0f} {result['p50']:>8.2f} "
+                  f"{result['p95']:>8.2f} {result['p99']:>8.2f} {result['avg_batch']:>9.1f}")
+        print()
+
+    inference_executor.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
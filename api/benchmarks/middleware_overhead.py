@@ -0,0 +1,113 @@
+"""
+Measures what the middleware stack costs per request on GET /, GET /health and POST /predict.
+Requests go straight into the ASGI app; the stack is rebuilt for each configuration: the
+full stack, the full stack without each middleware in turn, no middleware at all, and the
+previous stack with BaseHTTPMiddleware-based security headers and SlowAPIMiddleware.
+
+/predict bodies repeat, so after the first round they are served from the prediction cache
+and the timings isolate the request path around the model. Every request comes from a new
+client address so the rate limiter is exercised without rejecting anything.
+
+Run from the api directory:  python -m benchmarks.middleware_overhead [requests_per_block]
+"""
+import asyncio
+import json
+import random
+import sys
+import time
+import numpy as np
+from fastapi import Request
+from slowapi.middleware import SlowAPIMiddleware
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.main import app, SecurityHeadersMiddleware
+from app.ml_model import ml_model
+from app.executor import inference_executor
+from benchmarks.payloads import random_payload
+from benchmarks.asgi import call
+
+ROUNDS = 5
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation SecurityHeadersMiddleware replaced."""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        return response
+
+def configurations(full_stack: list) -> list:
+    configs = [("full stack", full_stack)]
+    for middleware in full_stack:
+        configs.append((f"without {middleware.cls.__name__}", [m for m in full_stack if m is not middleware]))
+    configs.append(("no middleware", []))
+    legacy = {SecurityHeadersMiddleware: LegacySecurityHeadersMiddleware}
+    configs.append(("previous (BaseHTTPMiddleware)", [
+        Middleware(legacy.get(m.cls, m.cls), *m.args, **m.kwargs)
+        if m.cls.__name__ != "SlowAPIASGIMiddleware" else Middleware(SlowAPIMiddleware)
+        for m in full_stack
+    ]))
+    return configs
+
+def use_stack(middleware: list):
+    app.user_middleware = list(middleware)
+    app.middleware_stack = None
+
+async def timed_block(method, path, bodies, counter) -> float:
+    latencies = []
+    for body in bodies:
+        counter[0] += 1
+        n = counter[0]
+        client = (f"10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}", 50000)
+        start = time.perf_counter()
+        status = await call(app, method, path, body, client=client)
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            raise RuntimeError(f"{method} {path} returned {status}")
+    return float(np.median(latencies))
+
+async def main():
+    requests_per_block = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    ml_model.load_model()
+    ml_model.load_city_map()
+    ml_model.ready = True
+    inference_executor.start()
+
+    rng = random.Random(0)
+    predict_bodies = [json.dumps(random_payload(rng)).encode() for _ in range(requests_per_block)]
+    endpoints = [
+        ("GET /", "GET", "/", [b""] * requests_per_block),
+        ("GET /health", "GET", "/health", [b""] * requests_per_block),
+        ("POST /predict", "POST", "/predict", predict_bodies),
+    ]
+    configs = configurations(list(app.user_middleware))
+    results = {(label, endpoint[0]): [] for label, _ in configs for endpoint in endpoints}
+    counter = [0]
+
+    for endpoint_label, method, path, bodies in endpoints:
+        use_stack(configs[0][1])
+        await timed_block(method, path, bodies, counter)
+        for _ in range(ROUNDS):
+            for label, stack in configs:
+                use_stack(stack)
+                results[(label, endpoint_label)].append(await timed_block(method, path, bodies, counter))
+    use_stack(configs[0][1])
+    inference_executor.shutdown()
+
+    print(f"median latency in us ({ROUNDS} interleaved rounds of {requests_per_block} requests)\n")
+    header = "".join(f"{endpoint[0]:>16}" for endpoint in endpoints)
+    print(f"{'configuration':<40}{header}")
+    baseline = {endpoint[0]: np.median(results[("no middleware", endpoint[0])]) for endpoint in endpoints}
+    for label, _ in configs:
+        cells = ""
+        for endpoint in endpoints:
+            latency = np.median(results[(label, endpoint[0])])
+            cells += f"{latency * 1e6:>8.1f} ({(latency - baseline[endpoint[0]]) * 1e6:+5.0f})"
+        print(f"{label:<40}{cells}")
+    print("\n(+N) is the cost over no middleware at all.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
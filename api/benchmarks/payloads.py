@@ -0,0 +1,30 @@
+import random
+
+from app.schemas import (
+    ApartmentPredictionRequest, LocationEnum, ConditionEnum, FurnishedEnum, HeatingEnum, YearBuiltEnum
+)
+
+def random_payload(rng: random.Random) -> dict:
+    """Generates a random, valid ApartmentPredictionRequest body from the schema enums."""
+    rooms = rng.choice([1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0, 5.0])
+    return {
+        "location": rng.choice(list(LocationEnum)).value,
+        "size_m2": round(rng.uniform(max(15, rooms * 15), rooms * 45), 1),
+        "rooms": rooms,
+        "floor": rng.randint(-1, 15),
+        "bathrooms": rng.choice([None, 1, 1, 1, 2, 3]),
+        "year_built": rng.choice(list(YearBuiltEnum)).value,
+        "condition": rng.choice(list(ConditionEnum)).value,
+        "furnished": rng.choice(list(FurnishedEnum)).value,
+        "heating_type": rng.choice(list(HeatingEnum)).value,
+        "has_balcony": rng.random() < 0.5,
+        "has_garage": rng.random() < 0.3,
+        "has_parking": rng.random() < 0.5,
+        "has_elevator": rng.random() < 0.5,
+        "is_registered": rng.random() < 0.8,
+        "has_armored_door": rng.random() < 0.5,
+    }
+
+def random_requests(n: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    return [ApartmentPredictionRequest(**random_payload(rng)) for _ in range(n)]
@@ -0,0 +1,105 @@
+"""
+Measures the rate limiter: the cost of one limiter hit for each storage, the added latency
+of a rate-limited request through the app, whether N worker processes sharing a storage
+admit exactly the configured number of requests, and idle-key expiry.
+
+Run from the api directory:  python -m benchmarks.rate_limit [workers]
+"""
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from limits import parse
+from limits.storage import MemoryStorage
+from limits.strategies import FixedWindowRateLimiter
+
+from app.rate_limit import MemoryBucketStorage, SQLiteBucketStorage, TokenBucketRateLimiter
+from benchmarks.asgi import call
+
+HITS = 20_000
+DISTINCT_KEYS = 5_000
+ROUNDS = 5
+
+def strategies(directory: str) -> list:
+    return [
+        ("fixed-window, memory (previous)", FixedWindowRateLimiter(MemoryStorage())),
+        ("token-bucket, memory", TokenBucketRateLimiter(MemoryBucketStorage())),
+        ("token-bucket, sqlite", TokenBucketRateLimiter(SQLiteBucketStorage(os.path.join(directory, "hits.db")))),
+    ]
+
+def time_hits(strategy, item, keys) -> float:
+    start = time.perf_counter()
+    for i in range(HITS):
+        strategy.hit(item, keys[i % len(keys)], "/predict")
+    return (time.perf_counter() - start) / HITS
+
+async def time_requests(app, limiter, strategy, n=1000) -> float:
+    limiter._limiter = strategy
+    latencies = []
+    for i in range(n):
+        # A new client address per request keeps every request under its limit.
+        client = (f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}", 50000)
+        start = time.perf_counter()
+        status = await call(app, "GET", "/", client=client)
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            raise RuntimeError(f"/ returned {status}")
+    return float(np.median(latencies))
+
+def worker_hits(path: str, hits: int, results):
+    strategy = TokenBucketRateLimiter(SQLiteBucketStorage(path))
+    item = parse("100/day")
+    results.put(sum(strategy.hit(item, "shared-client", "/predict") for _ in range(hits)))
+
+def shared_admissions(path: str, workers: int, hits_per_worker: int) -> int:
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker_hits, args=(path, hits_per_worker, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    admitted = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return admitted
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    item = parse("20/minute")
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Limiter hit cost ({HITS} hits)")
+        print(f"{'strategy':<32} {'1 key us':>9} {f'{DISTINCT_KEYS} keys us':>12}")
+        for label, strategy in strategies(directory):
+            one_key = time_hits(strategy, item, ["client"])
+            many_keys = time_hits(strategy, item, [f"client-{i}" for i in range(DISTINCT_KEYS)])
+            print(f"{label:<32} {one_key * 1e6:>9.2f} {many_keys * 1e6:>12.2f}")
+
+        from app.main import app, limiter
+        print("\nMedian latency of GET / through the app (median over rounds, configurations interleaved)")
+        configurations = [("limiter disabled", None)] + strategies(directory)
+        rounds = {label: [] for label, _ in configurations}
+        for _ in range(ROUNDS):
+            for label, strategy in configurations:
+                limiter.enabled = strategy is not None
+                rounds[label].append(asyncio.run(time_requests(app, limiter, strategy or limiter._limiter)))
+        baseline = np.median(rounds["limiter disabled"])
+        for label, _ in configurations:
+            latency = np.median(rounds[label])
+            print(f"{label:<32} {latency * 1e6:>9.1f} us  (+{(latency - baseline) * 1e6:.1f} us)")
+        limiter.enabled = True
+
+        path = os.path.join(directory, "shared.db")
+        admitted = shared_admissions(path, workers, 100)
+        print(f"\n{workers} processes x 100 hits on one key, limit 100/day, sqlite storage: {admitted} admitted")
+        print(f"(per-process memory storage would admit {workers * 100})")
+
+        storage = MemoryBucketStorage(sweep_interval_seconds=0)
+        now = time.time()
+        for i in range(DISTINCT_KEYS):
+            storage.take(f"client-{i}", 20, 20 / 60, 1, now)
+        storage.take("client-0", 20, 20 / 60, 1, now + 61)
+        print(f"\nIdle expiry: {DISTINCT_KEYS} buckets, one minute idle later {len(storage)} left in memory")
+
+if __name__ == "__main__":
+    main()
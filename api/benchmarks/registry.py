@@ -0,0 +1,108 @@
+"""
+Compares serving from a model registry bundle (ml/registry.py) with the joblib artifacts:
+on-disk size, and load time in fresh interpreters up to a warmed-up bundle.
+
+- joblib: unpickle model.joblib (importing sklearn), read city_price_map.json, and compile the
+  tree engine and vectorizer from the pipeline (the startup without a compiled cache).
+- registry: read the manifest and flat tree arrays and lay out the tree engine; no sklearn.
+
+The bundle is exported from the current model.joblib into a temporary registry, and its
+predictions are checked against the pipeline's for a few thousand random requests.
+
+Run from the api directory:  python -m benchmarks.registry [runs]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import numpy as np
+
+from app.config import settings
+
+EXPORT = r"""
+import json, sys, joblib
+from config import DATA_PATH
+from registry import export_bundle
+with open(sys.argv[2]) as f:
+    city_price_map = json.load(f)
+print(export_bundle(joblib.load(sys.argv[1]), city_price_map, DATA_PATH, {}, sys.argv[3]))
+"""
+
+PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+from app.ml_model import ml_model
+imported = time.perf_counter()
+if sys.argv[1] == "joblib":
+    ml_model.load_model()
+    ml_model.load_city_map()
+    ml_model.bundle.warm_up()
+else:
+    assert ml_model.load(), ml_model.load_error
+    assert ml_model.bundle.registry_info is not None
+loaded = time.perf_counter()
+print(json.dumps({"import": imported - started, "load": loaded - imported, "total": loaded - started}))
+"""
+
+PARITY_ROWS = 5000
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def run_probe(mode: str, registry_dir: str) -> dict:
+    # The comparables index is loaded the same way in both modes (with joblib), so it is left out.
+    env = dict(os.environ, PYTHONPATH=os.getcwd(), COMPARABLES_PATH="",
+               MODEL_REGISTRY_DIR=registry_dir if mode == "registry" else "")
+    result = subprocess.run([sys.executable, "-c", PROBE, mode], env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def check_parity(registry_dir: str) -> float:
+    """Largest absolute difference in log price between the registry bundle and the sklearn pipeline."""
+    from app import registry
+    from app.ml_model import ml_model
+    from app.vectorizer import FeatureVectorizer
+    from benchmarks.payloads import random_requests
+
+    ml_model.load_model()
+    ml_model.load_city_map()
+    settings.MODEL_REGISTRY_DIR = registry_dir
+    manifest, tree_engine = registry.load_bundle(registry.resolve_version())
+    requests = random_requests(PARITY_ROWS, seed=3)
+    expected = ml_model.model.predict(_frame(requests, ml_model.city_price_map))
+    vectorizer = FeatureVectorizer.from_spec(manifest["preprocessing"], manifest["city_price_map"])
+    actual = tree_engine.predict(vectorizer.transform(requests))
+    return float(np.max(np.abs(actual - expected)))
+
+def _frame(requests, city_price_map):
+    import pandas as pd
+    from app.features import build_features
+    return pd.DataFrame([build_features(r, city_price_map) for r in requests])
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    model_path = os.path.abspath(settings.MODEL_PATH)
+    city_map_path = os.path.abspath(settings.CITY_MAP_PATH)
+    registry_dir = tempfile.mkdtemp(prefix="registry-")
+    ml_dir = os.path.dirname(model_path)
+    version = subprocess.run(
+        [sys.executable, "-c", EXPORT, model_path, city_map_path, registry_dir],
+        cwd=ml_dir, capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()[-1]
+
+    joblib_size = os.path.getsize(model_path) + os.path.getsize(city_map_path)
+    registry_size = directory_size(os.path.join(registry_dir, version))
+    print(f"bundle {version}")
+    print(f"size: joblib + city map {joblib_size / 1024:,.0f} KB, registry bundle {registry_size / 1024:,.0f} KB "
+          f"({registry_size / joblib_size:.0%})")
+    print(f"max |log-price difference| over {PARITY_ROWS} random requests: {check_parity(registry_dir):.3g}\n")
+
+    print(f"median of {runs} fresh interpreters (ms)\n")
+    print(f"{'artifact':<10} {'import':>8} {'load':>8} {'total':>8}")
+    for mode in ("joblib", "registry"):
+        samples = [run_probe(mode, registry_dir) for _ in range(runs)]
+        median = {key: np.median([s[key] for s in samples]) * 1000 for key in samples[0]}
+        print(f"{mode:<10} {median['import']:>8.1f} {median['load']:>8.1f} {median['total']:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Measures cold-start phases of an API replica, each in a fresh interpreter: importing the
+app, loading and warming up the model bundle, and the first and a steady-state prediction.
+
+Compares the compiled-model cache (with and without memory-mapped arrays) against the
+previous startup, which imported pandas/joblib/sklearn with the app and unpickled the full
+pipeline before serving. With the cache the sklearn pipeline loads in the background after
+the replica is ready, so it is not part of these timings.
+
+Run from the api directory:  python -m benchmarks.startup [runs]
+"""
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+
+PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+if sys.argv[1] == "pipeline":
+    import pandas, joblib, sklearn.ensemble
+from app.main import app
+from app.ml_model import ml_model
+from benchmarks.payloads import random_requests
+imported = time.perf_counter()
+if sys.argv[1] == "pipeline":
+    ml_model.load_model()
+    ml_model.load_city_map()
+    ml_model.bundle.warm_up()
+else:
+    assert ml_model.load(), ml_model.load_error
+    assert ml_model.bundle.from_compiled_cache
+loaded = time.perf_counter()
+first, second = random_requests(2, seed=7)
+ml_model.predict_log([first])
+first_done = time.perf_counter()
+ml_model.predict_log([second])
+second_done = time.perf_counter()
+print(json.dumps({
+    "import": imported - started,
+    "load": loaded - imported,
+    "first_predict": first_done - loaded,
+    "steady_predict": second_done - first_done,
+    "total": first_done - started,
+}))
+"""
+
+MODES = [
+    ("compiled cache, mmap", "compiled", "true"),
+    ("compiled cache, no mmap", "compiled", "false"),
+    ("pickled pipeline (previous)", "pipeline", "false"),
+]
+
+def run_probe(source: str, mmap: str) -> dict:
+    env = dict(os.environ, MODEL_MMAP=mmap, PYTHONPATH=os.getcwd())
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, source], env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    subprocess.run([sys.executable, "-m", "app.compiled_model"], check=True, capture_output=True)
+
+    print(f"median of {runs} fresh interpreters per mode (ms)\n")
+    print(f"{'mode':<28} {'import':>8} {'load':>8} {'1st pred':>9} {'steady':>8} {'total':>8}")
+    for label, source, mmap in MODES:
+        samples = [run_probe(source, mmap) for _ in range(runs)]
+        median = {key: np.median([s[key] for s in samples]) * 1000 for key in samples[0]}
+        print(f"{label:<28} {median['import']:>8.1f} {median['load']:>8.1f} {median['first_predict']:>9.2f} "
+              f"{median['steady_predict']:>8.2f} {median['total']:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Compares the compiled tree engine against GradientBoostingRegressor.predict on the
+published dataset: checks that predictions agree bit for bit and times both backends
+for single rows and batches.
+
+Run from the api directory:  python -m benchmarks.tree_engine
+"""
+import sys
+import time
+import warnings
+import numpy as np
+
+from app.ml_model import ml_model
+from app.tree_engine import CompiledTreeEnsemble
+from benchmarks.dataset import load_feature_frame
+
+def best_time(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    warnings.filterwarnings('ignore', message='Found unknown categories')
+    ml_model.load_model()
+    ml_model.load_city_map()
+    regressor = ml_model.model.steps[-1][1]
+
+    start = time.perf_counter()
+    engine = CompiledTreeEnsemble.compile(regressor)
+    print(f"Compiled {engine.n_trees} trees ({len(engine.feature)} nodes, depth {engine.depth}) "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    frame = load_feature_frame(ml_model.city_price_map)
+    X = ml_model.model[:-1].transform(frame)
+    X = X.toarray() if hasattr(X, 'toarray') else X
+
+    expected = regressor.predict(X)
+    actual = engine.predict(X)
+    max_diff = np.max(np.abs(expected - actual))
+    identical = np.array_equal(expected, actual)
+    print(f"Dataset rows: {X.shape[0]}; predictions identical: {identical}; max abs diff: {max_diff:.3e}")
+
+    print(f"\n{'batch size':>10} {'sklearn (us/row)':>18} {'compiled (us/row)':>18} {'speedup':>8}")
+    for batch_size in [1, 10, 100, 1000, X.shape[0]]:
+        batch = X[:batch_size]
+        repeat = 200 if batch_size == 1 else 20
+        sklearn_time = best_time(lambda: regressor.predict(batch), repeat) / batch_size
+        compiled_time = best_time(lambda: engine.predict(batch), repeat) / batch_size
+        print(f"{batch_size:>10} {sklearn_time * 1e6:>18.2f} {compiled_time * 1e6:>18.2f} "
+              f"{sklearn_time / compiled_time:>7.1f}x")
+
+    if not identical:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
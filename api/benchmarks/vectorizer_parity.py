@@ -0,0 +1,66 @@
+"""
+Checks that the compiled FeatureVectorizer reproduces the fitted pipeline's preprocessor
+output exactly, and compares the per-request cost of both paths.
+
+Run from the api directory:  python -m benchmarks.vectorizer_parity [n_requests]
+"""
+import sys
+import time
+import warnings
+import numpy as np
+import pandas as pd
+
+from app.ml_model import ml_model
+from app.features import build_features
+from benchmarks.payloads import random_requests
+
+def time_per_call(fn, items, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items)
+
+def main():
+    warnings.filterwarnings('ignore', message='Found unknown categories')
+    n_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    ml_model.load_model()
+    ml_model.load_city_map()
+    if ml_model.vectorizer is None:
+        print("Vectorizer could not be compiled for this model.")
+        sys.exit(1)
+
+    requests = random_requests(n_requests)
+    preprocessor = ml_model.model.named_steps['preprocessor']
+    regressor = ml_model.model.steps[-1][1]
+
+    expected = preprocessor.transform(pd.DataFrame([build_features(r, ml_model.city_price_map) for r in requests]))
+    actual = ml_model.vectorizer.transform(requests)
+    identical = np.array_equal(expected, actual)
+    print(f"Transformed matrices identical for {n_requests} requests: {identical}")
+    print(f"Max absolute difference: {np.max(np.abs(expected - actual)):.3e}")
+
+    predictions_identical = np.array_equal(ml_model.model.predict(
+        pd.DataFrame([build_features(r, ml_model.city_price_map) for r in requests])
+    ), regressor.predict(actual))
+    print(f"Predictions identical: {predictions_identical}")
+
+    sample = requests[:500]
+    pipeline_transform = lambda r: preprocessor.transform(pd.DataFrame([build_features(r, ml_model.city_price_map)]))
+    vectorizer_transform = lambda r: ml_model.vectorizer.transform([r])
+    pipeline_predict = lambda r: ml_model.model.predict(pd.DataFrame([build_features(r, ml_model.city_price_map)]))
+    vectorizer_predict = lambda r: ml_model.predict_log([r])
+
+    print("\nPer-request latency (single row):")
+    print(f"  DataFrame + ColumnTransformer: {time_per_call(pipeline_transform, sample) * 1e6:9.1f} us")
+    print(f"  FeatureVectorizer:             {time_per_call(vectorizer_transform, sample) * 1e6:9.1f} us")
+    print(f"  Full predict, pipeline:        {time_per_call(pipeline_predict, sample) * 1e6:9.1f} us")
+    print(f"  Full predict, vectorizer:      {time_per_call(vectorizer_predict, sample) * 1e6:9.1f} us")
+
+    if not (identical and predictions_identical):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
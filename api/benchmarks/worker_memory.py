@@ -0,0 +1,98 @@
+"""
+Reports per-worker memory of `uvicorn --workers N` in the private serving mode (each worker
+loads the sklearn pipeline itself) and the shared mode (workers memory-map one published
+compiled model and never import sklearn).
+
+RSS counts shared pages once per worker; PSS splits them between the processes mapping
+them, so total PSS is the real footprint. USS is what a worker holds on its own.
+Linux only (reads /proc). Run from the api directory:
+    python -m benchmarks.worker_memory [workers] [port]
+"""
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+import httpx
+
+from benchmarks.payloads import random_payload
+
+SETTLE_SECONDS = 3.0
+WARM_REQUESTS = 200
+
+def memory_kb(pid: int) -> dict:
+    """Rss, Pss and private (USS) kB from /proc/<pid>/smaps_rollup."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss": values["Rss"],
+        "pss": values["Pss"],
+        "uss": values["Private_Clean"] + values["Private_Dirty"],
+    }
+
+def child_pids(pid: int) -> list:
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            children.extend(int(child) for child in f.read().split())
+    return children
+
+def worker_pids(master_pid: int, workers: int) -> list:
+    """uvicorn runs a single worker in the master process; with more it spawns one child each."""
+    if workers == 1:
+        return [master_pid]
+    # Skip multiprocessing's resource tracker and other helpers that never bind the app.
+    return [pid for pid in child_pids(master_pid) if "uvicorn" in _cmdline(pid) or "spawn_main" in _cmdline(pid)][:workers]
+
+def _cmdline(pid: int) -> str:
+    with open(f"/proc/{pid}/cmdline", "rb") as f:
+        return f.read().replace(b"\0", b" ").decode()
+
+def measure(mode: str, workers: int, port: int) -> list:
+    env = dict(os.environ, MODEL_SERVING_MODE=mode, PREDICTION_CACHE_SIZE="0", RATE_LIMIT_REQUESTS="1000000")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        deadline = time.time() + 60
+        ready = 0
+        while ready < 3 * workers:
+            if time.time() > deadline:
+                raise RuntimeError(f"{mode} x{workers} never became ready")
+            try:
+                ready = ready + 1 if httpx.get(f"{base_url}/ready", timeout=1).status_code == 200 else 0
+            except httpx.HTTPError:
+                time.sleep(0.2)
+
+        rng = random.Random(0)
+        with httpx.Client(base_url=base_url) as client:
+            for _ in range(WARM_REQUESTS):
+                client.post("/predict", json=random_payload(rng)).raise_for_status()
+        # Give private-mode workers time to finish unpickling the pipeline in the background.
+        time.sleep(SETTLE_SECONDS)
+        return [memory_kb(pid) for pid in worker_pids(server.pid, workers)]
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=30)
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8765
+    print(f"{'mode':<8} {'workers':>7} {'RSS/worker MB':>14} {'PSS/worker MB':>14} {'USS/worker MB':>14} {'total PSS MB':>13}")
+    for mode in ("private", "shared"):
+        for count in (1, workers):
+            samples = measure(mode, count, port)
+            mean = {key: sum(s[key] for s in samples) / len(samples) / 1024 for key in samples[0]}
+            total_pss = sum(s["pss"] for s in samples) / 1024
+            print(f"{mode:<8} {count:>7} {mean['rss']:>14.1f} {mean['pss']:>14.1f} {mean['uss']:>14.1f} {total_pss:>13.1f}")
+
+if __name__ == "__main__":
+    main()
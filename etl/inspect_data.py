@@ -1,26 +1,33 @@
+import os
+import sys
 import pandas as pd
 from config import PROCESSED_DATA_PATH
 import logging
 
+# The typed listings loader is shared with the ML pipeline.
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ml'))
+from dataset import load_listings
+
 pd.set_option('display.max_columns', None)
 pd.set_option('display.width', 1000)
 
 def main():
-    """Loads and inspects the processed Parquet file."""
+    """Loads and inspects the processed Parquet file, or the CSV or Parquet file given as an argument."""
+    path = sys.argv[1] if len(sys.argv) > 1 else PROCESSED_DATA_PATH
     try:
-        df = pd.read_parquet(PROCESSED_DATA_PATH)
+        df = load_listings(path)
         
         print("\n--- First 5 Rows ---")
         print(df.head())
         
         print(f"\n--- DataFrame Info (Total Rows: {len(df)}) ---")
-        df.info(verbose=False)
+        df.info(verbose=False, memory_usage='deep')
         
         print("\n--- Descriptive Statistics for Numeric Columns ---")
         print(df.describe().T)
 
     except FileNotFoundError:
-        logging.error(f"Processed data file not found at {PROCESSED_DATA_PATH}. Please run transformer.py first.")
+        logging.error(f"Processed data file not found at {path}. Please run transformer.py first.")
     except Exception as e:
         logging.error(f"An error occurred while inspecting the data: {e}")
 
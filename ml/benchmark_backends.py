@@ -0,0 +1,106 @@
+"""
+Compares the training backends of train.py (gbr, hist) on the published CSV and on
+up-sampled copies of its training split: fit time, single-row and batch predict latency,
+pickled model size, and R²/MAE on the untouched 20% test split.
+
+The listings are read like train.py reads them, through the typed loader (dataset.py), so
+the check also covers the loader's dtypes reaching both pipelines.
+
+Up-sampled copies resample the training rows with replacement and jitter size and price
+by up to ±3%, so the larger sets are not exact duplicates.
+
+Run from the ml directory:  python benchmark_backends.py [factor ...]   (default: 1 5 20)
+"""
+import io
+import logging
+import os
+import sys
+import time
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import r2_score, mean_absolute_error
+from sklearn.model_selection import train_test_split
+
+from config import DATA_PATH, DATASET_CACHE_DIR
+from dataset import load_listings
+from train import (NUMERIC_FEATURES, CATEGORICAL_FEATURES, TRAINING_BACKENDS, RAW_COLUMNS, DESCRIPTION_DERIVED,
+                   build_pipeline, feature_engineering_pipeline)
+
+SINGLE_ROW_CALLS = 200
+BATCH_ROWS = 1000
+
+def upsample(X: pd.DataFrame, y: pd.Series, factor: int, rng: np.random.Generator):
+    if factor == 1:
+        return X, y
+    positions = rng.integers(0, len(X), size=len(X) * factor)
+    X_up = X.iloc[positions].reset_index(drop=True)
+    price = np.expm1(y.iloc[positions].to_numpy()) * rng.uniform(0.97, 1.03, size=len(positions))
+    size_jitter = rng.uniform(0.97, 1.03, size=len(positions))
+    X_up['size_m2'] = X_up['size_m2'] * size_jitter
+    X_up['m2_per_room'] = X_up['m2_per_room'] * size_jitter
+    return X_up, pd.Series(np.log1p(price))
+
+def fitted_pipeline(backend: str):
+    pipeline, param_grid, _ = build_pipeline(backend, NUMERIC_FEATURES, CATEGORICAL_FEATURES)
+    # Every grid in train.py is a single point; fit that point directly instead of cross-validating it.
+    pipeline.set_params(**{name: values[0] for name, values in param_grid.items()})
+    return pipeline
+
+def measure(backend: str, X_train, y_train, X_test, y_test) -> dict:
+    pipeline = fitted_pipeline(backend)
+    started = time.perf_counter()
+    pipeline.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+
+    single_row = X_test.iloc[[0]]
+    pipeline.predict(single_row)
+    latencies = []
+    for _ in range(SINGLE_ROW_CALLS):
+        started = time.perf_counter()
+        pipeline.predict(single_row)
+        latencies.append(time.perf_counter() - started)
+
+    batch = X_test.sample(BATCH_ROWS, replace=True, random_state=0)
+    started = time.perf_counter()
+    pipeline.predict(batch)
+    batch_seconds = time.perf_counter() - started
+
+    buffer = io.BytesIO()
+    joblib.dump(pipeline, buffer)
+
+    predicted = np.expm1(pipeline.predict(X_test))
+    actual = np.expm1(y_test)
+    return {
+        "fit_s": fit_seconds,
+        "row_ms": float(np.median(latencies)) * 1000,
+        "batch_us_per_row": batch_seconds / BATCH_ROWS * 1e6,
+        "size_kb": buffer.tell() / 1024,
+        "r2": r2_score(actual, predicted),
+        "mae": mean_absolute_error(actual, predicted),
+    }
+
+def main():
+    factors = [int(factor) for factor in sys.argv[1:]] or [1, 5, 20]
+    logging.disable(logging.INFO)
+    warnings.simplefilter("ignore")
+
+    df, _ = feature_engineering_pipeline(load_listings(DATA_PATH, RAW_COLUMNS, DATASET_CACHE_DIR, DESCRIPTION_DERIVED))
+    df = df.dropna(subset=['price_km'])
+    X = df[NUMERIC_FEATURES + CATEGORICAL_FEATURES]
+    y = np.log1p(df['price_km'])
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    rng = np.random.default_rng(0)
+
+    print(f"cores: {os.cpu_count()}, test rows: {len(X_test)}\n")
+    print(f"{'train rows':>10} {'backend':>7} {'fit s':>8} {'row ms':>7} {'batch us/row':>12} {'size KB':>8} {'R²':>7} {'MAE KM':>9}")
+    for factor in factors:
+        X_up, y_up = upsample(X_train, y_train, factor, rng)
+        for backend in TRAINING_BACKENDS:
+            result = measure(backend, X_up, y_up, X_test, y_test)
+            print(f"{len(X_up):>10} {backend:>7} {result['fit_s']:>8.2f} {result['row_ms']:>7.2f} "
+                  f"{result['batch_us_per_row']:>12.1f} {result['size_kb']:>8.0f} {result['r2']:>7.4f} {result['mae']:>9,.0f}")
+
+if __name__ == "__main__":
+    main()
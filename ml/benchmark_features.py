@@ -0,0 +1,83 @@
+"""
+Times feature_engineering_pipeline on the published CSV and on copies of it stacked 10x and
+100x, against the same pipeline with the row-wise add_listing_features it replaced (kept
+below as the reference), and checks that both produce the same engineered frame and city
+price map.
+
+The stacked copies repeat the listings unchanged, so the reference output is exactly known;
+locations, year strings and descriptions do not become any more varied at larger factors.
+
+Run from the ml directory:  python benchmark_features.py [factor ...]   (default: 1 10 100)
+Exits with status 1 if the outputs differ at any factor.
+"""
+import logging
+import sys
+import time
+import warnings
+import numpy as np
+import pandas as pd
+
+from config import DATA_PATH
+from train import parse_year, feature_engineering_pipeline
+
+def reference_add_listing_features(df: pd.DataFrame) -> pd.DataFrame:
+    """The row-wise add_listing_features that the vectorized version must match."""
+    df = df.copy()
+    df['city'] = df['location'].apply(lambda x: x.split('-')[0].strip() if isinstance(x, str) else 'Unknown')
+    df['parsed_year'] = df['year_built'].apply(parse_year)
+    df['property_age'] = 2025 - df['parsed_year']
+    df['m2_per_room'] = df['size_m2'] / df['rooms']
+    df['m2_per_room'] = df['m2_per_room'].replace([np.inf, -np.inf], np.nan)
+    df['description'] = df['description'].str.lower().fillna('')
+    df['desc_len'] = df['description'].apply(len)
+    df['has_renoviran'] = df['description'].str.contains('renoviran|adaptiran', regex=True).astype(int)
+    df['has_pogled'] = df['description'].str.contains('pogled', regex=False).astype(int)
+    df['has_novogradnja_desc'] = df['description'].str.contains('novogradnja', regex=False).astype(int)
+    df['has_garaza_desc'] = df['description'].str.contains('garaž', regex=False).astype(int)
+    df['bathrooms'] = pd.to_numeric(df['bathrooms'], errors='coerce')
+    return df
+
+def reference_pipeline(df: pd.DataFrame) -> tuple:
+    """feature_engineering_pipeline with the reference per-listing features."""
+    import train
+    vectorized = train.add_listing_features
+    train.add_listing_features = reference_add_listing_features
+    try:
+        return train.feature_engineering_pipeline(df)
+    finally:
+        train.add_listing_features = vectorized
+
+def timed(function, df: pd.DataFrame):
+    started = time.perf_counter()
+    result = function(df)
+    return result, time.perf_counter() - started
+
+def main():
+    factors = [int(factor) for factor in sys.argv[1:]] or [1, 10, 100]
+    logging.disable(logging.INFO)
+    warnings.simplefilter("ignore")
+    raw = pd.read_csv(DATA_PATH)
+
+    print(f"{'rows':>9} {'reference s':>12} {'vectorized s':>12} {'speedup':>8}  equal")
+    all_equal = True
+    for factor in factors:
+        df = pd.concat([raw] * factor, ignore_index=True)
+        (reference_frame, reference_map), reference_s = timed(reference_pipeline, df)
+        (frame, city_price_map), vectorized_s = timed(feature_engineering_pipeline, df)
+        del df
+
+        try:
+            pd.testing.assert_frame_equal(frame, reference_frame)
+            assert city_price_map == reference_map, "city price maps differ"
+            equal = "yes"
+        except AssertionError as e:
+            all_equal = False
+            equal = f"NO: {str(e).splitlines()[0]}"
+        del frame, reference_frame
+
+        print(f"{factor * len(raw):>9} {reference_s:>12.2f} {vectorized_s:>12.2f} {reference_s / vectorized_s:>7.1f}x  {equal}")
+
+    sys.exit(0 if all_equal else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Measures how far incremental training drifts from a full retrain as new crawls arrive.
+
+A fixed random 20% of the listings is held out for testing. The rest is ordered by id (ids
+grow with the listing date, so this replays the crawls in order) and split into a base set
+and a number of equal deltas. The base set is trained in full with the fixed grid point of
+train.py; after every delta, the incremental model (sketched statistics plus warm-started
+trees) is compared with a full retrain on every listing seen so far: update time, test R²
+and MAE, and the relative difference of the city price map and upper outlier bound.
+
+Run from the ml directory:  python benchmark_incremental.py [deltas] [trees per update]   (default: 4 10)
+"""
+import copy
+import logging
+import sys
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from sklearn.metrics import r2_score, mean_absolute_error
+
+from config import DATA_PATH
+from incremental import initial_state, add_trees
+from train import (
+    NUMERIC_FEATURES, CATEGORICAL_FEATURES, OUTLIER_QUANTILES, OUTLIER_IQR_FACTOR,
+    build_pipeline, add_listing_features, apply_city_price_map, feature_engineering_pipeline,
+)
+
+BASE_FRACTION = 0.6
+FEATURES = NUMERIC_FEATURES + CATEGORICAL_FEATURES
+
+def full_train(raw: pd.DataFrame) -> tuple:
+    """Returns (pipeline, city price map) trained from scratch at train.py's fixed grid point."""
+    df, city_price_map = feature_engineering_pipeline(raw)
+    df = df.dropna(subset=['price_km'])
+    pipeline, param_grid, _ = build_pipeline('gbr', NUMERIC_FEATURES, CATEGORICAL_FEATURES)
+    pipeline.set_params(**{name: values[0] for name, values in param_grid.items()})
+    pipeline.fit(df[FEATURES], np.log1p(df['price_km']))
+    return pipeline, city_price_map
+
+def exact_bounds(raw: pd.DataFrame) -> tuple:
+    price_per_m2 = raw['price_km'] / raw['size_m2']
+    q1, q3 = price_per_m2.quantile(OUTLIER_QUANTILES[0]), price_per_m2.quantile(OUTLIER_QUANTILES[1])
+    return q1 - OUTLIER_IQR_FACTOR * (q3 - q1), q3 + OUTLIER_IQR_FACTOR * (q3 - q1)
+
+def evaluate(pipeline, city_price_map: dict, test_features: pd.DataFrame) -> tuple:
+    X = apply_city_price_map(test_features, city_price_map)[FEATURES]
+    predicted = np.expm1(pipeline.predict(X))
+    actual = test_features['price_km']
+    return r2_score(actual, predicted), mean_absolute_error(actual, predicted)
+
+def map_drift(sketched: dict, exact: dict) -> tuple:
+    """Mean and max relative difference over the cities in both maps."""
+    common = sorted(set(sketched) & set(exact))
+    differences = np.array([abs(sketched[city] - exact[city]) / exact[city] for city in common])
+    return differences.mean(), differences.max()
+
+def main():
+    n_deltas = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    n_trees = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    logging.disable(logging.INFO)
+    warnings.simplefilter("ignore")
+
+    raw = pd.read_csv(DATA_PATH).dropna(subset=['price_km'])
+    test = raw.sample(frac=0.2, random_state=42)
+    pool = raw.drop(test.index).sort_values('id')
+    # Like train.py's test split, the test listings are cleaned with the bounds of the whole dataset.
+    test_features = add_listing_features(test)
+    lower, upper = exact_bounds(raw)
+    test_price_per_m2 = test_features['price_km'] / test_features['size_m2']
+    test_features = test_features[(test_price_per_m2 >= lower) & (test_price_per_m2 <= upper)]
+
+    base_rows = int(len(pool) * BASE_FRACTION)
+    base = pool.iloc[:base_rows]
+    deltas = np.array_split(pool.iloc[base_rows:], n_deltas)
+
+    model, _ = full_train(base)
+    state = initial_state(base, copy.deepcopy(model))
+    seen = base
+
+    print(f"base {len(base)} listings, {n_deltas} deltas, {n_trees} trees per update, {len(test_features)} test listings\n")
+    print(f"{'seen':>6} {'delta':>6} {'update s':>9} {'retrain s':>10} {'R² inc':>7} {'R² full':>8} "
+          f"{'MAE inc':>9} {'MAE full':>9} {'map drift mean/max':>19} {'bound drift':>12}")
+    for delta_raw in deltas:
+        seen = pd.concat([seen, delta_raw])
+
+        started = time.perf_counter()
+        delta, city_price_map = state.fold_in(state.new_listings(delta_raw))
+        add_trees(state.model, delta[FEATURES], np.log1p(delta['price_km']), n_trees)
+        update_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        full_model, full_city_price_map = full_train(seen)
+        retrain_s = time.perf_counter() - started
+
+        r2_inc, mae_inc = evaluate(state.model, city_price_map, test_features)
+        r2_full, mae_full = evaluate(full_model, full_city_price_map, test_features)
+        drift_mean, drift_max = map_drift(city_price_map, full_city_price_map)
+        exact_bound = exact_bounds(seen)[1]
+        bound_drift = abs(state.outlier_bounds()[1] - exact_bound) / exact_bound
+
+        print(f"{len(seen):>6} {len(delta_raw):>6} {update_s:>9.2f} {retrain_s:>10.2f} {r2_inc:>7.4f} {r2_full:>8.4f} "
+              f"{mae_inc:>9,.0f} {mae_full:>9,.0f} {drift_mean:>10.2%}/{drift_max:<8.2%} {bound_drift:>12.2%}")
+
+if __name__ == "__main__":
+    main()
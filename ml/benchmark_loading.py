@@ -0,0 +1,107 @@
+"""
+Measures the load time and peak memory of reading the listings for training, before and after
+the typed loader (dataset.py), on the published CSV and on copies of it stacked 10x and 100x:
+
+- default:           pd.read_csv of every column with inferred dtypes (what train.py did)
+- typed csv:         the training columns streamed from the CSV into the schema, with the
+                     description replaced by its length and keyword flags batch by batch
+- typed copy, first: the same through the cache: the CSV is streamed into the typed Parquet
+                     copy, which is then read
+- typed copy:        the training columns read from the typed Parquet copy (every later load)
+
+Each load runs in a fresh interpreter; peak is its maximum resident set size (VmHWM, as
+getrusage's maximum carries over from the parent through exec), which includes the imports
+(the line "after imports" shows how much), frame the deep memory usage of the result. The
+typed modes' time includes deriving the description features, which the default read leaves
+to add_listing_features. Every stacked copy gets its own urls, titles and descriptions: pandas' parser shares
+repeated strings within a chunk, so verbatim copies would flatter the default read.
+The typed frames are checked against the default read, converted back.
+
+Run from the ml directory:  python benchmark_loading.py [factor ...]   (default: 1 10 100)
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import pandas as pd
+
+from config import DATA_PATH
+
+PROBE = r"""
+import json, sys, time
+import pandas as pd
+from dataset import load_listings
+from train import RAW_COLUMNS, DESCRIPTION_DERIVED
+
+def peak_kb():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+
+mode, path, cache_dir = sys.argv[1:4]
+started = time.perf_counter()
+if mode == "imports":
+    df = pd.DataFrame()
+elif mode == "default":
+    df = pd.read_csv(path)
+else:
+    df = load_listings(path, RAW_COLUMNS, cache_dir if mode.startswith("typed copy") else None, DESCRIPTION_DERIVED)
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "peak_mb": peak_kb() / 1024, "frame_mb": df.memory_usage(deep=True).sum() / 2**20}))
+"""
+
+MODES = ("default", "typed csv", "typed copy, first", "typed copy")
+
+def run_probe(mode: str, path: str, cache_dir: str) -> dict:
+    result = subprocess.run([sys.executable, "-c", PROBE, mode, path, cache_dir], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def stacked(raw: pd.DataFrame, factor: int) -> pd.DataFrame:
+    copies = []
+    for copy in range(factor):
+        df = raw.copy()
+        for column in ('url', 'title', 'description'):
+            df[column] = df[column] + f" #{copy}"
+        copies.append(df)
+    return pd.concat(copies, ignore_index=True)
+
+def check_equal(path: str, cache_dir: str) -> bool:
+    """The typed columns hold the values of the default read, and the derived ones match its descriptions."""
+    from dataset import load_listings
+    from train import RAW_COLUMNS, DESCRIPTION_DERIVED, raw_description_features
+    default = pd.read_csv(path, usecols=RAW_COLUMNS)
+    expected = pd.concat([default.drop(columns='description'), raw_description_features(default['description'])], axis=1)
+    typed = load_listings(path, RAW_COLUMNS, cache_dir, DESCRIPTION_DERIVED)
+    if sorted(typed.columns) != sorted(expected.columns):
+        return False
+    for column in expected:
+        converted = typed[column].astype(object).where(typed[column].notna(), None)
+        original = expected[column].astype(object).where(expected[column].notna(), None)
+        if not converted.equals(original):
+            return False
+    return True
+
+def main():
+    factors = [int(factor) for factor in sys.argv[1:]] or [1, 10, 100]
+    workdir = tempfile.mkdtemp(prefix='loading-')
+    raw = pd.read_csv(DATA_PATH)
+    try:
+        print(f"after imports: {run_probe('imports', DATA_PATH, workdir)['peak_mb']:.0f} MB\n")
+        print(f"{'rows':>9} {'CSV MB':>7}  {'mode':<18} {'load s':>7} {'peak MB':>8} {'frame MB':>9}")
+        for factor in factors:
+            path = os.path.join(workdir, f"listings-x{factor}.csv")
+            stacked(raw, factor).to_csv(path, index=False)
+            cache_dir = os.path.join(workdir, f"cache-x{factor}")
+            for mode in MODES:
+                result = run_probe(mode, path, cache_dir)
+                print(f"{factor * len(raw):>9} {os.path.getsize(path) / 2**20:>7.0f}  {mode:<18} {result['seconds']:>7.2f} "
+                      f"{result['peak_mb']:>8.0f} {result['frame_mb']:>9.1f}")
+            print(f"{'':>18}  typed frame equal to the default read: {'yes' if check_equal(path, cache_dir) else 'NO'}")
+            os.remove(path)
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import logging
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+import joblib
+
+from config import DATA_PATH, COMPARABLES_OUTPUT_PATH
+
+INDEX_FORMAT_VERSION = 1
+
+# Distances are measured on these after standardising, so one standard deviation counts the same on each.
+COMPARABLE_FEATURES = ['size_m2', 'rooms', 'floor', 'property_age']
+LISTING_COLUMNS = ['id', 'url', 'title', 'location', 'price_km', 'size_m2', 'rooms', 'floor', 'year_built', 'condition']
+
+def build_comparables_index(df: pd.DataFrame) -> dict:
+    """
+    Builds one KD-tree per city over the standardised comparable features of the training
+    listings (the output of feature_engineering_pipeline). Missing values are imputed with
+    the median, which the API also uses for requests.
+    """
+    values = df[COMPARABLE_FEATURES].apply(pd.to_numeric, errors='coerce').astype(float)
+    medians = values.median()
+    values = values.fillna(medians)
+    mean = values.mean().to_numpy(dtype=float)
+    scale = values.std(ddof=0).replace(0, 1).to_numpy(dtype=float)
+    scaled = (values.to_numpy(dtype=float) - mean) / scale
+
+    listings = {}
+    for column in LISTING_COLUMNS:
+        series = df[column] if column in df else pd.Series([None] * len(df), index=df.index)
+        listings[column] = np.array([None if pd.isna(value) else value for value in series], dtype=object)
+
+    cities = {}
+    for city, positions in df.reset_index(drop=True).groupby('city').indices.items():
+        cities[city] = {"tree": KDTree(scaled[positions], leaf_size=16), "rows": positions}
+    logging.info(f"Built comparables index over {len(df)} listings in {len(cities)} city partitions.")
+
+    return {
+        "format_version": INDEX_FORMAT_VERSION,
+        "features": COMPARABLE_FEATURES,
+        "medians": medians.to_numpy(dtype=float),
+        "mean": mean,
+        "scale": scale,
+        "listings": listings,
+        "cities": cities,
+    }
+
+def save_comparables_index(index: dict, path: str = COMPARABLES_OUTPUT_PATH):
+    try:
+        joblib.dump(index, path)
+        logging.info(f"Successfully saved the comparables index to {path}")
+    except Exception as e:
+        logging.error(f"Failed to save the comparables index to {path}. Error: {e}")
+
+def main():
+    """Rebuilds only the comparables index from the dataset, without retraining the model."""
+    from train import RAW_COLUMNS, DESCRIPTION_DERIVED, feature_engineering_pipeline
+    from config import DATASET_CACHE_DIR
+    from dataset import load_listings
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    df, _ = feature_engineering_pipeline(load_listings(DATA_PATH, RAW_COLUMNS, DATASET_CACHE_DIR, DESCRIPTION_DERIVED))
+    df = df.dropna(subset=['price_km'])
+    save_comparables_index(build_comparables_index(df))
+
+if __name__ == "__main__":
+    main()
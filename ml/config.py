@@ -4,4 +4,13 @@ import os
 PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
 DATA_PATH = os.path.join(PROJECT_ROOT, 'bosnia_herzegovina_real_estate_listings_2025.csv')
 LOG_FILE_PATH = os.path.join(os.path.dirname(__file__), 'ml.log')
-MODEL_OUTPUT_PATH = os.path.join(os.path.dirname(__file__), 'model.joblib')
\ No newline at end of file
+MODEL_OUTPUT_PATH = os.path.join(os.path.dirname(__file__), 'model.joblib')
+CITY_MAP_OUTPUT_PATH = os.path.join(os.path.dirname(__file__), 'city_price_map.json')
+COMPARABLES_OUTPUT_PATH = os.path.join(os.path.dirname(__file__), 'comparables.joblib')
+FEATURE_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache', 'features')
+PREDICTIONS_OUTPUT_PATH = os.path.join(os.path.dirname(__file__), 'predictions.parquet')
+SEARCH_LEADERBOARD_PATH = os.path.join(os.path.dirname(__file__), 'search_leaderboard.csv')
+INCREMENTAL_STATE_PATH = os.path.join(os.path.dirname(__file__), 'incremental_state.joblib')
+REGISTRY_DIR = os.path.join(os.path.dirname(__file__), 'registry')
+DATASET_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache', 'datasets')
+PROFILE_REPORT_PATH = os.path.join(os.path.dirname(__file__), 'profile_report.json')
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+Loads the listings dataset with an explicit schema, reading only the requested columns.
+
+Low-cardinality strings become categoricals, free text stays in Arrow string buffers rather
+than Python objects, the amenity flags are booleans, floor and bathrooms small nullable ints,
+and rooms and the balcony size float32 (exact for their values). Price and size stay float64:
+they are divided into price_per_m2 and shown in the comparables, so rounding them would show.
+
+Files are read as a stream of Arrow record batches. A CSV is parsed once into a typed Parquet
+copy in a cache directory; loads read just the projected columns from that copy. A column that
+is only needed for what is derived from it (the description, for its length and keyword flags)
+can be replaced batch by batch, so it is never held whole. The module imports no config, so
+the etl scripts can share it.
+"""
+import glob
+import hashlib
+import logging
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+ARROW_STRING = pd.StringDtype('pyarrow')
+
+BOOLEAN_COLUMNS = [
+    'has_balcony', 'has_garage', 'has_parking', 'has_elevator', 'has_storage', 'has_basement_attic',
+    'is_registered', 'has_armored_door', 'has_video_surveillance', 'has_alarm', 'has_internet',
+    'has_cable_tv', 'has_phone_line', 'has_ac', 'has_gas', 'has_water', 'has_electricity',
+    'has_sewage', 'pets_allowed', 'is_for_students', 'utility_costs_included',
+]
+
+LISTINGS_SCHEMA = {
+    'id': 'int64',
+    'url': ARROW_STRING,
+    'title': ARROW_STRING,
+    'address': ARROW_STRING,
+    'agent_license': ARROW_STRING,
+    'agency_contract_num': ARROW_STRING,
+    'description': ARROW_STRING,
+    'location': 'category',
+    'year_built': 'category',
+    'condition': 'category',
+    'property_type': 'category',
+    'furnished': 'category',
+    'heating_type': 'category',
+    'floor_type': 'category',
+    'orientation': 'category',
+    'listing_type': 'category',
+    'price_km': 'float64',
+    'size_m2': 'float64',
+    'rooms': 'float32',
+    'balcony_size_m2': 'float32',
+    'floor': 'Int8',
+    'bathrooms': 'Int8',
+    **{column: 'boolean' for column in BOOLEAN_COLUMNS},
+}
+
+# Arrow types of the schema's pandas dtypes, and back (dictionaries convert to categoricals by themselves).
+ARROW_TYPES = {'category': pa.dictionary(pa.int32(), pa.string()), 'boolean': pa.bool_(), 'Int8': pa.int8()}
+PANDAS_TYPES = {pa.string(): ARROW_STRING, pa.large_string(): ARROW_STRING, pa.bool_(): pd.BooleanDtype(), pa.int8(): pd.Int8Dtype()}
+
+# The CSV reader parses a number of blocks ahead, so its memory follows the block size.
+CSV_BLOCK_SIZE = 1 << 20
+# The typed copy is written in row groups of ROW_GROUP_ROWS and read back in smaller batches.
+ROW_GROUP_ROWS = 16384
+PARQUET_BATCH_ROWS = 1024
+
+def arrow_type(dtype) -> pa.DataType:
+    if dtype == ARROW_STRING:
+        return pa.string()
+    return ARROW_TYPES.get(dtype) or pa.from_numpy_dtype(np.dtype(dtype))
+
+def schema_digest() -> str:
+    return hashlib.sha256(repr(sorted((column, str(dtype)) for column, dtype in LISTINGS_SCHEMA.items())).encode()).hexdigest()
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Casts the schema's columns that the frame has. A column stored in an incompatible form
+    (e.g. rooms as text in the etl's processed Parquet, before prepare_for_publish) is kept as is.
+    """
+    for column, dtype in LISTINGS_SCHEMA.items():
+        if column in df and df[column].dtype != dtype:
+            try:
+                df[column] = df[column].astype(dtype)
+            except (TypeError, ValueError):
+                logging.info(f"Kept column '{column}' as {df[column].dtype}; it does not convert to {dtype}.")
+    return df
+
+def csv_batches(path: str, columns: list = None):
+    """
+    Streams the CSV as record batches typed by the schema. Descriptions span lines, which
+    pandas' pyarrow engine cannot be told about. The small ints are published as floats
+    ("2.0"), so they are parsed as such and cast.
+    """
+    column_types = {
+        column: pa.float64() if dtype == 'Int8' else arrow_type(dtype) for column, dtype in LISTINGS_SCHEMA.items()
+    }
+    reader = pv.open_csv(
+        path,
+        read_options=pv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+        parse_options=pv.ParseOptions(newlines_in_values=True),
+        convert_options=pv.ConvertOptions(include_columns=columns or [], column_types=column_types, strings_can_be_null=True),
+    )
+    for batch in reader:
+        yield pa.RecordBatch.from_arrays(
+            [array.cast(arrow_type(LISTINGS_SCHEMA[name])) if name in LISTINGS_SCHEMA else array
+             for name, array in zip(batch.schema.names, batch.columns)],
+            names=batch.schema.names,
+        )
+
+def parquet_batches(path: str, columns: list = None):
+    yield from pq.ParquetFile(path).iter_batches(batch_size=PARQUET_BATCH_ROWS, columns=columns)
+
+def to_frame(batches, derive: dict = None) -> pd.DataFrame:
+    """
+    Collects record batches into a frame. derive maps a column to a function of a batch of it
+    (a Series) returning a frame of derived columns, which take its place in every batch.
+    """
+    collected = []
+    for batch in batches:
+        for column, function in (derive or {}).items():
+            if column in batch.schema.names:
+                derived = function(batch.column(column).to_pandas(types_mapper=PANDAS_TYPES.get))
+                batch = batch.drop_columns([column])
+                for name, values in derived.items():
+                    batch = batch.append_column(name, pa.array(values.to_numpy()))
+        collected.append(batch)
+    if not collected:
+        return pd.DataFrame()
+    return pa.Table.from_batches(collected).to_pandas(types_mapper=PANDAS_TYPES.get)
+
+def typed_copy_path(path: str, cache_dir: str) -> str:
+    """The cache entry is keyed by the CSV's size, modification time and the schema, not by hashing its content."""
+    stat = os.stat(path)
+    key = hashlib.sha256(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}:{schema_digest()}".encode()).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{name}-{key}.parquet")
+
+def store_typed_copy(path: str, cached: str):
+    """
+    Streams the whole CSV into its typed copy. The copy is written under a temporary name and
+    renamed into place, so readers never see half of it; older copies of the same file are dropped.
+    """
+    cache_dir = os.path.dirname(cached)
+    os.makedirs(cache_dir, exist_ok=True)
+    descriptor, staging = tempfile.mkstemp(dir=cache_dir, prefix='.staging-', suffix='.parquet')
+    os.close(descriptor)
+    os.chmod(staging, 0o644)
+    writer, pending = None, []
+    try:
+        for batch in csv_batches(path):
+            writer = writer or pq.ParquetWriter(staging, batch.schema)
+            pending.append(batch)
+            if sum(batch.num_rows for batch in pending) >= ROW_GROUP_ROWS:
+                writer.write_table(pa.Table.from_batches(pending))
+                pending = []
+        if writer is None:
+            raise ValueError(f"{path} has no rows.")
+        if pending:
+            writer.write_table(pa.Table.from_batches(pending))
+        writer.close()
+        os.replace(staging, cached)
+    except Exception:
+        if writer is not None:
+            writer.close()
+        os.remove(staging)
+        raise
+    prefix = os.path.basename(cached).rsplit('-', 1)[0]
+    for stale in glob.glob(os.path.join(cache_dir, f"{prefix}-*.parquet")):
+        if stale != cached:
+            os.remove(stale)
+
+def load_listings(path: str, columns: list = None, cache_dir: str = None, derive: dict = None) -> pd.DataFrame:
+    """
+    Returns the listings in a CSV or Parquet file typed by LISTINGS_SCHEMA, with only the given
+    columns (all of them by default) and derive's columns in place of the ones they are derived
+    from (see to_frame). With a cache_dir, a CSV is read through its typed Parquet copy, which
+    the first load writes.
+    """
+    if path.endswith('.parquet'):
+        return apply_schema(to_frame(parquet_batches(path, columns), derive))
+    if cache_dir is None:
+        return to_frame(csv_batches(path, columns), derive)
+
+    cached = typed_copy_path(path, cache_dir)
+    if not os.path.exists(cached):
+        try:
+            store_typed_copy(path, cached)
+            logging.info(f"Stored a typed Parquet copy of {path} at {cached}.")
+        except Exception as e:
+            logging.warning(f"Could not write the typed copy of {path}, reading the CSV. Error: {e}")
+            return to_frame(csv_batches(path, columns), derive)
+    return to_frame(parquet_batches(cached, columns), derive)
@@ -0,0 +1,100 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+import shutil
+import tempfile
+import pandas as pd
+import pyarrow as pa
+
+from config import FEATURE_CACHE_DIR, DATASET_CACHE_DIR
+import dataset
+import profiler
+import train
+
+# The entry key covers the source of everything that shapes the engineered frame, so editing
+# any of these functions invalidates the cache without a version number to remember.
+FEATURE_CODE = (
+    train.parse_year, train.map_distinct, train.contains_any, train.lowercase_descriptions,
+    train.description_features, train.raw_description_features, train.add_listing_features,
+    train.feature_engineering_pipeline, dataset.csv_batches, dataset.to_frame,
+)
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def feature_code_digest() -> str:
+    digest = hashlib.sha256(f"pandas {pd.__version__} pyarrow {pa.__version__}".encode())
+    digest.update(repr((train.RARE_CITY_MIN_LISTINGS, train.OUTLIER_QUANTILES, train.OUTLIER_IQR_FACTOR)).encode())
+    digest.update(f"{dataset.schema_digest()} {train.RAW_COLUMNS}".encode())
+    for function in FEATURE_CODE:
+        digest.update(inspect.getsource(function).encode())
+    return digest.hexdigest()
+
+def cache_key(data_path: str) -> str:
+    return hashlib.sha256(f"{file_digest(data_path)}:{feature_code_digest()}".encode()).hexdigest()[:16]
+
+def load_engineered_features(data_path: str, refresh: bool = False, cache_dir: str = FEATURE_CACHE_DIR) -> tuple:
+    """
+    Returns (engineered frame, city price map) for a data file, from the cache entry for its
+    content and the current feature code when there is one. Otherwise runs
+    feature_engineering_pipeline and stores the result as features.parquet and city_price_map.json.
+    refresh=True ignores and replaces an existing entry.
+    """
+    key = cache_key(data_path)
+    entry = os.path.join(cache_dir, key)
+
+    if not refresh and os.path.exists(os.path.join(entry, 'meta.json')):
+        try:
+            df = pd.read_parquet(os.path.join(entry, 'features.parquet'))
+            with open(os.path.join(entry, 'city_price_map.json')) as f:
+                city_price_map = json.load(f)
+            logging.info(f"Feature cache hit ({key}): loaded {len(df)} engineered rows.")
+            return df, city_price_map
+        except Exception as e:
+            logging.warning(f"Feature cache entry {key} is unreadable, rebuilding it. Error: {e}")
+
+    logging.info(f"Feature cache {'refresh' if refresh else 'miss'} ({key}): running feature engineering.")
+    with profiler.stage('load_listings'):
+        df = dataset.load_listings(data_path, train.RAW_COLUMNS, DATASET_CACHE_DIR, train.DESCRIPTION_DERIVED)
+    with profiler.stage('feature_engineering'):
+        df, city_price_map = train.feature_engineering_pipeline(df)
+    try:
+        _store(entry, df, city_price_map, {"key": key, "data_path": os.path.abspath(data_path), "rows": len(df)})
+        logging.info(f"Stored feature cache entry {key}.")
+    except Exception as e:
+        logging.warning(f"Could not write feature cache entry {key}. Error: {e}")
+    return df, city_price_map
+
+def _store(entry: str, df: pd.DataFrame, city_price_map: dict, meta: dict):
+    """Writes the entry into a staging directory and renames it into place, so readers never see half an entry."""
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+    staging = tempfile.mkdtemp(dir=os.path.dirname(entry), prefix='.staging-')
+    try:
+        df.to_parquet(os.path.join(staging, 'features.parquet'))
+        with open(os.path.join(staging, 'city_price_map.json'), 'w') as f:
+            json.dump(city_price_map, f)
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.rename(staging, entry)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+def clear(cache_dir: str = FEATURE_CACHE_DIR):
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    logging.info(f"Cleared the feature cache in {cache_dir}.")
+
+if __name__ == "__main__":
+    import sys
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if sys.argv[1:] == ['clear']:
+        clear()
+    else:
+        print("Usage: python feature_cache.py clear")
@@ -0,0 +1,189 @@
+import logging
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.metrics import r2_score
+import joblib
+
+from config import DATA_PATH, MODEL_OUTPUT_PATH, INCREMENTAL_STATE_PATH, DATASET_CACHE_DIR
+from dataset import load_listings
+from train import (
+    NUMERIC_FEATURES, CATEGORICAL_FEATURES, RAW_COLUMNS, DESCRIPTION_DERIVED,
+    RARE_CITY_MIN_LISTINGS, OUTLIER_QUANTILES, OUTLIER_IQR_FACTOR, add_listing_features, save_city_price_map,
+)
+from registry import save_bundle
+
+STATE_FORMAT_VERSION = 1
+
+# Smaller crawls are left unseen until enough new listings have accumulated to fit trees on.
+MIN_DELTA_ROWS = 20
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (the DDSketch layout) for positive values: a value is counted in
+    the bucket (gamma^(k-1), gamma^k], so every quantile is known within relative_accuracy
+    however many values were added. Bucket counts simply add up, which makes the sketch
+    streamable batch by batch and mergeable across cities. Missing and non-positive values are skipped.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.005):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.counts = {}
+        self.count = 0
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values) & (values > 0)]
+        keys, counts = np.unique(np.ceil(np.log(values) / np.log(self.gamma)).astype(int), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.count += len(values)
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.count += other.count
+        return self
+
+    def quantile(self, q: float, lower: float = -np.inf, upper: float = np.inf) -> float:
+        """The q-quantile of the values between lower and upper, or NaN if there are none."""
+        keys = np.array(sorted(self.counts))
+        if not len(keys):
+            return np.nan
+        values = 2 * self.gamma ** keys / (self.gamma + 1)
+        counts = np.array([self.counts[key] for key in keys])
+        in_range = (values >= lower) & (values <= upper)
+        values, counts = values[in_range], counts[in_range]
+        if not len(values):
+            return np.nan
+        # Linear interpolation between the neighbouring ranks, like pandas' quantile and median.
+        cumulative = np.cumsum(counts)
+        rank = q * (cumulative[-1] - 1)
+        below, above = np.searchsorted(cumulative, [np.floor(rank), np.ceil(rank)], side='right')
+        return float(values[below] + (rank - np.floor(rank)) * (values[above] - values[below]))
+
+class IncrementalState:
+    """
+    What incremental training keeps between crawls: the ids already folded in, listing counts and a
+    price-per-m² sketch per raw city (for the rare-city rule, the outlier bounds and the city price
+    map), and the fitted gbr pipeline that new trees are added to.
+    """
+
+    def __init__(self, model, relative_accuracy: float = 0.005):
+        self.format_version = STATE_FORMAT_VERSION
+        self.model = model
+        self.relative_accuracy = relative_accuracy
+        self.seen_ids = set()
+        self.city_counts = {}
+        self.city_sketches = {}
+        self.updates = []
+
+    def new_listings(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df[~df['id'].isin(self.seen_ids)].drop_duplicates(subset=['id'])
+
+    def outlier_bounds(self) -> tuple:
+        merged = QuantileSketch(self.relative_accuracy)
+        for sketch in self.city_sketches.values():
+            merged.merge(sketch)
+        q1, q3 = merged.quantile(OUTLIER_QUANTILES[0]), merged.quantile(OUTLIER_QUANTILES[1])
+        iqr = q3 - q1
+        return q1 - OUTLIER_IQR_FACTOR * iqr, q3 + OUTLIER_IQR_FACTOR * iqr
+
+    def rare_cities(self) -> set:
+        return {city for city, count in self.city_counts.items() if count < RARE_CITY_MIN_LISTINGS}
+
+    def city_price_map(self) -> dict:
+        """Median price per m² within the outlier bounds per city, with the rare cities pooled as 'Other'."""
+        lower, upper = self.outlier_bounds()
+        rare = self.rare_cities()
+        pooled = {}
+        for city, sketch in self.city_sketches.items():
+            name = 'Other' if city in rare else city
+            pooled.setdefault(name, QuantileSketch(self.relative_accuracy)).merge(sketch)
+        city_price_map = {city: sketch.quantile(0.5, lower, upper) for city, sketch in pooled.items()}
+        return {city: median for city, median in city_price_map.items() if not np.isnan(median)}
+
+    def fold_in(self, new_listings: pd.DataFrame) -> tuple:
+        """
+        Adds new raw listings to the statistics and returns (their model-ready rows, the updated
+        city price map), filtered and encoded the way feature_engineering_pipeline would.
+        """
+        df = add_listing_features(new_listings)
+        df['price_per_m2'] = df['price_km'] / df['size_m2']
+
+        self.seen_ids.update(df['id'].tolist())
+        for city, count in df['city'].value_counts().items():
+            self.city_counts[city] = self.city_counts.get(city, 0) + int(count)
+        for city, values in df.groupby('city')['price_per_m2']:
+            self.city_sketches.setdefault(city, QuantileSketch(self.relative_accuracy)).add(values)
+
+        lower, upper = self.outlier_bounds()
+        city_price_map = self.city_price_map()
+        df['city'] = df['city'].replace(list(self.rare_cities()), 'Other')
+        delta = df[(df['price_per_m2'] >= lower) & (df['price_per_m2'] <= upper)].copy()
+        delta['city_median_price_per_m2'] = delta['city'].map(city_price_map)
+        return delta.dropna(subset=['price_km']), city_price_map
+
+def add_trees(pipeline, X: pd.DataFrame, y_log: pd.Series, n_trees: int):
+    """
+    Warm-starts the pipeline's GradientBoostingRegressor with n_trees more trees fitted to its
+    residuals on X. The preprocessing fitted in the full training run stays as it is, so new
+    cities are one-hot encoded as unknown until the next full retrain.
+    """
+    regressor = pipeline.named_steps['regressor']
+    if not isinstance(regressor, GradientBoostingRegressor):
+        raise ValueError("Incremental training needs a model trained with the gbr backend.")
+    X_transformed = pipeline.named_steps['preprocessor'].transform(X)
+    regressor.set_params(warm_start=True, n_estimators=regressor.n_estimators_ + n_trees)
+    regressor.fit(X_transformed, y_log)
+    regressor.set_params(warm_start=False)
+
+def initial_state(df: pd.DataFrame, model) -> IncrementalState:
+    """The state after a full training run on the raw listings df."""
+    state = IncrementalState(model)
+    state.fold_in(df)
+    state.updates.append({"rows": len(df), "trees": model.named_steps['regressor'].n_estimators_, "full": True})
+    return state
+
+def save_state(state: IncrementalState, path: str = INCREMENTAL_STATE_PATH):
+    try:
+        joblib.dump(state, path)
+        logging.info(f"Successfully saved the incremental training state to {path}")
+    except Exception as e:
+        logging.error(f"Failed to save the incremental training state to {path}. Error: {e}")
+
+def load_state(path: str = INCREMENTAL_STATE_PATH) -> IncrementalState:
+    state = joblib.load(path)
+    if getattr(state, 'format_version', None) != STATE_FORMAT_VERSION:
+        raise ValueError(f"{path} has an unsupported format; delete it to start over from a full training run.")
+    return state
+
+def update_incrementally(n_trees: int, data_path: str = DATA_PATH, state_path: str = INCREMENTAL_STATE_PATH):
+    """Folds the listings in data_path that the state has not seen into the statistics and the model."""
+    state = load_state(state_path)
+    new_listings = state.new_listings(load_listings(data_path, RAW_COLUMNS, DATASET_CACHE_DIR, DESCRIPTION_DERIVED))
+    if len(new_listings) < MIN_DELTA_ROWS:
+        logging.info(f"{len(new_listings)} new listings; waiting for at least {MIN_DELTA_ROWS} before updating.")
+        return
+
+    delta, city_price_map = state.fold_in(new_listings)
+    logging.info(f"Folded in {len(new_listings)} new listings; {len(delta)} remain after the outlier filter.")
+    X = delta[NUMERIC_FEATURES + CATEGORICAL_FEATURES]
+    y_log = np.log1p(delta['price_km'])
+
+    # The new listings are unseen by the current model, so this is an honest forward test of it.
+    forward_r2 = r2_score(np.expm1(y_log), np.expm1(state.model.predict(X)))
+    logging.info(f"R² of the current model on the new listings, before the update: {forward_r2:.4f}")
+
+    add_trees(state.model, X, y_log, n_trees)
+    trees = state.model.named_steps['regressor'].n_estimators_
+    state.updates.append({"rows": len(delta), "trees": trees, "full": False, "forward_r2": forward_r2})
+    logging.info(f"Added {n_trees} trees on the new listings; the model now has {trees}.")
+
+    save_city_price_map(city_price_map)
+    joblib.dump(state.model, MODEL_OUTPUT_PATH)
+    logging.info(f"Successfully saved the pipeline to {MODEL_OUTPUT_PATH}")
+    save_state(state, state_path)
+    save_bundle(state.model, city_price_map, data_path, {"forward_r2": forward_r2})
+    logging.info("The comparables index is not updated incrementally; run python comparables.py to rebuild it.")
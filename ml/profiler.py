@@ -0,0 +1,249 @@
+"""
+Opt-in profiling of a training run (train.py --profile): wall time, CPU time and peak resident
+set size for each named stage and for each CV fold, written as a JSON report.
+
+Stages nest ("feature_engineering/outlier_filter"); stage() is a no-op unless a profiler was
+started, so the pipeline code can name its stages unconditionally. The grid search folds run
+through GridSearchCV as usual, in its worker processes: the pipeline is wrapped so that each
+fold measures its preprocessing fit, regressor fit and predict, and a scorer hands the
+measurements back next to the R².
+
+Peak RSS is per stage where the kernel allows resetting the high-water mark
+(/proc/self/clear_refs, Linux); elsewhere it is the process' peak so far.
+
+    python profiler.py compare BASE.json NEW.json [--threshold 0.25]
+
+lists the stages of two reports side by side and exits with status 1 if any got slower or
+bigger by more than the threshold.
+"""
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.metrics import r2_score
+from sklearn.model_selection import GridSearchCV
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+REPORT_FORMAT_VERSION = 1
+USAGE_KEYS = ('wall_s', 'cpu_s', 'peak_rss_mb')
+FOLD_STEPS = ('preprocessing', 'regressor', 'predict')
+
+# Running peak (kB) of each measurement in progress in this process, outermost first.
+_open_peaks = []
+
+def _status_kb(field: str):
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def _peak_kb() -> int:
+    peak = _status_kb('VmHWM:')
+    if peak is None and resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            peak //= 1024
+    return peak or 0
+
+def _reset_peak() -> bool:
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss_scope() -> str:
+    return 'stage' if os.path.exists('/proc/self/clear_refs') and _status_kb('VmHWM:') is not None else 'process'
+
+@contextmanager
+def measure():
+    """
+    Yields a dict that is filled with the block's wall time, CPU time of this process (all its
+    threads) and peak RSS when the block exits. Before the peak is reset for the block, the
+    peak so far is folded into the enclosing measurements, and the block's peak is passed back
+    to them afterwards.
+    """
+    usage = {}
+    current = _peak_kb()
+    _open_peaks[:] = [max(peak, current) for peak in _open_peaks]
+    _open_peaks.append(0 if _reset_peak() else current)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield usage
+    finally:
+        peak = max(_open_peaks.pop(), _peak_kb())
+        _open_peaks[:] = [max(outer, peak) for outer in _open_peaks]
+        usage.update(wall_s=time.perf_counter() - wall, cpu_s=time.process_time() - cpu, peak_rss_mb=peak / 1024)
+
+class TrainingProfiler:
+    """Collects the stage and fold measurements of one run and writes the report."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stages = []
+        self.folds = []
+        self.refit = None
+        self._names = []
+        self._started = (datetime.now(timezone.utc), time.perf_counter(), time.process_time())
+
+    @contextmanager
+    def stage(self, name: str):
+        self._names.append(name)
+        record = {"stage": "/".join(self._names)}
+        # Appended on entry, so a stage is listed before the stages inside it.
+        self.stages.append(record)
+        try:
+            with measure() as usage:
+                yield record
+        finally:
+            self._names.pop()
+            record.update(usage)
+
+    def report(self, run: dict) -> dict:
+        started_at, wall, cpu = self._started
+        peaks = [record['peak_rss_mb'] for record in self.stages if 'peak_rss_mb' in record]
+        return {
+            "format_version": REPORT_FORMAT_VERSION,
+            "started_at": started_at.isoformat(),
+            "run": run,
+            "host": {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()},
+            "peak_rss_scope": peak_rss_scope(),
+            "total": {
+                "wall_s": time.perf_counter() - wall,
+                "cpu_s": time.process_time() - cpu,
+                "peak_rss_mb": max(peaks + [_peak_kb() / 1024]),
+            },
+            "stages": self.stages,
+            "folds": self.folds,
+            "refit": self.refit,
+        }
+
+    def save(self, run: dict):
+        try:
+            with open(self.path, 'w') as f:
+                json.dump(self.report(run), f, indent=2)
+            logging.info(f"Successfully saved the profile report to {self.path}")
+        except Exception as e:
+            logging.error(f"Failed to save the profile report to {self.path}. Error: {e}")
+
+_active = None
+
+def start(path: str) -> TrainingProfiler:
+    global _active
+    _active = TrainingProfiler(path)
+    return _active
+
+def active():
+    return _active
+
+def stage(name: str):
+    """The active profiler's stage, or a no-op when profiling is off."""
+    return _active.stage(name) if _active is not None else nullcontext({})
+
+class FitProfiled(BaseEstimator, RegressorMixin):
+    """
+    A pipeline for the CV search that fits its preprocessing and its regressor as two measured
+    steps (what Pipeline.fit does in one) and keeps the measurements in fit_usage_.
+    """
+
+    def __init__(self, pipeline=None):
+        self.pipeline = pipeline
+
+    def fit(self, X, y):
+        with measure() as preprocessing:
+            Xt = self.pipeline[:-1].fit_transform(X, y)
+        with measure() as regressor:
+            self.pipeline[-1].fit(Xt, y)
+        self.fit_usage_ = {'preprocessing': preprocessing, 'regressor': regressor}
+        return self
+
+    def predict(self, X):
+        return self.pipeline.predict(X)
+
+def fold_scorer(estimator: FitProfiled, X, y) -> dict:
+    """R² of a fold plus the usage of its fit and of this predict, flattened for cv_results_."""
+    with measure() as predict:
+        r2 = r2_score(y, estimator.predict(X))
+    usage = {**estimator.fit_usage_, 'predict': predict}
+    return {'r2': r2, **{f"{step}_{key}": usage[step][key] for step in FOLD_STEPS for key in USAGE_KEYS}}
+
+def profiled_grid_search(pipeline, param_grid: dict, cv: int, n_jobs) -> GridSearchCV:
+    """The GridSearchCV of train.py over a FitProfiled pipeline; best_score_ is still the mean R²."""
+    return GridSearchCV(
+        FitProfiled(pipeline), {f"pipeline__{name}": values for name, values in param_grid.items()},
+        cv=cv, scoring=fold_scorer, refit='r2', n_jobs=n_jobs
+    )
+
+def record_grid_search(profiler: TrainingProfiler, grid_search: GridSearchCV):
+    """Adds a fold record per (candidate, fold) from cv_results_, and the refit's usage."""
+    results = grid_search.cv_results_
+    for candidate, params in enumerate(results['params']):
+        for fold in range(grid_search.n_splits_):
+            record = {
+                "candidate": candidate,
+                "fold": fold,
+                "params": {name.removeprefix('pipeline__'): value for name, value in params.items()},
+                "r2": float(results[f'split{fold}_test_r2'][candidate]),
+            }
+            for step in FOLD_STEPS:
+                record[step] = {key: float(results[f'split{fold}_test_{step}_{key}'][candidate]) for key in USAGE_KEYS}
+            profiler.folds.append(record)
+    profiler.refit = grid_search.best_estimator_.fit_usage_
+
+def compare(base: dict, new: dict, threshold: float) -> list:
+    """
+    Prints the stages of two reports and returns the regressions: stages whose wall time, CPU
+    time or peak RSS grew by more than threshold (relative), ignoring changes under 50 ms / 5 MB.
+    """
+    floors = {'wall_s': 0.05, 'cpu_s': 0.05, 'peak_rss_mb': 5.0}
+    base_stages = {record['stage']: record for record in base['stages']}
+    rows = [(record['stage'], base_stages.get(record['stage']), record) for record in new['stages']]
+    rows.append(('total', base['total'], new['total']))
+
+    regressions = []
+    print(f"{'stage':<40} {'wall s':>15} {'cpu s':>15} {'peak MB':>15}")
+    for name, before, after in rows:
+        cells = []
+        for key in USAGE_KEYS:
+            if before is None or key not in before or key not in after:
+                cells.append(f"{'-':>15}")
+                continue
+            change = after[key] - before[key]
+            relative = change / before[key] if before[key] else 0.0
+            regressed = change > floors[key] and relative > threshold
+            if regressed:
+                regressions.append((name, key, before[key], after[key]))
+            cells.append(f"{before[key]:>6.2f}>{after[key]:<6.2f}{'!' if regressed else ' '}")
+        print(f"{name:<40} {' '.join(cells)}")
+    return regressions
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare two training profile reports.")
+    parser.add_argument('command', choices=['compare'])
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=0.25, help="Relative growth that counts as a regression.")
+    args = parser.parse_args()
+    with open(args.base) as f:
+        base_report = json.load(f)
+    with open(args.new) as f:
+        new_report = json.load(f)
+    found = compare(base_report, new_report, args.threshold)
+    for name, key, before, after in found:
+        print(f"regression: {name} {key} {before:.2f} -> {after:.2f}")
+    sys.exit(1 if found else 0)
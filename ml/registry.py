@@ -0,0 +1,155 @@
+"""
+Exports a trained gbr pipeline as a versioned registry bundle that the API can serve without
+sklearn or unpickling:
+
+    registry/<version>/manifest.json   format, features, preprocessing layout, city price map,
+                                       training-data hash, metrics, library versions, array digests
+    registry/<version>/*.npy           the trees as flat node arrays (tree_offsets delimits each tree)
+    registry/LATEST                    the version the API serves by default
+
+A bundle is written to a staging directory and renamed into place, and LATEST is replaced
+atomically afterwards, so a reader never sees a partial bundle.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+import numpy as np
+import sklearn
+
+from config import REGISTRY_DIR
+
+FORMAT_VERSION = 1
+TREE_ARRAYS = ('tree_offsets', 'children_left', 'children_right', 'feature', 'threshold', 'value')
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def tree_arrays(regressor) -> dict:
+    """Concatenates the node arrays of every tree; node indices stay local to their tree."""
+    trees = [estimator.tree_ for estimator in regressor.estimators_[:, 0]]
+    return {
+        'tree_offsets': np.concatenate([[0], np.cumsum([tree.node_count for tree in trees])]).astype(np.int64),
+        'children_left': np.concatenate([tree.children_left for tree in trees]).astype(np.int32),
+        'children_right': np.concatenate([tree.children_right for tree in trees]).astype(np.int32),
+        'feature': np.concatenate([tree.feature for tree in trees]).astype(np.int32),
+        'threshold': np.concatenate([tree.threshold for tree in trees]).astype(np.float64),
+        'value': np.concatenate([tree.value[:, 0, 0] for tree in trees]).astype(np.float64),
+    }
+
+def preprocessing_layout(preprocessor) -> dict:
+    """
+    The fitted ColumnTransformer as plain constants: the output column and imputer/scaler
+    statistics of each numeric feature, and the output column of each one-hot category.
+    This is the API's FeatureVectorizer.compile (api/app/vectorizer.py) with the same layout
+    checks; raises ValueError for a preprocessor the vectorizer could not serve.
+    """
+    transformers = {name: (transformer, columns) for name, transformer, columns in preprocessor.transformers_}
+    if set(transformers) - {'num', 'cat', 'remainder'}:
+        raise ValueError(f"Unsupported preprocessor transformers: {sorted(transformers)}")
+    if preprocessor.output_indices_['remainder'].stop != preprocessor.output_indices_['remainder'].start:
+        raise ValueError("Preprocessor passes through remainder columns.")
+
+    numeric_pipeline, numeric_features = transformers['num']
+    imputer = numeric_pipeline.named_steps['imputer']
+    scaler = numeric_pipeline.named_steps['scaler']
+    n_numeric = len(numeric_features)
+    means = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_numeric)
+    scales = scaler.scale_ if scaler.scale_ is not None else np.ones(n_numeric)
+    numeric_offset = preprocessor.output_indices_['num'].start
+
+    categorical_pipeline, categorical_features = transformers['cat']
+    onehot = categorical_pipeline.named_steps['onehot']
+    drop_idx = onehot.drop_idx_ if onehot.drop_idx_ is not None else [None] * len(categorical_features)
+    category_columns = {}
+    offset = preprocessor.output_indices_['cat'].start
+    for feature, categories, dropped in zip(categorical_features, onehot.categories_, drop_idx):
+        columns = {}
+        for i, category in enumerate(categories):
+            if dropped is not None and i == dropped:
+                continue
+            columns[str(category)] = int(offset + len(columns))
+        category_columns[feature] = columns
+        offset += len(columns)
+    if offset != preprocessor.output_indices_['cat'].stop:
+        raise ValueError("One-hot layout does not match the preprocessor output.")
+
+    return {
+        "n_features": int(max(indices.stop for indices in preprocessor.output_indices_.values())),
+        "numeric_index": {name: int(numeric_offset + i) for i, name in enumerate(numeric_features)},
+        "fill_values": dict(zip(numeric_features, imputer.statistics_.tolist())),
+        "means": dict(zip(numeric_features, means.tolist())),
+        "scales": dict(zip(numeric_features, scales.tolist())),
+        "category_columns": category_columns,
+    }
+
+def export_bundle(pipeline, city_price_map: dict, data_path: str, metrics: dict, registry_dir: str = REGISTRY_DIR) -> str:
+    """Writes the bundle for a fitted gbr pipeline, points LATEST at it and returns its version."""
+    regressor = pipeline.named_steps['regressor']
+    preprocessor = pipeline.named_steps['preprocessor']
+    transformers = {name: columns for name, _, columns in preprocessor.transformers_}
+    init_value = 0.0 if regressor.init_ == 'zero' else float(
+        np.asarray(regressor.init_.predict(np.zeros((1, regressor.n_features_in_)))).ravel()[0]
+    )
+    arrays = tree_arrays(regressor)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "model_type": type(regressor).__name__,
+        "target": "log1p(price_km)",
+        "features": {"numeric": list(transformers['num']), "categorical": list(transformers['cat'])},
+        "preprocessing": preprocessing_layout(preprocessor),
+        "trees": {
+            "n_trees": int(regressor.estimators_.shape[0]),
+            "max_depth": int(max(estimator.tree_.max_depth for estimator in regressor.estimators_[:, 0])),
+            "learning_rate": float(regressor.learning_rate),
+            "init_value": init_value,
+            "n_features": int(regressor.n_features_in_),
+        },
+        "city_price_map": city_price_map,
+        "training_data": {"file": os.path.basename(data_path), "sha256": file_digest(data_path)},
+        "metrics": {name: float(value) for name, value in metrics.items()},
+        "library_versions": {"scikit-learn": sklearn.__version__, "numpy": np.__version__},
+    }
+
+    content = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode())
+    for name in TREE_ARRAYS:
+        content.update(arrays[name].tobytes())
+    created_at = datetime.now(timezone.utc)
+    version = f"{created_at:%Y%m%dT%H%M%SZ}-{content.hexdigest()[:8]}"
+    manifest = {"version": version, "created_at": created_at.isoformat(), **manifest}
+
+    os.makedirs(registry_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=registry_dir)
+    os.chmod(staging, 0o755)
+    manifest["arrays"] = {}
+    for name in TREE_ARRAYS:
+        path = os.path.join(staging, f"{name}.npy")
+        np.save(path, arrays[name])
+        manifest["arrays"][name] = file_digest(path)
+    with open(os.path.join(staging, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.rename(staging, os.path.join(registry_dir, version))
+
+    latest = os.path.join(registry_dir, 'LATEST')
+    with open(f"{latest}.tmp", 'w') as f:
+        f.write(version)
+    os.replace(f"{latest}.tmp", latest)
+    return version
+
+def save_bundle(pipeline, city_price_map: dict, data_path: str, metrics: dict, registry_dir: str = REGISTRY_DIR):
+    """export_bundle for the training scripts: only gbr pipelines have flat trees, and failures are logged."""
+    if type(pipeline.named_steps['regressor']).__name__ != 'GradientBoostingRegressor':
+        logging.info("Registry bundles hold gbr models only; skipping the export for this backend.")
+        return
+    try:
+        version = export_bundle(pipeline, city_price_map, data_path, metrics, registry_dir)
+        logging.info(f"Successfully exported registry bundle {version} to {registry_dir}")
+    except Exception as e:
+        logging.error(f"Failed to export the registry bundle to {registry_dir}. Error: {e}")
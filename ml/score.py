@@ -0,0 +1,147 @@
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import joblib
+
+from config import DATA_PATH, MODEL_OUTPUT_PATH, CITY_MAP_OUTPUT_PATH, PREDICTIONS_OUTPUT_PATH
+from train import NUMERIC_FEATURES, CATEGORICAL_FEATURES, add_listing_features, apply_city_price_map
+
+PASSTHROUGH_COLUMNS = ['id', 'url', 'location', 'size_m2', 'price_km']
+# Numeric in the published listings; etl/transformer.py's processed Parquet still has the raw text.
+PUBLISHED_NUMERIC_COLUMNS = ['rooms', 'floor']
+
+_worker_model = None
+_worker_city_price_map = None
+
+def setup_logging():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def read_chunks(path: str, chunk_size: int):
+    """Yields the listings CSV or Parquet file chunk_size rows at a time."""
+    if path.endswith('.parquet'):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+def check_published_format(chunk: pd.DataFrame, path: str):
+    """
+    Scoring takes the listings as published by etl/prepare_for_publish.py. transformer.py's
+    output keeps rooms and floor as scraped ("Trosoban (3)", "Prizemlje"), which the features cannot use.
+    """
+    for column in PUBLISHED_NUMERIC_COLUMNS:
+        if column in chunk and not pd.api.types.is_numeric_dtype(chunk[column]):
+            values = chunk[column].dropna()
+            if pd.to_numeric(values, errors='coerce').isna().any():
+                raise ValueError(
+                    f"Column '{column}' of {path} holds unparsed values such as {values.iloc[0]!r}. score.py takes "
+                    f"the published listings: run etl/prepare_for_publish.py and score its CSV."
+                )
+
+def _init_worker(model_path: str, city_price_map: dict):
+    """Loads the pipeline once per worker process."""
+    global _worker_model, _worker_city_price_map
+    _worker_model = joblib.load(model_path)
+    _worker_city_price_map = city_price_map
+
+def score_chunk(chunk: pd.DataFrame) -> tuple:
+    """
+    Applies the training feature engineering to a chunk and scores it. Returns the output frame
+    and the CPU seconds the worker spent on it.
+    """
+    started = time.process_time()
+    features = apply_city_price_map(add_listing_features(chunk), _worker_city_price_map)
+    predicted = np.expm1(_worker_model.predict(features[NUMERIC_FEATURES + CATEGORICAL_FEATURES]))
+
+    result = pd.DataFrame({column: chunk[column].values for column in PASSTHROUGH_COLUMNS if column in chunk})
+    result['predicted_price_km'] = predicted
+    if 'price_km' in chunk:
+        price = pd.to_numeric(chunk['price_km'], errors='coerce').to_numpy(dtype=float)
+        result['residual_km'] = price - predicted
+        # Positive: listed above the model's valuation (over-priced); negative: under-priced.
+        result['residual_pct'] = (price - predicted) / predicted
+    return result, time.process_time() - started
+
+def score_file(input_path: str, output_path: str, model_path: str, city_price_map: dict, workers: int, chunk_size: int) -> dict:
+    """
+    Scores chunks on a process pool and appends them to the Parquet output in input order.
+    At most two chunks per worker are in flight, so memory does not grow with the input.
+    """
+    rows = 0
+    cpu_seconds = 0.0
+    writer = None
+    pending = []
+    started = time.perf_counter()
+
+    def write(future):
+        nonlocal rows, cpu_seconds, writer
+        result, chunk_cpu_seconds = future.result()
+        table = pa.Table.from_pandas(result, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(output_path, table.schema)
+        writer.write_table(table.cast(writer.schema))
+        rows += len(result)
+        cpu_seconds += chunk_cpu_seconds
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path, city_price_map)) as pool:
+            for chunk in read_chunks(input_path, chunk_size):
+                check_published_format(chunk, input_path)
+                pending.append(pool.submit(score_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    write(pending.pop(0))
+            for future in pending:
+                write(future)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    elapsed = time.perf_counter() - started
+    cores = min(workers, os.cpu_count() or 1)
+    return {
+        "rows": rows,
+        "workers": workers,
+        "cores": cores,
+        "chunk_size": chunk_size,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1),
+        "rows_per_second_per_core": round(rows / elapsed / cores, 1),
+        "rows_per_cpu_second": round(rows / cpu_seconds, 1) if cpu_seconds else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Score the listings dataset with the saved model and write predictions and residuals to Parquet.")
+    parser.add_argument('--input', default=DATA_PATH, help="Published listings CSV or Parquet file (etl/prepare_for_publish.py output; the default).")
+    parser.add_argument('--output', default=PREDICTIONS_OUTPUT_PATH)
+    parser.add_argument('--model', default=MODEL_OUTPUT_PATH)
+    parser.add_argument('--city-map', default=CITY_MAP_OUTPUT_PATH)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_logging()
+    with open(args.city_map) as f:
+        city_price_map = json.load(f)
+
+    logging.info(f"Scoring {args.input} with {args.workers} workers, {args.chunk_size} rows per chunk...")
+    try:
+        report = score_file(args.input, args.output, args.model, city_price_map, args.workers, args.chunk_size)
+    except ValueError as e:
+        logging.error(str(e))
+        raise SystemExit(1)
+    logging.info(f"Wrote {report['rows']} predictions to {args.output} in {report['seconds']:.2f}s")
+    logging.info(
+        f"Throughput: {report['rows_per_second']:,.0f} rows/s, {report['rows_per_second_per_core']:,.0f} rows/s per core "
+        f"({report['rows_per_cpu_second'] or 0:,.0f} rows per worker CPU second)"
+    )
+    print(json.dumps(report))
+
+if __name__ == "__main__":
+    main()
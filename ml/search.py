@@ -0,0 +1,171 @@
+import logging
+import math
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from scipy.stats import loguniform, uniform
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold, ParameterSampler
+from threadpoolctl import threadpool_limits
+
+import profiler
+from config import SEARCH_LEADERBOARD_PATH
+
+# Sampled for the random candidates; the fixed grid point from build_pipeline is always trial 0.
+SEARCH_SPACES = {
+    'gbr': {
+        'regressor__learning_rate': loguniform(0.01, 0.2),
+        'regressor__max_depth': [3, 4, 5, 6, 7],
+        'regressor__n_estimators': [100, 200, 400, 800],
+        'regressor__subsample': uniform(0.5, 0.5),
+    },
+    'hist': {
+        'regressor__learning_rate': loguniform(0.02, 0.2),
+        'regressor__max_iter': [100, 200, 400, 800],
+        'regressor__max_leaf_nodes': [7, 15, 31, 63],
+        'regressor__min_samples_leaf': [5, 10, 20, 40],
+        'regressor__l2_regularization': loguniform(1e-3, 10.0),
+    },
+}
+
+def _fit_fold(trial: int, fold: int, pipeline, params: dict, X: pd.DataFrame, y: pd.Series, train_idx, test_idx) -> tuple:
+    """
+    Fits one configuration on one fold with a single thread. Returns (trial, fold, R², usage),
+    usage being the fit and score's wall time, CPU time and peak RSS (profiler.measure).
+    """
+    with profiler.measure() as usage, threadpool_limits(limits=1), warnings.catch_warnings():
+        # Small rungs often miss a rare category in a fold's training part; the encoder zeroes it.
+        warnings.filterwarnings('ignore', message='Found unknown categories')
+        model = clone(pipeline).set_params(**params)
+        model.fit(X.iloc[train_idx], y.iloc[train_idx])
+        score = r2_score(y.iloc[test_idx], model.predict(X.iloc[test_idx]))
+    return trial, fold, score, usage
+
+def rung_sizes(n_rows: int, n_rungs: int, factor: int, min_rows: int) -> list:
+    """Training rows per rung: the last rung uses all of them, each earlier one 1/factor as many."""
+    return [max(min(min_rows, n_rows), n_rows // factor ** (n_rungs - 1 - rung)) for rung in range(n_rungs)]
+
+def successive_halving_search(pipeline, base_params: dict, search_space: dict, X: pd.DataFrame, y: pd.Series,
+                              time_budget: float, cores: int, n_candidates: int = 27, factor: int = 3,
+                              cv: int = 3, min_rows: int = 200, seed: int = 42) -> tuple:
+    """
+    Successive halving over n_candidates configurations: every rung cross-validates the surviving
+    configurations on a nested random subset of the training rows, and only the best 1/factor go
+    on to the next rung, which has factor times as many rows. Weak configurations are therefore
+    pruned after cheap fits on a small sample.
+
+    (configuration, fold) fits run on `cores` single-threaded workers. No rung is started when
+    the previous one's per-row fit cost says it cannot finish within time_budget seconds, and a
+    running rung is abandoned at the deadline. The winner is the best configuration of the
+    deepest rung that completed.
+
+    Returns (best params, best CV R², leaderboard frame).
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget
+    rng = np.random.default_rng(seed)
+
+    sampled = ParameterSampler(search_space, n_iter=n_candidates - 1, random_state=seed)
+    candidates = [dict(base_params)] + [
+        {name: value.item() if isinstance(value, np.generic) else value for name, value in params.items()}
+        for params in sampled
+    ]
+    # Enough rungs to narrow the field to one, but none smaller than min_rows.
+    n_rungs = max(1, min(math.ceil(math.log(len(candidates), factor)),
+                         1 + math.floor(math.log(max(len(X) / min_rows, 1), factor))))
+    sizes = rung_sizes(len(X), n_rungs, factor, min_rows)
+    order = rng.permutation(len(X))
+
+    trials = [
+        {'trial': i, 'status': 'running', 'rung': -1, 'rows': 0, 'cv_r2': np.nan, 'cv_r2_std': np.nan,
+         'fits': 0, 'fit_seconds': 0.0, 'params': params}
+        for i, params in enumerate(candidates)
+    ]
+    survivors = list(range(len(trials)))
+    seconds_per_row_fit = None
+
+    logging.info(f"Successive halving: {len(candidates)} candidates, {n_rungs} rungs of {sizes} rows, "
+                 f"{cv}-fold CV, {cores} cores, {time_budget:.0f}s budget.")
+
+    with Parallel(n_jobs=cores, return_as='generator_unordered') as parallel:
+        for rung, size in enumerate(sizes):
+            remaining = deadline - time.perf_counter()
+            fits = len(survivors) * cv
+            if seconds_per_row_fit is not None:
+                projected = seconds_per_row_fit * size * fits / cores
+                if projected > remaining:
+                    logging.info(f"Rung {rung}: projected {projected:.1f}s exceeds the remaining {remaining:.1f}s; stopping.")
+                    break
+            if remaining <= 0:
+                break
+
+            rows = order[:size]
+            X_rung, y_rung = X.iloc[rows], y.iloc[rows]
+            folds = list(KFold(n_splits=cv, shuffle=True, random_state=seed).split(X_rung))
+            jobs = (
+                delayed(_fit_fold)(trial, fold, pipeline, trials[trial]['params'], X_rung, y_rung, train_idx, test_idx)
+                for trial in survivors for fold, (train_idx, test_idx) in enumerate(folds)
+            )
+
+            scores = {trial: [] for trial in survivors}
+            rung_fit_seconds = 0.0
+            for trial, fold, score, usage in parallel(jobs):
+                seconds = usage['wall_s']
+                if profiler.active() is not None:
+                    profiler.active().folds.append({"trial": trial, "rung": rung, "rows": size, "fold": fold, "r2": score, **usage})
+                scores[trial].append(score)
+                trials[trial]['fits'] += 1
+                trials[trial]['fit_seconds'] += seconds
+                rung_fit_seconds += seconds
+                if time.perf_counter() > deadline:
+                    break
+
+            completed = [trial for trial in survivors if len(scores[trial]) == cv]
+            for trial in completed:
+                trials[trial].update(rung=rung, rows=size, cv_r2=float(np.mean(scores[trial])),
+                                     cv_r2_std=float(np.std(scores[trial])))
+            done_fits = sum(len(fold_scores) for fold_scores in scores.values())
+            if done_fits:
+                seconds_per_row_fit = rung_fit_seconds / done_fits / size
+            logging.info(f"Rung {rung}: {len(completed)}/{len(survivors)} candidates on {size} rows, "
+                         f"{time.perf_counter() - started:.1f}s elapsed.")
+
+            if len(completed) < len(survivors):
+                logging.info(f"Rung {rung}: time budget reached before every candidate finished; stopping.")
+                break
+
+            ranked = sorted(completed, key=lambda trial: trials[trial]['cv_r2'], reverse=True)
+            keep = max(1, len(ranked) // factor) if rung < len(sizes) - 1 else len(ranked)
+            for trial in ranked[keep:]:
+                trials[trial]['status'] = 'pruned'
+            survivors = ranked[:keep]
+
+    finished = [trial for trial in trials if trial['rung'] >= 0]
+    if not finished:
+        raise RuntimeError(f"The {time_budget:.0f}s time budget ended before any candidate completed its first rung.")
+    best = max(finished, key=lambda trial: (trial['rung'], trial['cv_r2']))
+    for trial in trials:
+        if trial['status'] == 'running':
+            trial['status'] = 'finalist' if trial['rung'] == len(sizes) - 1 else 'stopped'
+    best['status'] = 'best'
+
+    leaderboard = pd.DataFrame([
+        {**{key: value for key, value in trial.items() if key != 'params'},
+         **{name.replace('regressor__', ''): value for name, value in trial['params'].items()}}
+        for trial in trials
+    ])
+    leaderboard = leaderboard.sort_values(['rung', 'cv_r2'], ascending=[False, False], na_position='last')
+    leaderboard.insert(0, 'rank', range(1, len(leaderboard) + 1))
+    logging.info(f"Search finished in {time.perf_counter() - started:.1f}s; best trial {best['trial']} "
+                 f"with CV R² {best['cv_r2']:.4f} on {best['rows']} rows.")
+    return best['params'], best['cv_r2'], leaderboard
+
+def save_leaderboard(leaderboard: pd.DataFrame, path: str = SEARCH_LEADERBOARD_PATH):
+    try:
+        leaderboard.to_csv(path, index=False, float_format='%.6g')
+        logging.info(f"Successfully saved the search leaderboard to {path}")
+    except Exception as e:
+        logging.error(f"Failed to save the search leaderboard to {path}. Error: {e}")
@@ -1,17 +1,25 @@
+import argparse
+import json
 import logging
+import os
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
+from sklearn.preprocessing import StandardScaler, OneHotEncoder, OrdinalEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
-from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
 from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
 import joblib
 import re
 
-from config import DATA_PATH, LOG_FILE_PATH, MODEL_OUTPUT_PATH
+from config import (DATA_PATH, LOG_FILE_PATH, MODEL_OUTPUT_PATH, CITY_MAP_OUTPUT_PATH, INCREMENTAL_STATE_PATH, DATASET_CACHE_DIR,
+                    PROFILE_REPORT_PATH)
+import profiler
+from dataset import load_listings
+from comparables import build_comparables_index, save_comparables_index
+from registry import save_bundle
 
 def setup_logging():
     """Sets up a logger for the ML training pipeline."""
@@ -50,93 +58,311 @@ def parse_year(year_str: str) -> int:
         
     return np.nan
 
-def feature_engineering_pipeline(df: pd.DataFrame) -> pd.DataFrame:
+NUMERIC_FEATURES = [
+    'size_m2', 'rooms', 'floor', 'bathrooms', 'property_age', 
+    'm2_per_room', 'desc_len', 'city_median_price_per_m2',
+    'has_elevator', 'has_parking', 'has_balcony', 'is_registered', 
+    'has_armored_door', 'has_renoviran', 'has_pogled', 
+    'has_novogradnja_desc', 'has_garaza_desc'
+]
+
+CATEGORICAL_FEATURES = ['city', 'condition', 'furnished', 'heating_type']
+
+# The raw columns training reads: what the features are derived from, plus the comparables' listing fields.
+RAW_COLUMNS = [
+    'id', 'url', 'title', 'location', 'year_built', 'price_km', 'size_m2', 'rooms', 'floor', 'bathrooms',
+    'description', 'condition', 'furnished', 'heating_type',
+    'has_elevator', 'has_parking', 'has_balcony', 'is_registered', 'has_armored_door',
+]
+
+# Cities with fewer listings are pooled as 'Other'; price_per_m2 outside the widened quantile range is dropped.
+RARE_CITY_MIN_LISTINGS = 5
+OUTLIER_QUANTILES = (0.05, 0.95)
+OUTLIER_IQR_FACTOR = 1.5
+
+def map_distinct(series: pd.Series, func) -> pd.Series:
     """
-    Applies a comprehensive feature engineering and cleaning pipeline to the raw data.
-    This function is the core of transforming raw listings into a model-ready dataset.
+    Equivalent to series.apply(func) for a pure func, but calls it once per distinct value
+    (missing values included) and broadcasts the results, so the cost follows the number of
+    distinct locations or year strings rather than the number of listings.
+    """
+    codes, uniques = pd.factorize(series)
+    # Code -1 marks a missing value; it picks the result appended for NaN at the end.
+    results = np.array([func(value) for value in uniques] + [func(np.nan)], dtype=object)
+    return pd.Series(results[codes], index=series.index).infer_objects()
+
+def contains_any(text: pd.Series, words: tuple) -> pd.Series:
+    """
+    Whether each Arrow-backed string contains any of the words. One RE2 scan per literal word is
+    several times faster than a single scan for an alternation, which RE2 cannot prefilter.
+    """
+    found = text.str.contains(re.escape(words[0]), regex=True)
+    for word in words[1:]:
+        found |= text.str.contains(re.escape(word), regex=True)
+    return found
+
+def lowercase_descriptions(descriptions: pd.Series) -> pd.Series:
+    """
+    Lowercases the descriptions with pandas' Arrow-backed string kernels; missing ones become ''.
+    Arrow lowercases one character at a time, so the rare rows containing 'İ' (Python lowers it
+    to two characters) or 'Σ' (final sigma depends on context) fall back to str.lower.
+    """
+    text = descriptions.astype(pd.StringDtype('pyarrow'))
+    lowered = text.str.lower()
+    special = contains_any(text, ('İ', 'Σ')).fillna(False).astype(bool)
+    if special.any():
+        lowered[special] = descriptions[special].astype(object).str.lower()
+    return lowered.fillna('')
+
+def description_features(description: pd.Series) -> pd.DataFrame:
+    """
+    The length and keyword flags of lowercased descriptions. The text is scanned by compiled
+    (RE2) kernels on one Arrow copy instead of Python string objects.
+    """
+    keyword_flags = {
+        'has_renoviran': ('renoviran', 'adaptiran'),
+        'has_pogled': ('pogled',),
+        'has_novogradnja_desc': ('novogradnja',),
+        'has_garaza_desc': ('garaž',),
+    }
+    features = pd.DataFrame({'desc_len': description.str.len().astype('int64')}, index=description.index)
+    for column, words in keyword_flags.items():
+        features[column] = contains_any(description, words).astype(int)
+    return features
+
+def raw_description_features(descriptions: pd.Series) -> pd.DataFrame:
+    return description_features(lowercase_descriptions(descriptions))
+
+# Training needs the descriptions only for these, so dataset.load_listings derives them in place of the text.
+DESCRIPTION_DERIVED = {'description': raw_description_features}
+
+def add_listing_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Derives the per-listing features (raw city, age, size ratio, description keywords).
+    Each row depends only on itself, so this is shared by training and batch scoring.
     """
-    logging.info("Starting advanced feature engineering...")
-    
     df = df.copy()
 
-    df['city'] = df['location'].apply(lambda x: x.split('-')[0].strip() if isinstance(x, str) else 'Unknown')
-    city_counts = df['city'].value_counts()
-    rare_cities = city_counts[city_counts < 5].index
-    df['city'] = df['city'].replace(rare_cities, 'Other')
-    logging.info(f"Created 'city' feature with {df['city'].nunique()} categories.")
+    df['city'] = map_distinct(df['location'], lambda x: x.split('-')[0].strip() if isinstance(x, str) else 'Unknown')
 
     current_year = 2025
-    df['parsed_year'] = df['year_built'].apply(parse_year)
+    df['parsed_year'] = map_distinct(df['year_built'], parse_year)
     df['property_age'] = current_year - df['parsed_year']
-    logging.info("Created 'property_age' feature.")
 
     df['m2_per_room'] = df['size_m2'] / df['rooms']
     df['m2_per_room'] = df['m2_per_room'].replace([np.inf, -np.inf], np.nan)
-    logging.info("Created 'm2_per_room' interaction feature.")
 
-    df['description'] = df['description'].str.lower().fillna('')
-    df['desc_len'] = df['description'].apply(len)
-    df['has_renoviran'] = df['description'].str.contains('renoviran|adaptiran', regex=True).astype(int)
-    df['has_pogled'] = df['description'].str.contains('pogled', regex=False).astype(int)
-    df['has_novogradnja_desc'] = df['description'].str.contains('novogradnja', regex=False).astype(int)
-    df['has_garaza_desc'] = df['description'].str.contains('garaž', regex=False).astype(int)
-    logging.info("Created text-based features from description (length, keywords, etc.).")
+    # Listings loaded with DESCRIPTION_DERIVED carry these already and no description.
+    if 'description' in df:
+        description = lowercase_descriptions(df['description'])
+        # Descriptions loaded as Arrow strings (dataset.py) stay in Arrow instead of becoming Python objects.
+        df['description'] = description if isinstance(df['description'].dtype, pd.StringDtype) else description.astype(object)
+        for column, values in description_features(description).items():
+            df[column] = values
 
-    df['price_per_m2'] = df['price_km'] / df['size_m2']
-    
-    Q1 = df['price_per_m2'].quantile(0.05)
-    Q3 = df['price_per_m2'].quantile(0.95)
-    IQR = Q3 - Q1
-    lower_bound = Q1 - 1.5 * IQR
-    upper_bound = Q3 + 1.5 * IQR
+    # The typed loader reads these as nullable Int8; the model takes float64 with NaN for missing.
+    for column in ('floor', 'bathrooms'):
+        df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+    return df
+
+def apply_city_price_map(df: pd.DataFrame, city_price_map: dict) -> pd.DataFrame:
+    """
+    Encodes location value for already featurised listings using a saved city price map.
+    Cities the map does not know were rare at training time and are scored as 'Other'.
+    """
+    df = df.copy()
+    if 'Other' in city_price_map:
+        df['city'] = df['city'].where(df['city'].isin(city_price_map.keys()), 'Other')
+    df['city_median_price_per_m2'] = df['city'].map(city_price_map)
+    return df
+
+def feature_engineering_pipeline(df: pd.DataFrame) -> tuple:
+    """
+    Applies a comprehensive feature engineering and cleaning pipeline to the raw data.
+    This function is the core of transforming raw listings into a model-ready dataset.
+    Returns the filtered listings and the city price map derived from them; saving the map is up to the caller.
+    """
+    logging.info("Starting advanced feature engineering...")
     
-    initial_rows = len(df)
-    df_filtered = df[(df['price_per_m2'] >= lower_bound) & (df['price_per_m2'] <= upper_bound)]
+    with profiler.stage('listing_features'):
+        df = add_listing_features(df)
+    logging.info("Created 'property_age', 'm2_per_room' and text-based features from description (length, keywords, etc.).")
+
+    city_counts = df['city'].value_counts()
+    rare_cities = city_counts[city_counts < RARE_CITY_MIN_LISTINGS].index
+    df['city'] = df['city'].replace(rare_cities, 'Other')
+    logging.info(f"Created 'city' feature with {df['city'].nunique()} categories.")
+
+    with profiler.stage('outlier_filter'):
+        df['price_per_m2'] = df['price_km'] / df['size_m2']
+
+        Q1 = df['price_per_m2'].quantile(OUTLIER_QUANTILES[0])
+        Q3 = df['price_per_m2'].quantile(OUTLIER_QUANTILES[1])
+        IQR = Q3 - Q1
+        lower_bound = Q1 - OUTLIER_IQR_FACTOR * IQR
+        upper_bound = Q3 + OUTLIER_IQR_FACTOR * IQR
+
+        initial_rows = len(df)
+        df_filtered = df[(df['price_per_m2'] >= lower_bound) & (df['price_per_m2'] <= upper_bound)].copy()
     rows_removed = initial_rows - len(df_filtered)
     logging.info(f"Removed {rows_removed} rows identified as outliers based on price_per_m2 IQR.")
 
-    city_price_map = df_filtered.groupby('city')['price_per_m2'].median()
-    df_filtered['city_median_price_per_m2'] = df_filtered['city'].map(city_price_map)
+    with profiler.stage('city_price_map'):
+        city_price_map = df_filtered.groupby('city')['price_per_m2'].median().to_dict()
+        df_filtered['city_median_price_per_m2'] = df_filtered['city'].map(city_price_map)
     logging.info("Created 'city_median_price_per_m2' feature to encode location value.")
+    
+    return df_filtered, city_price_map
 
-    city_price_map = df_filtered.groupby('city')['price_per_m2'].median().to_dict()
+def save_city_price_map(city_price_map: dict, path: str = CITY_MAP_OUTPUT_PATH):
+    """Leaves an identical map untouched, so file watchers (e.g. the API's hot reload) see no change."""
     try:
-        import json
-        with open('city_price_map.json', 'w') as f:
+        if os.path.exists(path):
+            with open(path) as f:
+                if json.load(f) == city_price_map:
+                    logging.info(f"City price map at {path} is unchanged.")
+                    return
+        with open(path, 'w') as f:
             json.dump(city_price_map, f)
-        logging.info("Successfully saved city_price_map.json")
+        logging.info(f"Successfully saved the city price map to {path}")
     except Exception as e:
-        logging.error(f"Failed to save city_price_map.json. Error: {e}")
-    
-    return df_filtered
+        logging.error(f"Failed to save the city price map to {path}. Error: {e}")
+
+TRAINING_BACKENDS = ('gbr', 'hist')
+
+def build_pipeline(backend: str, numeric_features: list, categorical_features: list) -> tuple:
+    """
+    Returns (pipeline, param_grid, n_jobs for the CV search) for a training backend.
+
+    'gbr' one-hot encodes the categoricals for a GradientBoostingRegressor; the API compiles
+    this pipeline into its tree engine and vectorizer. 'hist' ordinal-encodes them for a
+    HistGradientBoostingRegressor with native categorical splits and native missing-value
+    handling, which fits on all cores; the API serves it through the sklearn pipeline.
+    """
+    if backend == 'gbr':
+        numeric_transformer = Pipeline(steps=[
+            ('imputer', SimpleImputer(strategy='median')),
+            ('scaler', StandardScaler())
+        ])
+
+        categorical_transformer = Pipeline(steps=[
+            ('imputer', SimpleImputer(strategy='most_frequent')),
+            ('onehot', OneHotEncoder(handle_unknown='ignore', drop='first'))
+        ])
+        
+        preprocessor = ColumnTransformer(
+            transformers=[
+                ('num', numeric_transformer, numeric_features),
+                ('cat', categorical_transformer, categorical_features)
+            ],
+            remainder='passthrough'
+        )
+
+        pipeline = Pipeline(steps=[('preprocessor', preprocessor),
+                                   ('regressor', GradientBoostingRegressor(random_state=42))])
+        
+        param_grid = {
+            'regressor__learning_rate': [0.03], 
+            'regressor__max_depth': [5], 
+            'regressor__n_estimators': [400], 
+            'regressor__subsample': [0.7]
+        }
+        return pipeline, param_grid, -1
+
+    if backend == 'hist':
+        categorical_transformer = OrdinalEncoder(
+            handle_unknown='use_encoded_value', unknown_value=np.nan, encoded_missing_value=np.nan
+        )
+        preprocessor = ColumnTransformer(
+            transformers=[
+                ('num', 'passthrough', numeric_features),
+                ('cat', categorical_transformer, categorical_features)
+            ]
+        )
+        # The ordinal-encoded categoricals come last in the transformed matrix.
+        is_categorical = [False] * len(numeric_features) + [True] * len(categorical_features)
+        regressor = HistGradientBoostingRegressor(
+            categorical_features=is_categorical, early_stopping=False, random_state=42
+        )
+
+        pipeline = Pipeline(steps=[('preprocessor', preprocessor), ('regressor', regressor)])
+
+        param_grid = {
+            'regressor__learning_rate': [0.05],
+            'regressor__max_iter': [400],
+            'regressor__max_leaf_nodes': [15],
+            'regressor__min_samples_leaf': [10],
+            'regressor__l2_regularization': [1.0]
+        }
+        # Each fit already uses every core through OpenMP, so the folds run one after another.
+        return pipeline, param_grid, None
+
+    raise ValueError(f"Unknown training backend: {backend}. Choose from {TRAINING_BACKENDS}.")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the apartment price model.")
+    parser.add_argument('--backend', choices=TRAINING_BACKENDS, default='gbr',
+                        help="gbr: one-hot + GradientBoostingRegressor (default). hist: native categoricals + HistGradientBoostingRegressor.")
+    parser.add_argument('--refresh-features', action='store_true',
+                        help="Rebuild the cached feature frame even if the data and feature code are unchanged.")
+    parser.add_argument('--no-feature-cache', action='store_true', help="Neither read nor write the feature cache.")
+    parser.add_argument('--search', action='store_true',
+                        help="Pick hyperparameters with a time-budgeted successive-halving search instead of the fixed grid point.")
+    parser.add_argument('--time-budget', type=float, default=600, help="Wall-clock seconds for --search.")
+    parser.add_argument('--cores', type=int, default=os.cpu_count() or 1, help="Parallel single-threaded fits for --search.")
+    parser.add_argument('--candidates', type=int, default=27, help="Configurations sampled for --search, the fixed grid point included.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Fold only listings not seen before into the saved incremental state and add trees on them "
+                             "(gbr backend). Without a saved state, trains in full and creates it.")
+    parser.add_argument('--trees-per-update', type=int, default=10, help="Trees added per --incremental update.")
+    parser.add_argument('--profile', nargs='?', const=PROFILE_REPORT_PATH, metavar='REPORT',
+                        help="Record wall time, CPU time and peak RSS per stage and per CV fold and write them as JSON "
+                             "(default: profile_report.json). Compare two reports with: python profiler.py compare A B")
+    args = parser.parse_args()
+    if args.incremental and args.backend != 'gbr':
+        parser.error("--incremental supports only the gbr backend.")
+    return args
 
 def main():
     """Main function to orchestrate the ML training and evaluation pipeline."""
+    args = parse_args()
     setup_logging()
     logging.info("--- Starting ML Model Training Service ---")
+    run_profiler = profiler.start(args.profile) if args.profile else None
+
+    if args.incremental and os.path.exists(INCREMENTAL_STATE_PATH):
+        from incremental import update_incrementally
+        with profiler.stage('incremental_update'):
+            update_incrementally(args.trees_per_update)
+        if run_profiler:
+            run_profiler.save({"mode": "incremental", "trees_per_update": args.trees_per_update})
+        logging.info("--- ML Model Training Service Finished ---")
+        return
 
     try:
-        df = pd.read_csv(DATA_PATH)
-        logging.info(f"Successfully loaded data. Initial shape: {df.shape}")
+        if args.no_feature_cache:
+            with profiler.stage('load_listings'):
+                df = load_listings(DATA_PATH, RAW_COLUMNS, DATASET_CACHE_DIR, DESCRIPTION_DERIVED)
+            logging.info(f"Successfully loaded data. Initial shape: {df.shape}")
+            with profiler.stage('feature_engineering'):
+                df, city_price_map = feature_engineering_pipeline(df)
+        else:
+            from feature_cache import load_engineered_features
+            with profiler.stage('engineered_features'):
+                df, city_price_map = load_engineered_features(DATA_PATH, refresh=args.refresh_features)
     except FileNotFoundError:
         logging.error(f"Data file not found at {DATA_PATH}. Aborting.")
         return
 
-    df = feature_engineering_pipeline(df)
-    df['bathrooms'] = pd.to_numeric(df['bathrooms'], errors='coerce')
+    save_city_price_map(city_price_map)
     
     TARGET = 'price_km'
     df.dropna(subset=[TARGET], inplace=True)
+    with profiler.stage('comparables_index'):
+        save_comparables_index(build_comparables_index(df))
     
-    numeric_features = [
-        'size_m2', 'rooms', 'floor', 'bathrooms', 'property_age', 
-        'm2_per_room', 'desc_len', 'city_median_price_per_m2',
-        'has_elevator', 'has_parking', 'has_balcony', 'is_registered', 
-        'has_armored_door', 'has_renoviran', 'has_pogled', 
-        'has_novogradnja_desc', 'has_garaza_desc'
-    ]
-    
-    categorical_features = ['city', 'condition', 'furnished', 'heating_type']
+    numeric_features = NUMERIC_FEATURES
+    categorical_features = CATEGORICAL_FEATURES
 
     features = numeric_features + categorical_features
     logging.info(f"Selected features for modeling: {features}")
@@ -150,58 +376,70 @@ def main():
     X_train, X_test, y_train, y_test = train_test_split(X, y_log, test_size=0.2, random_state=42)
     logging.info(f"Data split into training ({X_train.shape[0]} rows) and testing ({X_test.shape[0]} rows) sets.")
 
-    numeric_transformer = Pipeline(steps=[
-        ('imputer', SimpleImputer(strategy='median')),
-        ('scaler', StandardScaler())
-    ])
-
-    categorical_transformer = Pipeline(steps=[
-        ('imputer', SimpleImputer(strategy='most_frequent')),
-        ('onehot', OneHotEncoder(handle_unknown='ignore', drop='first'))
-    ])
-    
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('num', numeric_transformer, numeric_features),
-            ('cat', categorical_transformer, categorical_features)
-        ],
-        remainder='passthrough'
-    )
-
-    pipeline = Pipeline(steps=[('preprocessor', preprocessor),
-                               ('regressor', GradientBoostingRegressor(random_state=42))])
-    
-    param_grid = {
-        'regressor__learning_rate': [0.03], 
-        'regressor__max_depth': [5], 
-        'regressor__n_estimators': [400], 
-        'regressor__subsample': [0.7]
-    }
+    pipeline, param_grid, n_jobs = build_pipeline(args.backend, numeric_features, categorical_features)
+    logging.info(f"Training backend: {args.backend}")
 
     logging.info("--- Starting Model Training ---")
-    grid_search = GridSearchCV(pipeline, param_grid, cv=5, scoring='r2', n_jobs=-1)
-    grid_search.fit(X_train, y_train)
+    if args.search:
+        from search import SEARCH_SPACES, successive_halving_search, save_leaderboard
+        base_params = {name: values[0] for name, values in param_grid.items()}
+        with profiler.stage('cv_search'):
+            best_params, best_score, leaderboard = successive_halving_search(
+                pipeline, base_params, SEARCH_SPACES[args.backend], X_train, y_train,
+                time_budget=args.time_budget, cores=args.cores, n_candidates=args.candidates
+            )
+        save_leaderboard(leaderboard)
+        logging.info(f"Best parameters: {best_params}")
+        # The refit on the full training split comes after the search budget.
+        with profiler.stage('refit'):
+            best_model = pipeline.set_params(**best_params).fit(X_train, y_train)
+    else:
+        if run_profiler:
+            # Each fold (and the refit) measures its preprocessing fit, regressor fit and predict.
+            grid_search = profiler.profiled_grid_search(pipeline, param_grid, cv=5, n_jobs=n_jobs)
+        else:
+            grid_search = GridSearchCV(pipeline, param_grid, cv=5, scoring='r2', n_jobs=n_jobs)
+        with profiler.stage('cv_search'):
+            grid_search.fit(X_train, y_train)
+        best_score = grid_search.best_score_
+        best_model = grid_search.best_estimator_
+        if run_profiler:
+            profiler.record_grid_search(run_profiler, grid_search)
+            best_model = best_model.pipeline
 
     logging.info("--- Model Training Finished ---")
-    logging.info(f"Best cross-validation R² score: {grid_search.best_score_:.4f}")
-
-    best_model = grid_search.best_estimator_
+    logging.info(f"Best cross-validation R² score: {best_score:.4f}")
     
-    y_pred_log = best_model.predict(X_test)
-    y_pred = np.expm1(y_pred_log)
-    y_test_actual = np.expm1(y_test)
+    with profiler.stage('evaluate'):
+        y_pred_log = best_model.predict(X_test)
+        y_pred = np.expm1(y_pred_log)
+        y_test_actual = np.expm1(y_test)
 
-    r2 = r2_score(y_test_actual, y_pred)
-    mae = mean_absolute_error(y_test_actual, y_pred)
-    rmse = np.sqrt(mean_squared_error(y_test_actual, y_pred))
+        r2 = r2_score(y_test_actual, y_pred)
+        mae = mean_absolute_error(y_test_actual, y_pred)
+        rmse = np.sqrt(mean_squared_error(y_test_actual, y_pred))
 
     logging.info("--- Model Performance on Test Set ---")
     logging.info(f"R-squared (R²): {r2:.4f}")
     logging.info(f"Mean Absolute Error (MAE): {mae:,.2f} KM")
     logging.info(f"Root Mean Squared Error (RMSE): {rmse:,.2f} KM")
 
-    joblib.dump(best_model, MODEL_OUTPUT_PATH)
-    logging.info(f"Successfully saved the pipeline to {MODEL_OUTPUT_PATH}")
+    with profiler.stage('save_model'):
+        joblib.dump(best_model, MODEL_OUTPUT_PATH)
+        logging.info(f"Successfully saved the pipeline to {MODEL_OUTPUT_PATH}")
+        save_bundle(best_model, city_price_map, DATA_PATH, {"cv_r2": best_score, "test_r2": r2, "test_mae": mae, "test_rmse": rmse})
+
+    if args.incremental:
+        from incremental import initial_state, save_state
+        with profiler.stage('incremental_state'):
+            save_state(initial_state(load_listings(DATA_PATH, RAW_COLUMNS, DATASET_CACHE_DIR, DESCRIPTION_DERIVED), best_model))
+
+    if run_profiler:
+        run_profiler.save({
+            "mode": "search" if args.search else "grid", "backend": args.backend, "feature_cache": not args.no_feature_cache,
+            "rows": len(df), "train_rows": len(X_train), "test_rows": len(X_test),
+            "cv_r2": best_score, "test_r2": r2, "test_mae": mae, "test_rmse": rmse,
+        })
     logging.info("--- ML Model Training Service Finished ---")
 
 if __name__ == "__main__":